@@ -0,0 +1,110 @@
+"""Throughput of ``clean_text`` against the former regular-expression chain.
+
+The former version normalized every row with pandas string methods; the
+current one normalizes the distinct labels only, with a label cache kept
+across calls. Labels repeat like in the ROME sheets: ``--labels`` distinct
+values spread over ``--rows`` rows.
+
+Usage:
+    python -m benchmarks.bench_clean --rows 1000000 3000000 --labels 20000
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import data_processing
+
+ACCENTED_WORDS = [
+    "Élaboration",
+    "Contrôle",
+    "qualité",
+    "Gérer",
+    "Sécurité",
+    "Réglementation",
+    "équipe",
+    "Maîtrise",
+    "Prévention",
+    "Hygiène",
+    "Accueil",
+    "Négociation",
+]
+SEPARATORS = [" ", " / ", " - ", " – ", "; ", " • ", ", ", " (", ") ", " ", "\n"]
+
+
+def make_labels(n_labels: int, seed: int = 0) -> np.ndarray:
+    """Build competence-like labels with accents, bullets and punctuation."""
+    rng = np.random.default_rng(seed)
+    labels = []
+    for i in range(n_labels):
+        words = rng.choice(ACCENTED_WORDS, size=rng.integers(2, 7))
+        seps = rng.choice(SEPARATORS, size=len(words))
+        labels.append("".join(f"{w}{s}" for w, s in zip(words, seps)) + f"n°{i}.")
+    return np.array(labels, dtype=object)
+
+
+def legacy_clean_text(s: pd.Series) -> pd.Series:
+    """The former ``clean_text``, row by row."""
+    s = (
+        s.astype(str)
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("utf-8")
+    )
+    s = s.str.replace(r"[\u00A0\r\n\t]+", " ", regex=True)
+    s = s.str.replace(r"[•;/\-–—]", " ", regex=True)
+    s = s.str.replace(r"[(){}\[\],.’‘’“”«»\\]", " ", regex=True)
+    return s.str.replace(r"\s+", " ", regex=True).str.strip().str.lower()
+
+
+def _median_seconds(fn, repeat, before=None):
+    runs = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 3_000_000])
+    parser.add_argument("--labels", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--skip-legacy", action="store_true", help="skip the former version (slow)"
+    )
+    args = parser.parse_args()
+
+    labels = make_labels(args.labels, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    print(f"{'rows':>9} {'version':<22} {'median s':>9} {'rows/s':>11}")
+    for n_rows in args.rows:
+        s = pd.Series(labels[rng.integers(0, len(labels), size=n_rows)])
+        versions = [
+            (
+                "clean_text (cold)",
+                data_processing.clean_text,
+                data_processing._clean_label.cache_clear,
+            ),
+            ("clean_text (warm)", data_processing.clean_text, None),
+        ]
+        if not args.skip_legacy:
+            versions.insert(0, ("regex chain (former)", legacy_clean_text, None))
+
+        results = []
+        for label, fn, before in versions:
+            seconds, result = _median_seconds(lambda: fn(s), args.repeat, before)
+            results.append(result)
+            print(f"{n_rows:>9} {label:<22} {seconds:>9.2f} {n_rows / seconds:>11.0f}")
+        assert all(r.equals(results[0]) for r in results[1:])
+
+
+if __name__ == "__main__":
+    main()
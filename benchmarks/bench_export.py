@@ -0,0 +1,111 @@
+"""Write/read throughput, file size and peak memory of the raw passerelle exports.
+
+Usage:
+    python -m benchmarks.bench_export --jobs 1500 --clients 100 [--memory]
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks import synthetic
+from core import export, passerelle_engine
+
+
+def _measure(fn, trace_memory):
+    """Run ``fn`` and return (seconds, peak bytes or None, result)."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=1500)
+    parser.add_argument("--skills", type=int, default=3000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--memory", action="store_true", help="track peak memory (slower)"
+    )
+    args = parser.parse_args()
+
+    skills_df = synthetic.make_skills_frame(
+        n_jobs=args.jobs, n_skills=args.skills, seed=args.seed
+    )
+    client_codes = list(
+        synthetic.make_client_frame(skills_df, args.clients, seed=args.seed)[
+            "Code ROME"
+        ]
+    )
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    non_client_codes = sorted(set(matrix.job_codes) - set(client_codes))
+
+    def sheets():
+        return [
+            (
+                "Passerelles entrantes",
+                passerelle_engine.iter_transitions(
+                    matrix, non_client_codes, client_codes
+                ),
+            ),
+            (
+                "Passerelles sortantes",
+                passerelle_engine.iter_transitions(
+                    matrix, client_codes, non_client_codes
+                ),
+            ),
+        ]
+
+    def in_memory_excel():
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+            for name, batches in sheets():
+                pd.concat(batches, ignore_index=True).to_excel(
+                    writer, index=False, sheet_name=name
+                )
+        return buffer.getvalue()
+
+    def streamed(writer):
+        def run():
+            buffer = io.BytesIO()
+            writer(buffer, sheets(), columns=passerelle_engine.TRANSITION_COLUMNS)
+            return buffer.getvalue()
+
+        return run
+
+    readers = {
+        "xlsx": lambda data: pd.read_excel(io.BytesIO(data), sheet_name=None),
+        "parquet": lambda data: pd.read_parquet(io.BytesIO(data)),
+        "csv.gz": lambda data: pd.read_csv(io.BytesIO(data), compression="gzip"),
+    }
+    runs = [("xlsx (ExcelWriter)", "xlsx", in_memory_excel)] + [
+        (label, extension, streamed(writer))
+        for label, (writer, extension, _) in export.STREAM_FORMATS.items()
+    ]
+
+    print(
+        f"{'export':<26} {'write s':>8} {'read s':>8} {'size MiB':>9} {'peak MiB':>9}"
+    )
+    for label, extension, fn in runs:
+        write_time, peak, data = _measure(fn, args.memory)
+        read_time, _, _ = _measure(lambda: readers[extension](data), False)
+        peak_str = f"{peak / 2**20:>9.1f}" if peak is not None else f"{'-':>9}"
+        print(
+            f"{label:<26} {write_time:>8.2f} {read_time:>8.2f} "
+            f"{len(data) / 2**20:>9.1f} {peak_str}"
+        )
+
+
+if __name__ == "__main__":
+    main()
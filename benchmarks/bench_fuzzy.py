@@ -0,0 +1,128 @@
+"""Latency and agreement of the trigram fuzzy fallback against a full scan.
+
+Keys are synthetic labels of 3 to 7 pseudo-words; queries are keys with a typo and a
+word dropped. The full scan scores every key of the mapping for each label;
+the index only scores its shortlist. The last line runs the fallback of
+``add_macro_competence`` on a ``--rows`` competence file.
+
+Usage:
+    python -m benchmarks.bench_fuzzy --keys 20000 --queries 500 --rows 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import data_processing, fuzzy_matcher, macro_mapping
+
+
+def make_keys(n_keys: int, n_words: int = 3000, seed: int = 0) -> pd.Series:
+    """Build distinct cleaned labels of 3 to 7 words from a pseudo-word list."""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    words = [
+        "".join(rng.choice(letters, size=rng.integers(3, 11))) for _ in range(n_words)
+    ]
+    keys = {" ".join(rng.choice(words, size=rng.integers(3, 8))) for _ in range(n_keys)}
+    return pd.Series(sorted(keys))
+
+
+def perturb(label: str, rng: np.random.Generator) -> str:
+    """Drop one word (when there are several) and swap two letters."""
+    words = label.split()
+    if len(words) > 2:
+        del words[rng.integers(0, len(words))]
+    text = " ".join(words)
+    if len(text) > 3:
+        i = int(rng.integers(0, len(text) - 1))
+        text = text[:i] + text[i + 1] + text[i] + text[i + 2 :]
+    return text
+
+
+def full_scan(index: fuzzy_matcher.TrigramIndex, label: str, threshold: float):
+    """Best key by scoring every key (reference)."""
+    grams = fuzzy_matcher.trigrams(label)
+    best, best_score = -1, 0.0
+    for position, key in enumerate(index.keys):
+        key_grams = fuzzy_matcher.trigrams(key)
+        union = len(grams | key_grams)
+        score = len(grams & key_grams) / union if union else 0.0
+        if score > best_score:
+            best, best_score = position, score
+    return (best, best_score) if best_score >= threshold else (-1, 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument(
+        "--threshold", type=float, default=fuzzy_matcher.DEFAULT_THRESHOLD
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    keys = make_keys(args.keys, seed=args.seed)
+    mapping = macro_mapping.MacroMapping.compile(
+        {key: f"Macro-compétence {i % 500}" for i, key in enumerate(keys)}
+    )
+
+    start = time.perf_counter()
+    index = fuzzy_matcher.get_index(mapping)
+    print(
+        f"index of {len(index.keys)} keys built in "
+        f"{time.perf_counter() - start:.2f} s"
+    )
+
+    queries = [
+        perturb(keys.iloc[i], rng)
+        for i in rng.integers(0, len(keys), size=args.queries)
+    ]
+    start = time.perf_counter()
+    indexed = [index.match_one(q, args.threshold) for q in queries]
+    indexed_s = time.perf_counter() - start
+    start = time.perf_counter()
+    scanned = [full_scan(index, q, args.threshold) for q in queries]
+    scanned_s = time.perf_counter() - start
+
+    same = sum(
+        i[0] == s[0] or abs(i[1] - s[1]) < 1e-9 for i, s in zip(indexed, scanned)
+    )
+    print(f"{'matcher':<14} {'ms / label':>10} {'matched':>8}")
+    for label, results, seconds in [
+        ("full scan", scanned, scanned_s),
+        ("trigram index", indexed, indexed_s),
+    ]:
+        n_matched = sum(position >= 0 for position, _ in results)
+        print(f"{label:<14} {seconds / len(queries) * 1000:>10.3f} {n_matched:>8}")
+    print(f"same best score as the full scan: {same / len(queries):.1%}")
+
+    # Competence file: exact labels and variants, each repeated
+    picked = rng.integers(0, len(keys), size=(2, args.rows // 20))
+    labels = np.array(
+        [keys.iloc[i] for i in picked[0]]
+        + [perturb(keys.iloc[i], rng) for i in picked[1]],
+        dtype=object,
+    )
+    df_skills = pd.DataFrame(
+        {"Compétences": labels[rng.integers(0, len(labels), size=args.rows)]}
+    )
+    start = time.perf_counter()
+    result = data_processing.add_macro_competence(
+        df_skills, mapping=mapping, fuzzy_threshold=args.threshold
+    )
+    elapsed = time.perf_counter() - start
+    exact = (result[data_processing.FUZZY_SCORE_COL] == 1).mean()
+    fuzzy = (result[data_processing.FUZZY_SCORE_COL] < 1).mean()
+    print(
+        f"add_macro_competence, {args.rows} rows: {elapsed:.2f} s "
+        f"({exact:.0%} exact, {fuzzy:.0%} fuzzy)"
+    )
+
+
+if __name__ == "__main__":
+    main()
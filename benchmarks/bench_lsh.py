@@ -0,0 +1,117 @@
+"""Recall and speed of the MinHash/LSH shortlist against the exact engine.
+
+Every profile of a synthetic client catalog is ranked against the ROME
+referential twice: exactly (all targets) and on the LSH shortlist only.
+Recall@K is the share of the exact top K found in the approximate top K.
+
+Usage:
+    python -m benchmarks.bench_lsh --profiles 20000 --k 20 --configs 128:64 256:128
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+
+from benchmarks import synthetic
+from core import minhash_lsh, passerelle_engine
+
+WEIGHTS = {"Savoir-faire": 20, "Savoir-être professionnels": 20, "Savoirs": 60}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=1500)
+    parser.add_argument("--skills", type=int, default=3000)
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--exact-sample", type=int, default=500)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=["128:32", "128:64", "256:128", "512:256"],
+        help="num_perm:bands pairs",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    skills_df = synthetic.make_skills_frame(
+        n_jobs=args.jobs, n_skills=args.skills, seed=args.seed
+    )
+    catalog_df = synthetic.make_catalog_frame(skills_df, args.profiles, seed=args.seed)
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    profiles = catalog_df.groupby("Code Métier")["Macro Compétence"].agg(list)
+    profile_skills = [matrix.skill_ids(labels) for labels in profiles]
+    sample = np.random.default_rng(args.seed).choice(
+        len(profiles), size=min(args.exact_sample, len(profiles)), replace=False
+    )
+
+    # Exact reference on a sample of profiles
+    start = time.perf_counter()
+    exact = {}
+    for i in sample:
+        ranking = passerelle_engine.rank_passerelles(
+            matrix,
+            profiles.index[i],
+            profile_skills[i],
+            matrix.job_codes,
+            WEIGHTS,
+            k=args.k,
+        )
+        exact[i] = set(ranking["Code Métier"])
+    exact_seconds = (time.perf_counter() - start) / len(sample) * len(profiles)
+    print(f"exact: {exact_seconds:.1f}s estimated for {len(profiles)} profiles")
+
+    print(
+        f"{'perms':>6} {'bands':>6} {'build s':>8} {'query s':>8} {'rescore s':>10} "
+        f"{'candidates':>11} {'recall@' + str(args.k):>10}"
+    )
+    for config in args.configs:
+        num_perm, bands = (int(value) for value in config.split(":"))
+        start = time.perf_counter()
+        index = minhash_lsh.MinHashLSH(matrix, num_perm=num_perm, bands=bands)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indices = np.concatenate(profile_skills)
+        indptr = np.concatenate([[0], np.cumsum([len(ids) for ids in profile_skills])])
+        signatures = index.signatures(
+            sparse.csr_matrix(
+                (np.ones(len(indices)), indices, indptr),
+                shape=(len(profiles), matrix.shape[1]),
+            )
+        )
+        candidates = index.query_signatures(signatures)
+        query_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = []
+        for i, rows in enumerate(candidates):
+            ranking = passerelle_engine.rank_passerelles(
+                matrix,
+                profiles.index[i],
+                profile_skills[i],
+                matrix.job_codes[rows],
+                WEIGHTS,
+                k=args.k,
+            )
+            if i in exact:
+                expected = exact[i]
+                found.append(
+                    len(expected & set(ranking["Code Métier"])) / len(expected)
+                    if expected
+                    else 1.0
+                )
+        rescore_seconds = time.perf_counter() - start
+
+        print(
+            f"{num_perm:>6} {bands:>6} {build_seconds:>8.2f} {query_seconds:>8.2f} "
+            f"{rescore_seconds:>10.1f} "
+            f"{np.mean([len(c) for c in candidates]) / matrix.shape[0]:>10.1%} "
+            f"{np.mean(found):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
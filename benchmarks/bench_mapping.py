@@ -0,0 +1,158 @@
+"""Time and peak memory of the macro-competence mapping build.
+
+The former ``add_macro_competence`` exploded "5 - Compétence" then
+"5 - Compétence (bis)" on the same frame, i.e. the product of the variants
+of both columns on every row; ``build_macro_mapping`` explodes each column
+on its own. Each row of the synthetic sheet gets ``--variants`` variants in
+both competence columns. The last line of each size is the load of the
+compiled artifact (``macro_mapping``) that replaces the whole build once
+the file has been seen.
+
+Usage:
+    python -m benchmarks.bench_mapping --rows 5000 --variants 5 10 20 --memory
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_clean import make_labels
+from core import data_processing, macro_mapping
+
+
+def make_macro_frame(n_rows: int, n_variants: int, seed: int = 0) -> pd.DataFrame:
+    """Build a macro-competence sheet with bullet-separated variants."""
+    rng = np.random.default_rng(seed)
+    labels = make_labels(max(n_rows * 2, 1000), seed=seed)
+
+    def variants():
+        return [
+            "\n".join(f"• {v}" for v in rng.choice(labels, size=n_variants))
+            for _ in range(n_rows)
+        ]
+
+    return pd.DataFrame(
+        {
+            "4 - Macro-compétence": [
+                f"Macro-compétence {m}"
+                for m in rng.integers(0, n_rows // 5 + 1, n_rows)
+            ],
+            "5 - Compétence": variants(),
+            "5 - Compétence (bis)": variants(),
+        }
+    )
+
+
+def legacy_mapping(df_macro: pd.DataFrame) -> dict:
+    """The former mapping build of ``add_macro_competence`` (double explode)."""
+    clean_text = data_processing.clean_text
+    df_macro = df_macro.copy()
+    for col_to_explode in ["5 - Compétence", "5 - Compétence (bis)"]:
+        df_macro[col_to_explode] = (
+            df_macro[col_to_explode].astype(str).str.split(r"[•;\n]")
+        )
+        df_macro = df_macro.explode(col_to_explode).reset_index(drop=True)
+
+    df_macro["key_1"] = clean_text(df_macro["5 - Compétence"])
+    df_macro["key_2"] = clean_text(df_macro["5 - Compétence (bis)"])
+    df_macro["key_3"] = clean_text(df_macro["4 - Macro-compétence"])
+
+    mapping_dict = {}
+    for col in ["key_1", "key_2", "key_3"]:
+        temp_dict = (
+            df_macro.dropna(subset=[col, "4 - Macro-compétence"])
+            .sort_values("4 - Macro-compétence", na_position="last")
+            .drop_duplicates(subset=col, keep="first")
+            .set_index(col)["4 - Macro-compétence"]
+            .to_dict()
+        )
+        mapping_dict.update(
+            {k: v for k, v in temp_dict.items() if k not in mapping_dict}
+        )
+    return mapping_dict
+
+
+def _measure(fn, trace_memory):
+    """Run ``fn`` with a cold label cache.
+
+    Returns (seconds, peak bytes or None, result).
+    """
+    data_processing._clean_label.cache_clear()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--variants", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--memory", action="store_true", help="track peak memory (slower)"
+    )
+    args = parser.parse_args()
+
+    builders = [
+        ("double explode (former)", legacy_mapping),
+        ("build_macro_mapping", data_processing.build_macro_mapping),
+    ]
+    print(
+        f"{'variants':>8} {'builder':<24} {'rows':>10} {'seconds':>8} "
+        f"{'peak MiB':>9} {'keys':>8}"
+    )
+    for n_variants in args.variants:
+        df_macro = make_macro_frame(args.rows, n_variants, seed=args.seed)
+        # Variants per row of each competence column (rows once exploded)
+        counts = np.array(
+            [
+                df_macro[col].str.count(data_processing.VARIANT_SEPARATORS) + 1
+                for col in ["5 - Compétence", "5 - Compétence (bis)"]
+            ]
+        )
+        mappings = []
+        for label, builder in builders:
+            elapsed, peak, mapping = _measure(lambda: builder(df_macro), args.memory)
+            mappings.append(mapping)
+            n_rows = (
+                (counts[0] * counts[1]).sum()
+                if builder is legacy_mapping
+                else counts.sum() + len(df_macro)
+            )
+            peak_str = f"{peak / 2**20:>9.1f}" if peak is not None else f"{'-':>9}"
+            print(
+                f"{n_variants:>8} {label:<24} {n_rows:>10} {elapsed:>8.2f} "
+                f"{peak_str} {len(mapping):>8}"
+            )
+        assert mappings[0] == mappings[1]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "mapping")
+            compiled = macro_mapping.MacroMapping.compile(mappings[1])
+            compiled.save(path)
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            elapsed, peak, loaded = _measure(
+                lambda: macro_mapping.MacroMapping.load(path), args.memory
+            )
+            peak_str = f"{peak / 2**20:>9.1f}" if peak is not None else f"{'-':>9}"
+            print(
+                f"{n_variants:>8} {'compiled artifact (load)':<24} "
+                f"{f'{size / 2**20:.1f} MiB':>10} {elapsed:>8.4f} "
+                f"{peak_str} {len(loaded):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
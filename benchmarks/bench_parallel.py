@@ -0,0 +1,54 @@
+"""Scaling of raw passerelle generation from 1 to N worker processes.
+
+Usage:
+    python -m benchmarks.bench_parallel --jobs 1500 --clients 100 --max-workers 16
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks import synthetic
+from core import passerelle_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=1500)
+    parser.add_argument("--skills", type=int, default=3000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    skills_df = synthetic.make_skills_frame(
+        n_jobs=args.jobs, n_skills=args.skills, seed=args.seed
+    )
+    client_codes = synthetic.make_client_frame(skills_df, args.clients, seed=args.seed)[
+        "Code ROME"
+    ]
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    non_client_codes = sorted(set(matrix.job_codes) - set(client_codes))
+
+    workers = 1
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>10} {'rows':>12} {'speedup':>8}")
+    while workers <= args.max_workers:
+        start = time.perf_counter()
+        rows = 0
+        for starts, targets in [
+            (non_client_codes, client_codes),
+            (client_codes, non_client_codes),
+        ]:
+            for frame in passerelle_engine.iter_transitions_parallel(
+                matrix, starts, targets, workers=workers
+            ):
+                rows += len(frame)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.2f} {rows:>12} {baseline / elapsed:>8.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Parse time of the "Macro-Compétences" sheet with each reader backend.
+
+The synthetic referential gets ``--extra-columns`` unused text columns, like
+the ROME workbook, whose sheet holds more columns than the four the
+application reads.
+
+Usage:
+    python -m benchmarks.bench_read --jobs 1500 --extra-columns 6 --repeat 3
+"""
+
+import argparse
+import importlib.util
+import io
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from core import data_processing, excel_reader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=1500)
+    parser.add_argument("--skills", type=int, default=3000)
+    parser.add_argument("--extra-columns", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    skills_df = synthetic.make_skills_frame(
+        n_jobs=args.jobs, n_skills=args.skills, seed=args.seed
+    )
+    rng = np.random.default_rng(args.seed)
+    for i in range(args.extra_columns):
+        skills_df[f"Colonne {i + 1}"] = [
+            f"Valeur {v}" for v in rng.integers(0, 20_000, size=len(skills_df))
+        ]
+    buffer = io.BytesIO()
+    synthetic.write_skills_file(buffer, skills_df)
+    data = buffer.getvalue()
+
+    def read(engine, columns, dtype):
+        return lambda: excel_reader.read_excel(
+            io.BytesIO(data), "Macro-Compétences", columns, dtype, engine=engine
+        )
+
+    columns = data_processing.SKILLS_REQUIRED_COLS
+    readers = [
+        (
+            "pd.read_excel (former)",
+            lambda: pd.read_excel(io.BytesIO(data), sheet_name="Macro-Compétences"),
+        ),
+        (
+            "pd.read_excel usecols",
+            lambda: pd.read_excel(
+                io.BytesIO(data), sheet_name="Macro-Compétences", usecols=columns
+            ),
+        ),
+        (
+            "openpyxl usecols + dtype",
+            read("openpyxl", columns, data_processing.SKILLS_DTYPES),
+        ),
+    ]
+    if importlib.util.find_spec("python_calamine") is not None:
+        readers += [
+            ("calamine", read("calamine", None, None)),
+            (
+                "calamine projected + dtype",
+                read("calamine", columns, data_processing.SKILLS_DTYPES),
+            ),
+        ]
+
+    print(
+        f"{len(skills_df)} rows × {len(skills_df.columns)} columns, "
+        f"{len(data) / 2**20:.1f} MiB"
+    )
+    print(f"{'reader':<28} {'median s':>9} {'rows/s':>9}")
+    for label, reader in readers:
+        runs = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            df = reader()
+            runs.append(time.perf_counter() - start)
+        assert len(df) == len(skills_df)
+        seconds = statistics.median(runs)
+        print(f"{label:<28} {seconds:>9.2f} {len(df) / seconds:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Throughput and peak memory of the xlsx report writer against the former exporters.
+
+The former exporters wrote the table with ``DataFrame.to_excel`` and sized
+every column with ``df[col].astype(str).map(len).max()``; the report writer
+writes rows with ``write_row`` and estimates widths on a sample.
+
+Usage:
+    python -m benchmarks.bench_report --rows 10000 100000 500000 [--memory]
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from core import report_writer
+
+SUBTITLES = [
+    "Dimensions sélectionnées : Savoir-faire, Savoir-être professionnels, Savoirs",
+    "Pondérations appliquées : Savoir-faire = 20% / "
+    "Savoir-être professionnels = 20% / Savoirs = 60%",
+    "Date d’export : 01/01/2025 à 12h00",
+]
+
+
+def make_details_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build a frame shaped like the detailed passerelles of a start job."""
+    rng = np.random.default_rng(seed)
+    jobs = rng.integers(0, 1500, size=n_rows)
+    return pd.DataFrame(
+        {
+            "Code Métier": [f"A{1101 + j:04d}" for j in jobs],
+            "Intitulé": [f"Métier {j}" for j in jobs],
+            "Nb de passerelles communes": rng.integers(1, 40, size=n_rows),
+            "Score pondéré": rng.random(n_rows) * 30,
+            "Catégorie": rng.choice(
+                ["Savoir-faire", "Savoir-être professionnels", "Savoirs"], n_rows
+            ),
+            "Compétence commune": [
+                f"Macro-compétence {s}" for s in rng.integers(0, 3000, size=n_rows)
+            ],
+            "Score pondéré total": rng.random(n_rows) * 300,
+        }
+    )
+
+
+def legacy_export(df: pd.DataFrame) -> bytes:
+    """The former ``excel_export`` (header block, ``to_excel``, exact widths)."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        workbook = writer.book
+        worksheet = workbook.add_worksheet("Passerelles")
+        writer.sheets["Passerelles"] = worksheet
+        title_format = workbook.add_format({"bold": True, "font_size": 14})
+        subtitle_format = workbook.add_format({"italic": True})
+        worksheet.write("A1", "Métier de départ : A1101", title_format)
+        for row, subtitle in enumerate(SUBTITLES, start=2):
+            worksheet.write(f"A{row}", subtitle, subtitle_format)
+        df.to_excel(writer, index=False, startrow=5, sheet_name="Passerelles")
+        for i, col in enumerate(df.columns):
+            column_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
+            worksheet.set_column(i, i, column_len)
+    return buffer.getvalue()
+
+
+def writer_export(constant_memory):
+    def run(df: pd.DataFrame) -> bytes:
+        return report_writer.report_bytes(
+            [report_writer.ReportSheet("Passerelles", "Métier de départ : A1101", df)],
+            SUBTITLES,
+            constant_memory=constant_memory,
+        )
+
+    return run
+
+
+def _measure(fn, trace_memory):
+    """Run ``fn`` and return (seconds, peak bytes or None, result)."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--memory", action="store_true", help="track peak memory (slower)"
+    )
+    args = parser.parse_args()
+
+    exporters = [
+        ("to_excel (former)", legacy_export),
+        ("report_writer", writer_export(False)),
+        ("report_writer (constant)", writer_export(True)),
+    ]
+    print(
+        f"{'rows':>8} {'exporter':<26} {'widths s':>9} {'write s':>8} "
+        f"{'rows/s':>9} {'peak MiB':>9}"
+    )
+    for n_rows in args.rows:
+        df = make_details_frame(n_rows, seed=args.seed)
+        exact_widths, _, _ = _measure(
+            lambda: [df[col].astype(str).map(len).max() for col in df.columns], False
+        )
+        sampled_widths, _, _ = _measure(lambda: report_writer.column_widths(df), False)
+        for label, exporter in exporters:
+            elapsed, peak, _ = _measure(lambda: exporter(df), args.memory)
+            widths = exact_widths if exporter is legacy_export else sampled_widths
+            peak_str = f"{peak / 2**20:>9.1f}" if peak is not None else f"{'-':>9}"
+            print(
+                f"{n_rows:>8} {label:<26} {widths:>9.3f} {elapsed:>8.2f} "
+                f"{n_rows / elapsed:>9.0f} {peak_str}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""End-to-end passerelle benchmark suite on a synthetic referential.
+
+Writes a seeded synthetic "Macro-Compétences" file and client file at the
+requested scale, then times each stage of the application separately:
+Excel parsing, matrix build, single-job scoring, all-pairs generation and
+export. Each stage is run ``--repeat`` times (median kept) and once more
+under tracemalloc for its peak memory. Results are saved as JSON so runs
+(branches, machines, scales) can be compared.
+
+Usage:
+    python -m benchmarks.bench_suite --jobs 1500 --clients 100 --output run.json
+    python -m benchmarks.bench_suite --jobs 1500 --clients 100 --compare run.json
+    python -m benchmarks.bench_suite --compare before.json after.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic
+from core import data_processing, excel_reader, export, passerelle_engine
+
+WEIGHTS = {"Savoir-faire": 20, "Savoir-être professionnels": 20, "Savoirs": 60}
+
+# A stage returns the number of rows (or bytes) it produced, for sanity checks
+Stage = Callable[[], int]
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage(stage: Stage, repeat: int, trace_memory: bool) -> Dict[str, Any]:
+    """Time ``stage`` ``repeat`` times, then measure its peak memory once."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = stage()
+        runs.append(time.perf_counter() - start)
+
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "seconds": statistics.median(runs),
+        "runs": runs,
+        "peak_mib": None if peak is None else peak / 2**20,
+        "output": output,
+    }
+
+
+def build_stages(
+    args: argparse.Namespace, skills_path: str, client_path: str
+) -> List[Tuple[str, Stage]]:
+    """Return the ``(name, stage)`` pairs of the suite, in execution order."""
+
+    # Same reads and validation as the pages (see ``read_file``)
+    def load_skills() -> pd.DataFrame:
+        return data_processing.validate_skills(
+            excel_reader.read_excel(
+                skills_path,
+                sheet_name="Macro-Compétences",
+                columns=data_processing.SKILLS_REQUIRED_COLS,
+                dtype=data_processing.SKILLS_DTYPES,
+            )
+        )
+
+    def load_clients() -> pd.DataFrame:
+        return excel_reader.read_excel(
+            client_path,
+            columns=list(data_processing.CLIENT_DTYPES),
+            dtype=data_processing.CLIENT_DTYPES,
+        )
+
+    skills_df = load_skills()
+    client_codes = list(load_clients()["Code ROME"].dropna().unique())
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    client_code_set = set(client_codes)
+    non_client_codes = [c for c in matrix.job_codes if c not in client_code_set]
+    single_codes = np.random.default_rng(args.seed).choice(
+        matrix.job_codes,
+        size=min(args.single_jobs, len(matrix.job_codes)),
+        replace=False,
+    )
+
+    def read_skills() -> int:
+        return len(load_skills())
+
+    def read_clients() -> int:
+        return len(load_clients())
+
+    def build_matrix() -> int:
+        return passerelle_engine.SkillMatrix.from_frame(skills_df).shape[0]
+
+    def single_job_rank() -> int:
+        rows = 0
+        for code in single_codes:
+            rows += len(
+                passerelle_engine.rank_passerelles(
+                    matrix,
+                    code,
+                    matrix.job_skill_ids(code),
+                    matrix.job_codes,
+                    WEIGHTS,
+                    sector_bonus=1.25,
+                    k=20,
+                )
+            )
+        return rows
+
+    # calculate_job_similarities keys its weights by lowercase category
+    weights = {c.lower(): w for c, w in WEIGHTS.items()}
+
+    def single_job_similarities() -> int:
+        # Page path: detailed rows of every target, matrix rebuilt per call
+        return sum(
+            len(
+                data_processing.calculate_job_similarities(
+                    skills_df, skills_df, code, weights
+                )
+            )
+            for code in single_codes
+        )
+
+    def sheets():
+        return [
+            (
+                "Passerelles entrantes",
+                passerelle_engine.iter_transitions(
+                    matrix, non_client_codes, client_codes
+                ),
+            ),
+            (
+                "Passerelles sortantes",
+                passerelle_engine.iter_transitions(
+                    matrix, client_codes, non_client_codes
+                ),
+            ),
+        ]
+
+    def all_pairs() -> int:
+        return sum(len(batch) for _, batches in sheets() for batch in batches)
+
+    # Exports are timed on materialized batches, generation excluded
+    exported = []
+    if not args.stages or any(name.startswith("export_") for name in args.stages):
+        exported = [(sheet_name, list(batches)) for sheet_name, batches in sheets()]
+    report_df = data_processing.calculate_job_similarities(
+        skills_df, skills_df, single_codes[0], weights
+    )
+    # Weights keyed by labels absent from the referential would zero every
+    # score, and the suite would time a degenerate path
+    ranking = passerelle_engine.rank_passerelles(
+        matrix,
+        single_codes[0],
+        matrix.job_skill_ids(single_codes[0]),
+        matrix.job_codes,
+        WEIGHTS,
+        k=20,
+    )
+    for scores in (ranking["Score pondéré total"], report_df["Score pondéré"]):
+        assert (scores > 0).any(), "every passerelle score is zero"
+
+    def stream_export(writer) -> Stage:
+        def run() -> int:
+            buffer = io.BytesIO()
+            writer(buffer, exported, columns=passerelle_engine.TRANSITION_COLUMNS)
+            return len(buffer.getvalue())
+
+        return run
+
+    def single_job_export() -> int:
+        return len(
+            export.excel_export(
+                report_df,
+                "Passerelles",
+                single_codes[0],
+                ", ".join(WEIGHTS),
+                *WEIGHTS.values(),
+            )
+        )
+
+    return [
+        ("read_skills", read_skills),
+        ("read_clients", read_clients),
+        ("build_matrix", build_matrix),
+        ("single_job_rank", single_job_rank),
+        ("single_job_similarities", single_job_similarities),
+        ("all_pairs", all_pairs),
+        *(
+            (f"export_{extension.replace('.', '_')}", stream_export(writer))
+            for writer, extension, _ in export.STREAM_FORMATS.values()
+        ),
+        ("export_single_job_xlsx", single_job_export),
+    ]
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print(f"{'stage':<26} {'median s':>9} {'peak MiB':>9} {'output':>12}")
+    for name, stage in results["stages"].items():
+        peak = stage["peak_mib"]
+        peak_str = f"{peak:>9.1f}" if peak is not None else f"{'-':>9}"
+        print(f"{name:<26} {stage['seconds']:>9.3f} {peak_str} {stage['output']:>12}")
+
+
+def print_comparison(before: Dict[str, Any], after: Dict[str, Any]) -> None:
+    """Print the per-stage time and peak memory ratios of two runs."""
+    for label, run in (("before", before), ("after", after)):
+        meta = run["meta"]
+        print(f"{label}: {meta['revision']} {meta['date']} {meta['params']}")
+    print(
+        f"{'stage':<26} {'before s':>9} {'after s':>9} {'speedup':>8} "
+        f"{'before MiB':>11} {'after MiB':>10}"
+    )
+    for name, stage in after["stages"].items():
+        if name not in before["stages"]:
+            continue
+        old = before["stages"][name]
+        speedup = old["seconds"] / stage["seconds"] if stage["seconds"] else np.inf
+        peaks = [
+            f"{s['peak_mib']:.1f}" if s["peak_mib"] is not None else "-"
+            for s in (old, stage)
+        ]
+        print(
+            f"{name:<26} {old['seconds']:>9.3f} {stage['seconds']:>9.3f} "
+            f"{speedup:>7.2f}x {peaks[0]:>11} {peaks[1]:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--jobs", type=int, default=1500)
+    parser.add_argument("--skills", type=int, default=3000)
+    parser.add_argument("--skills-per-job", type=int, default=40)
+    parser.add_argument(
+        "--category-mix",
+        type=float,
+        nargs=3,
+        default=(0.5, 0.2, 0.3),
+        metavar=("SF", "SE", "S"),
+        help="share of Savoir-faire / Savoir-être / Savoirs skills",
+    )
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument(
+        "--single-jobs", type=int, default=20, help="jobs scored one by one"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--stages", nargs="+", help="run only these stages (default: all)"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the tracemalloc runs"
+    )
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="JSON",
+        help="baseline run to compare with; with two files, compare them "
+        "without running the suite",
+    )
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        runs = []
+        for path in args.compare:
+            with open(path, encoding="utf-8") as f:
+                runs.append(json.load(f))
+        print_comparison(*runs)
+        return
+
+    params = {
+        "jobs": args.jobs,
+        "skills": args.skills,
+        "skills_per_job": args.skills_per_job,
+        "category_mix": list(args.category_mix),
+        "clients": args.clients,
+        "single_jobs": args.single_jobs,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "cpus": os.cpu_count(),
+            "params": params,
+        },
+        "stages": {},
+    }
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        skills_df = synthetic.make_skills_frame(
+            n_jobs=args.jobs,
+            n_skills=args.skills,
+            skills_per_job=args.skills_per_job,
+            category_mix=args.category_mix,
+            seed=args.seed,
+        )
+        skills_path = os.path.join(data_dir, "MACRO-COMPETENCES ROME.xlsx")
+        client_path = os.path.join(data_dir, "metiers_client.xlsx")
+        synthetic.write_skills_file(skills_path, skills_df)
+        synthetic.write_client_file(
+            client_path, synthetic.make_client_frame(skills_df, args.clients, args.seed)
+        )
+
+        for name, stage in build_stages(args, skills_path, client_path):
+            if args.stages and name not in args.stages:
+                continue
+            results["stages"][name] = run_stage(stage, args.repeat, not args.no_memory)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            print()
+            print_comparison(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
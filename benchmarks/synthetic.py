@@ -0,0 +1,158 @@
+"""Seeded synthetic ROME referential used by the benchmarks.
+
+Usage (writes the xlsx input files of the application):
+    python -m benchmarks.synthetic --jobs 1500 --clients 100 --output-dir data/
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ["Savoir-faire", "Savoir-être professionnels", "Savoirs"]
+SECTORS = "ABCDEFGHIJKLMN"
+
+
+def make_skills_frame(
+    n_jobs: int = 1500,
+    n_skills: int = 3000,
+    skills_per_job: int = 40,
+    category_mix=(0.5, 0.2, 0.3),
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Build a "Macro-Compétences" sheet with a Zipf-like skill popularity.
+
+    Args:
+        n_jobs: Number of job codes.
+        n_skills: Size of the macro-competence vocabulary.
+        skills_per_job: Average number of macro-competences per job.
+        category_mix: Share of Savoir-faire / Savoir-être / Savoirs skills.
+        seed: Random seed.
+
+    Returns:
+        pd.DataFrame: Frame with the ``Code Métier``, ``Intitulé``,
+        ``Macro Compétence`` and ``Catégorie`` columns.
+    """
+    rng = np.random.default_rng(seed)
+    skill_categories = rng.choice(CATEGORIES, size=n_skills, p=category_mix)
+    popularity = 1 / np.arange(1, n_skills + 1) ** 0.8
+    popularity /= popularity.sum()
+
+    sizes = np.maximum(rng.poisson(skills_per_job, size=n_jobs), 1)
+    job_ids = np.repeat(np.arange(n_jobs), sizes)
+    skill_ids = rng.choice(n_skills, size=len(job_ids), p=popularity)
+
+    codes = np.array(
+        [
+            f"{SECTORS[j % len(SECTORS)]}{1101 + j // len(SECTORS):04d}"
+            for j in range(n_jobs)
+        ]
+    )
+    return pd.DataFrame(
+        {
+            "Code Métier": codes[job_ids],
+            "Intitulé": [f"Métier {j}" for j in job_ids],
+            "Macro Compétence": [f"Macro-compétence {s}" for s in skill_ids],
+            "Catégorie": skill_categories[skill_ids],
+        }
+    )
+
+
+def make_client_frame(
+    skills_df: pd.DataFrame, n_client_jobs: int = 100, seed: int = 0
+) -> pd.DataFrame:
+    """Pick a random client job list (``Code ROME`` column) from a referential."""
+    rng = np.random.default_rng(seed)
+    codes = skills_df["Code Métier"].unique()
+    picked = rng.choice(codes, size=min(n_client_jobs, len(codes)), replace=False)
+    return pd.DataFrame({"Code ROME": np.sort(picked)})
+
+
+def make_catalog_frame(
+    skills_df: pd.DataFrame,
+    n_profiles: int = 20_000,
+    keep: float = 0.8,
+    extra_skills: int = 3,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Build a client job catalog of internal profiles derived from ROME jobs.
+
+    Each profile copies a random ROME job, keeps each of its macro-competences
+    with probability ``keep`` and adds ``extra_skills`` random ones.
+
+    Returns:
+        pd.DataFrame: "Macro-Compétences"-like frame; profile codes are
+        ``P000001``, ``P000002``…
+    """
+    rng = np.random.default_rng(seed)
+    jobs = {code: group for code, group in skills_df.groupby("Code Métier")}
+    job_codes = np.array(list(jobs))
+    vocabulary = skills_df[["Macro Compétence", "Catégorie"]].drop_duplicates()
+
+    frames = []
+    for i, source in enumerate(rng.choice(job_codes, size=n_profiles)):
+        rows = jobs[source]
+        rows = rows[rng.random(len(rows)) < keep]
+        noise = vocabulary.iloc[rng.integers(0, len(vocabulary), size=extra_skills)]
+        frames.append(
+            pd.concat([rows[["Macro Compétence", "Catégorie"]], noise]).assign(
+                **{"Code Métier": f"P{i + 1:06d}", "Intitulé": f"Profil {i + 1}"}
+            )
+        )
+    return pd.concat(frames, ignore_index=True)[
+        ["Code Métier", "Intitulé", "Macro Compétence", "Catégorie"]
+    ]
+
+
+def write_skills_file(path: str, skills_df: pd.DataFrame) -> None:
+    """Write a referential frame as a "MACRO-COMPETENCES ROME.xlsx"-like file."""
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        skills_df.to_excel(writer, index=False, sheet_name="Macro-Compétences")
+
+
+def write_client_file(path: str, client_df: pd.DataFrame) -> None:
+    """Write a client job list as an xlsx file (``Code ROME`` in the first sheet)."""
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        client_df.to_excel(writer, index=False, sheet_name="Métiers client")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic referential and client file (xlsx)."
+    )
+    parser.add_argument("--jobs", type=int, default=1500)
+    parser.add_argument("--skills", type=int, default=3000)
+    parser.add_argument("--skills-per-job", type=int, default=40)
+    parser.add_argument(
+        "--category-mix",
+        type=float,
+        nargs=3,
+        default=(0.5, 0.2, 0.3),
+        metavar=("SF", "SE", "S"),
+        help="share of Savoir-faire / Savoir-être / Savoirs skills",
+    )
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=".")
+    args = parser.parse_args()
+
+    skills_df = make_skills_frame(
+        n_jobs=args.jobs,
+        n_skills=args.skills,
+        skills_per_job=args.skills_per_job,
+        category_mix=args.category_mix,
+        seed=args.seed,
+    )
+    os.makedirs(args.output_dir, exist_ok=True)
+    write_skills_file(
+        os.path.join(args.output_dir, "MACRO-COMPETENCES ROME.xlsx"), skills_df
+    )
+    write_client_file(
+        os.path.join(args.output_dir, "metiers_client.xlsx"),
+        make_client_frame(skills_df, args.clients, seed=args.seed),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import heapq
+import itertools
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.passerelle_engine import SkillMatrix, category_matrices
+
+PATH_COLUMNS = [
+    "Rang",
+    "Parcours",
+    "Nombre d'étapes",
+    "Score de l'étape la plus faible",
+    "Score total",
+]
+
+
+class Route(NamedTuple):
+    """A reskilling route: job rows from start to destination, with scores."""
+
+    rows: Tuple[int, ...]
+    steps: Tuple[float, ...]
+
+    @property
+    def bottleneck(self) -> float:
+        return min(self.steps)
+
+    @property
+    def total(self) -> float:
+        return sum(self.steps)
+
+
+class CareerGraph:
+    """
+    Passerelle graph over every job of a referential, for one category set.
+
+    The edge i → j carries the one-hop passerelle score of ``rank_passerelles``:
+    ``|S_i ∩ S_j| × Σ weight(category of the shared skill in j) / 100``, times
+    ``sector_bonus`` when both jobs share their ROME sector. The graph stores
+    the weight-independent part (per-category shared counts of every pair,
+    from one sparse product per category); edge scores for a given weighting
+    are derived in one vectorized pass and cached, like the reachability
+    bounds of the search.
+
+    Routes are ranked by their weakest step (bottleneck score), then by total
+    score: a route is only as practicable as its hardest transition.
+    """
+
+    def __init__(
+        self,
+        matrix: SkillMatrix,
+        categories: Optional[Iterable[str]] = None,
+        cache_size: int = 8,
+    ):
+        self.matrix = matrix
+        n_jobs = matrix.shape[0]
+        binary = (matrix.view(categories) != 0).astype(np.int32)
+        shared = (binary @ binary.T).tocoo()
+        shared.sum_duplicates()  # canonical: pairs sorted by (source, target)
+        pairs = shared.row.astype(np.int64) * n_jobs + shared.col
+        pairs = pairs[shared.row != shared.col]
+
+        # Per-category counts, aligned on the pairs sharing any skill
+        category_counts = np.zeros((len(pairs), len(matrix.categories)), dtype=np.int16)
+        for code, indicator in enumerate(category_matrices(matrix, categories)):
+            counts = (binary @ indicator.T).tocoo()
+            keys = counts.row.astype(np.int64) * n_jobs + counts.col
+            positions = np.searchsorted(pairs, keys)
+            found = positions < len(pairs)
+            found[found] = pairs[positions[found]] == keys[found]
+            category_counts[positions[found], code] = counts.data[found]
+
+        self._sources = (pairs // n_jobs).astype(np.int32)
+        self._targets = (pairs % n_jobs).astype(np.int32)
+        self._indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(self._sources, minlength=n_jobs))]
+        )
+        self._category_counts = category_counts
+        self._same_sector = (
+            matrix.job_sectors[self._sources] == matrix.job_sectors[self._targets]
+        )
+        self._cache: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._cache_size = cache_size
+
+    @property
+    def n_edges(self) -> int:
+        return len(self._targets)
+
+    def _cached(self, key: Tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        value = self._cache[key] = compute()
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def edge_scores(
+        self, weights: Dict[str, float], sector_bonus: float = 1.0
+    ) -> np.ndarray:
+        """Return the score of every edge for a weighting (cached)."""
+
+        def compute() -> np.ndarray:
+            counts = self._category_counts.sum(axis=1)
+            weighted = self._category_counts @ self.matrix.category_weights(weights)
+            bonus = np.where(self._same_sector, sector_bonus, 1.0)
+            return counts * weighted / 100 * bonus
+
+        return self._cached(
+            ("scores", tuple(sorted(weights.items())), sector_bonus), compute
+        )
+
+    def _reach_bounds(
+        self,
+        scores: np.ndarray,
+        scoring_key: Tuple,
+        destinations: np.ndarray,
+        max_depth: int,
+        min_edge_score: float,
+    ) -> np.ndarray:
+        """Best bottleneck from each job to a destination within d hops.
+
+        ``bounds[d, v]`` ignores the simple-path constraint, so it is an upper
+        bound of the best route from v in at most d hops: an admissible
+        priority for the best-first search.
+        """
+
+        def compute() -> np.ndarray:
+            usable = (scores > 0) & (scores >= min_edge_score)
+            sources, targets = self._sources[usable], self._targets[usable]
+            bounds = np.full((max_depth + 1, self.matrix.shape[0]), -np.inf)
+            bounds[0, destinations] = np.inf
+            for depth in range(1, max_depth + 1):
+                bounds[depth] = bounds[depth - 1]
+                np.maximum.at(
+                    bounds[depth],
+                    sources,
+                    np.minimum(scores[usable], bounds[depth - 1, targets]),
+                )
+            return bounds
+
+        return self._cached(
+            ("bounds", scoring_key, destinations.tobytes(), max_depth, min_edge_score),
+            compute,
+        )
+
+    def best_routes(
+        self,
+        start_code: str,
+        destination_codes: Iterable[str],
+        weights: Dict[str, float],
+        sector_bonus: float = 1.0,
+        max_depth: int = 3,
+        min_edge_score: float = 0.0,
+        k: int = 10,
+    ) -> List[Route]:
+        """Return the k best simple routes from a job to any destination job.
+
+        Best-first search on the bottleneck score: the priority of a partial
+        route is its weakest step so far, capped by the best bottleneck still
+        reachable from its last job (``_reach_bounds``). Routes therefore
+        complete in decreasing bottleneck order and the search stops after
+        the k-th one. Edges under ``min_edge_score`` and jobs that cannot
+        reach a destination in the remaining hops are never pushed.
+
+        Args:
+            start_code: Code of the start job.
+            destination_codes: Codes of the jobs a route may end on.
+            weights: Weight (in %) of each category label.
+            sector_bonus: Multiplier applied to steps within a ROME sector.
+            max_depth: Maximum number of steps of a route.
+            min_edge_score: Minimum score of every step.
+            k: Number of routes returned.
+
+        Returns:
+            List[Route]: Best routes first.
+        """
+        start = self.matrix.job_positions([start_code])
+        destinations = self.matrix.job_positions(
+            c for c in destination_codes if c != start_code
+        )
+        if not len(start) or not len(destinations) or k <= 0:
+            return []
+        start = int(start[0])
+
+        scoring_key = (tuple(sorted(weights.items())), sector_bonus)
+        scores = self.edge_scores(weights, sector_bonus)
+        bounds = self._reach_bounds(
+            scores, scoring_key, destinations, max_depth, min_edge_score
+        )
+        is_destination = np.zeros(self.matrix.shape[0], dtype=bool)
+        is_destination[destinations] = True
+
+        tie = itertools.count()
+        heap = [(-bounds[max_depth, start], next(tie), (start,), ())]
+        routes = []
+        while heap and len(routes) < k:
+            _, _, path, steps = heapq.heappop(heap)
+            node = path[-1]
+            if steps and is_destination[node]:
+                routes.append(Route(path, steps))
+                continue
+
+            remaining = max_depth - len(steps) - 1
+            if remaining < 0:
+                continue
+            lo, hi = self._indptr[node], self._indptr[node + 1]
+            targets, step_scores = self._targets[lo:hi], scores[lo:hi]
+            bottleneck = min(steps) if steps else np.inf
+            priorities = np.minimum(
+                np.minimum(step_scores, bottleneck), bounds[remaining, targets]
+            )
+            usable = (
+                (step_scores > 0)
+                & (step_scores >= min_edge_score)
+                & (priorities > -np.inf)
+            )
+            for target, score, priority in zip(
+                targets[usable].tolist(),
+                step_scores[usable].tolist(),
+                priorities[usable].tolist(),
+            ):
+                if target in path:
+                    continue
+                heapq.heappush(
+                    heap, (-priority, next(tie), path + (target,), steps + (score,))
+                )
+
+        # Equal bottlenecks: prefer the higher total, then the shorter route
+        return sorted(routes, key=lambda r: (-r.bottleneck, -r.total, len(r.rows)))
+
+
+def get_graph(
+    matrix: SkillMatrix, categories: Optional[Iterable[str]] = None
+) -> CareerGraph:
+    """Return the (memoized) passerelle graph of a referential and category set.
+
+    A graph holds every pair of jobs sharing a skill (millions of edges on
+    the ROME referential), so only the graph of the last category set is
+    kept on the matrix.
+    """
+    key = None if categories is None else frozenset(categories)
+    return matrix.memoize_latest(
+        "career_graph", key, lambda: CareerGraph(matrix, categories)
+    )
+
+
+def find_career_paths(
+    matrix: SkillMatrix,
+    start_code: str,
+    destination_codes: Iterable[str],
+    weights: Dict[str, float],
+    categories: Optional[Iterable[str]] = None,
+    max_depth: int = 3,
+    min_edge_score: float = 0.0,
+    k: int = 10,
+    sector_bonus: float = 1.0,
+) -> pd.DataFrame:
+    """Top-K multi-step reskilling routes from a job to a set of jobs.
+
+    The graph and the query results are memoized on the matrix, so a repeated
+    query (Streamlit rerun) is a cache hit, and a weight change only rescores
+    the edges of the cached graph.
+
+    Args:
+        matrix: Incidence matrix of the referential.
+        start_code: Code of the start job.
+        destination_codes: Codes of the jobs a route may end on.
+        weights: Weight (in %) of each category label.
+        categories: Categories taken into account, all if None.
+        max_depth: Maximum number of steps of a route.
+        min_edge_score: Minimum score of every step.
+        k: Number of routes returned.
+        sector_bonus: Multiplier applied to steps within a ROME sector.
+
+    Returns:
+        pd.DataFrame: ``PATH_COLUMNS``, best route first.
+    """
+    destinations = matrix.job_positions(destination_codes)
+    key = (
+        "career_paths",
+        start_code,
+        destinations.tobytes(),
+        None if categories is None else frozenset(categories),
+        tuple(sorted(weights.items())),
+        max_depth,
+        min_edge_score,
+        k,
+        sector_bonus,
+    )
+
+    def compute() -> pd.DataFrame:
+        routes = get_graph(matrix, categories).best_routes(
+            start_code,
+            matrix.job_codes[destinations],
+            weights,
+            sector_bonus=sector_bonus,
+            max_depth=max_depth,
+            min_edge_score=min_edge_score,
+            k=k,
+        )
+        return pd.DataFrame(
+            [
+                (
+                    rank,
+                    " → ".join(
+                        f"{matrix.job_codes[row]} - {matrix.job_titles[row]}"
+                        for row in route.rows
+                    ),
+                    len(route.steps),
+                    route.bottleneck,
+                    route.total,
+                )
+                for rank, route in enumerate(routes, start=1)
+            ],
+            columns=PATH_COLUMNS,
+        )
+
+    return matrix.memoize(key, compute)
@@ -0,0 +1,263 @@
+"""Headless entry point for the passerelle computations.
+
+Runs the same engine as the "Passerelles métiers" page without Streamlit, so
+heavy exports can be scheduled (cron, CI) off the interactive server.
+
+Usage:
+    python -m core.cli raw --skills "MACRO-COMPETENCES ROME.xlsx" \\
+        --clients metiers_client.xlsx --output passerelles_brutes.parquet
+    python -m core.cli report --skills "MACRO-COMPETENCES ROME.xlsx" \\
+        --clients metiers_client.xlsx --mode sortante --k 20 \\
+        --savoir-faire 20 --savoir-etre 20 --savoirs 60 --output rapport.xlsx
+
+Exit codes: 0 on success, 2 on invalid arguments or input files.
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core import data_processing, excel_reader, export, passerelle_engine
+
+CATEGORIES = ["Savoir-faire", "Savoir-être professionnels", "Savoirs"]
+MODES = {"entrante": "Passerelle entrante", "sortante": "Passerelle sortante"}
+
+# Output formats by file extension: extension → format label of the page
+RAW_FORMATS = {
+    extension: label for label, (_, extension, _) in export.STREAM_FORMATS.items()
+}
+REPORT_FORMATS = {
+    extension: label for label, (_, extension, _) in export.BATCH_FORMATS.items()
+}
+
+
+class InputError(Exception):
+    """Invalid input file or argument; reported on stderr with exit code 2."""
+
+
+def progress_printer(label: str) -> Callable[[float], None]:
+    """Return a progress callback printing ``label`` and a percentage on stderr."""
+    started = time.perf_counter()
+    last = -1.0
+
+    def report(fraction: float) -> None:
+        nonlocal last
+        # One line update per percent at most
+        if fraction < 1 and fraction - last < 0.01:
+            return
+        last = fraction
+        elapsed = time.perf_counter() - started
+        end = "\n" if fraction >= 1 else ""
+        sys.stderr.write(f"\r{label} : {fraction:6.1%} ({elapsed:.0f} s){end}")
+        sys.stderr.flush()
+
+    return report
+
+
+def output_extension(path: str, formats: Dict[str, str]) -> str:
+    """Return the extension of ``path`` among ``formats`` (longest match)."""
+    for extension in sorted(formats, key=len, reverse=True):
+        if path.lower().endswith(f".{extension}"):
+            return extension
+    raise InputError(
+        f"Format de sortie non reconnu pour {path} "
+        f"(extensions possibles : {', '.join('.' + e for e in formats)})"
+    )
+
+
+def read_skills(path: str) -> pd.DataFrame:
+    """Read and validate the "Macro-Compétences" sheet of the referential."""
+    try:
+        df = excel_reader.read_excel(
+            path,
+            sheet_name="Macro-Compétences",
+            columns=data_processing.SKILLS_REQUIRED_COLS,
+            dtype=data_processing.SKILLS_DTYPES,
+        )
+    except ValueError:
+        raise InputError(
+            f"Impossible de trouver l’onglet « Macro-Compétences » dans {path}"
+        )
+    except Exception as e:
+        raise InputError(f"Impossible d’ouvrir {path} : {e}")
+    try:
+        return data_processing.validate_skills(df)
+    except ValueError as e:
+        raise InputError(f"{path} : {e}")
+
+
+def read_client_codes(path: str) -> np.ndarray:
+    """Read the ``Code ROME`` column of the first sheet of the client file."""
+    try:
+        df = excel_reader.read_excel(
+            path,
+            columns=list(data_processing.CLIENT_DTYPES),
+            dtype=data_processing.CLIENT_DTYPES,
+        )
+    except Exception as e:
+        raise InputError(f"Impossible d’ouvrir {path} : {e}")
+    if "Code ROME" not in df.columns:
+        raise InputError(f"Colonnes manquantes dans {path} : Code ROME")
+    return df["Code ROME"].dropna().unique()
+
+
+def category_weights(args: argparse.Namespace) -> Dict[str, float]:
+    """Return the weights of the selected categories, checking they sum to 100."""
+    weights = {
+        "Savoir-faire": args.savoir_faire,
+        "Savoir-être professionnels": args.savoir_etre,
+        "Savoirs": args.savoirs,
+    }
+    weights = {c: weights[c] for c in args.categories}
+    if sum(weights.values()) != 100:
+        raise InputError(
+            "La somme des pondérations doit être égale à 100% pour les catégories "
+            f"sélectionnées (actuellement {sum(weights.values())}%)"
+        )
+    return weights
+
+
+def check_raw(args: argparse.Namespace) -> None:
+    output_extension(args.output, RAW_FORMATS)
+
+
+def run_raw(
+    args: argparse.Namespace,
+    matrix: passerelle_engine.SkillMatrix,
+    client_codes: np.ndarray,
+) -> None:
+    """Stream every passerelle between client and non-client jobs to disk."""
+    extension = output_extension(args.output, RAW_FORMATS)
+    printers = {}
+
+    def progress(sheet_name: str, fraction: float) -> None:
+        if sheet_name not in printers:
+            printers[sheet_name] = progress_printer(sheet_name)
+        printers[sheet_name](fraction)
+
+    written = export.write_raw_passerelles(
+        args.output,
+        RAW_FORMATS[extension],
+        matrix,
+        client_codes,
+        modes=[MODES[m] for m in (MODES if args.mode == "toutes" else [args.mode])],
+        categories=None if len(args.categories) == len(CATEGORIES) else args.categories,
+        workers=args.workers,
+        progress=progress,
+    )
+    for sheet_name, rows in written.items():
+        print(f"{sheet_name} : {rows} lignes", file=sys.stderr)
+
+
+def check_report(args: argparse.Namespace) -> None:
+    output_extension(args.output, REPORT_FORMATS)
+    category_weights(args)
+
+
+def run_report(
+    args: argparse.Namespace,
+    matrix: passerelle_engine.SkillMatrix,
+    client_codes: np.ndarray,
+) -> None:
+    """Write the top-K passerelles of every client job to disk."""
+    extension = output_extension(args.output, REPORT_FORMATS)
+    builder, _, _ = export.BATCH_FORMATS[REPORT_FORMATS[extension]]
+    weights = category_weights(args)
+    mode = MODES[args.mode]
+
+    report_df = passerelle_engine.batch_rank_passerelles(
+        matrix,
+        client_codes,
+        weights=weights,
+        incoming=mode == "Passerelle entrante",
+        k=args.k,
+        categories=args.categories,
+    )
+    with open(args.output, "wb") as output:
+        output.write(builder(report_df, mode, ", ".join(args.categories), weights))
+    print(
+        f"{report_df['Code Métier client'].nunique()} métier(s) client, "
+        f"{len(report_df)} passerelle(s)",
+        file=sys.stderr,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.cli",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    raw = commands.add_parser(
+        "raw", help="toutes les passerelles brutes (xlsx, parquet, csv.gz)"
+    )
+    raw.add_argument(
+        "--mode",
+        choices=[*MODES, "toutes"],
+        default="toutes",
+        help="passerelles entrantes, sortantes ou les deux (défaut)",
+    )
+    raw.add_argument(
+        "--workers",
+        type=int,
+        default=passerelle_engine.default_workers(),
+        help="nombre de processus de calcul (défaut : PASSERELLES_WORKERS)",
+    )
+    raw.set_defaults(check=check_raw, run=run_raw)
+
+    report = commands.add_parser(
+        "report", help="top K des passerelles de chaque métier client (xlsx, parquet)"
+    )
+    report.add_argument("--mode", choices=list(MODES), default="entrante")
+    report.add_argument(
+        "--k", type=int, default=20, help="passerelles par métier client"
+    )
+    report.add_argument("--savoir-faire", type=float, default=20)
+    report.add_argument("--savoir-etre", type=float, default=20)
+    report.add_argument("--savoirs", type=float, default=60)
+    report.set_defaults(check=check_report, run=run_report)
+
+    for command in (raw, report):
+        command.add_argument(
+            "--skills", required=True, help="MACRO-COMPETENCES ROME.xlsx"
+        )
+        command.add_argument(
+            "--clients", required=True, help="fichier métiers client (.xlsx)"
+        )
+        command.add_argument("--output", required=True, help="fichier de sortie")
+        command.add_argument(
+            "--categories",
+            nargs="+",
+            choices=CATEGORIES,
+            default=CATEGORIES,
+            help="catégories de compétences prises en compte (défaut : toutes)",
+        )
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    try:
+        # Arguments are checked before the (slow) referential is read
+        args.check(args)
+        print("Lecture des fichiers...", file=sys.stderr)
+        matrix = passerelle_engine.SkillMatrix.from_frame(read_skills(args.skills))
+        client_codes = read_client_codes(args.clients)
+        args.run(args, matrix, client_codes)
+    except InputError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 2
+
+    print(f"Fichier écrit : {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
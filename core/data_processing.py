@@ -1,63 +1,238 @@
-import pandas as pd
 import unicodedata
-import re
-from typing import Dict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from core import excel_reader, fuzzy_matcher, macro_mapping, passerelle_engine
+
+# Distinct labels kept normalized across calls (competence labels repeat
+# heavily between the skills file, the mapping sheet and successive uploads)
+CLEAN_CACHE_SIZE = 200_000
+
+# Separators and punctuation replaced by a space. Accents and the other
+# non-ASCII characters (bullets, dashes, typographic quotes) are already gone
+# after the NFKD + ASCII step, and whitespace is collapsed by ``str.split``.
+_SEPARATORS = str.maketrans({c: " " for c in ";/-(){}[],.\\"})
+
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def _clean_label(label: str) -> str:
+    """Normalize a single label (see ``clean_text``)."""
+    label = (
+        unicodedata.normalize("NFKD", label)
+        .encode("ascii", "ignore")
+        .decode("utf-8")
+        .translate(_SEPARATORS)
+    )
+    return " ".join(label.split()).lower()
 
 
 def clean_text(s: pd.Series) -> pd.Series:
     """Normalize text by removing accents, special characters, and extra spaces.
 
+    Only the distinct texts are normalized (then mapped back to the rows),
+    through a translation table and a whitespace split instead of a chain of
+    regular expressions, and the last ``CLEAN_CACHE_SIZE`` normalized labels
+    are kept across calls. Every value is first converted with ``str``
+    (``NaN`` becomes "nan", ``1.0`` "1.0").
+
     Args:
         s (pd.Series): Input text series to clean
 
     Returns:
         pd.Series: Cleaned text series in lowercase
     """
-    s = (s.astype(str)
-           .str.normalize("NFKD")
-           .str.encode("ascii", "ignore")
-           .str.decode("utf-8"))
-    s = s.str.replace(r"[\u00A0\r\n\t]+", " ", regex=True)
-    s = s.str.replace(r"[•;/\-–—]", " ", regex=True)
-    s = s.str.replace(r"[(){}\[\],.’‘’“”«»\\]", " ", regex=True)
-    return s.str.replace(r"\s+", " ", regex=True).str.strip().str.lower()
+    # Factorized on the text: 1, 1.0 and True are equal values but not texts
+    codes, uniques = pd.factorize(s.astype(str))
+    cleaned = np.array([_clean_label(value) for value in uniques], dtype=object)
+    return pd.Series(cleaned[codes], index=s.index, name=s.name)
+
+
+def encode_text(s: pd.Series, clean: bool = False, upper: bool = False) -> pd.Series:
+    """Encode a text column as a categorical: integer codes plus a vocabulary.
+
+    Every row only stores the code of its value; the strings are held once in
+    the (sorted) vocabulary and decoded at display or export time. With
+    ``clean``, ``clean_text`` (then ``upper``) is applied to the distinct
+    values only, with the same result as on the full column: missing values
+    become "nan", and values equal once cleaned share a code.
+
+    Args:
+        s (pd.Series): Text column.
+        clean (bool): Normalize the values with ``clean_text``.
+        upper (bool): Upper-case the cleaned values.
+
+    Returns:
+        pd.Series: Categorical series with the index of ``s``.
+    """
+    if not clean:
+        return s.astype("category")
+    codes, uniques = pd.factorize(s.astype(str))
+    cleaned = clean_text(pd.Series(uniques, dtype=object))
+    if upper:
+        cleaned = cleaned.str.upper()
+    vocabulary_codes, vocabulary = pd.factorize(cleaned, sort=True)
+    return pd.Series(
+        pd.Categorical.from_codes(vocabulary_codes[codes], categories=vocabulary),
+        index=s.index,
+        name=s.name,
+    )
+
+
+MACRO_COL = "4 - Macro-compétence"
+
+# Key columns of the macro-competence sheet, by decreasing precedence; the
+# competence columns hold several variants separated by bullets or newlines
+MACRO_KEY_COLS = ["5 - Compétence", "5 - Compétence (bis)", MACRO_COL]
+VARIANT_SEPARATORS = r"[•;\n]"
+
+
+def build_macro_mapping(df_macro: pd.DataFrame) -> Dict[str, str]:
+    """Build the cleaned competence label → macro-competence mapping.
+
+    Each key column is exploded into its variants and cleaned on its own,
+    so the sheet never grows to the product of the variants of both
+    competence columns. A key takes the macro-competence of its first
+    column in ``MACRO_KEY_COLS`` order and, within a column, the smallest
+    macro-competence (alphabetical order) among the rows it appears in.
+
+    Args:
+        df_macro (pd.DataFrame): Macro-competence sheet with the
+            ``MACRO_KEY_COLS`` columns.
+
+    Returns:
+        Dict[str, str]: Macro-competence of every cleaned key.
+    """
+    df_macro = df_macro[df_macro[MACRO_COL].notna()].reset_index(drop=True)
+    macros = df_macro[MACRO_COL].to_numpy(dtype=object)
+
+    mapping = {}
+    for col in MACRO_KEY_COLS:
+        keys = df_macro[col]
+        if col != MACRO_COL:
+            keys = keys.astype(str).str.split(VARIANT_SEPARATORS).explode()
+        column_mapping = (
+            pd.DataFrame(
+                {"key": clean_text(keys).to_numpy(), "macro": macros[keys.index]}
+            )
+            .groupby("key", sort=False)["macro"]
+            .min()
+        )
+        for key, macro in column_mapping.items():
+            mapping.setdefault(key, macro)
+    return mapping
+
 
+# Columns added by the fuzzy fallback of ``add_macro_competence``
+FUZZY_SCORE_COL = "Score de similarité"
+FUZZY_KEY_COL = "Compétence rapprochée"
 
-def add_macro_competence(df_skills: pd.DataFrame, df_macro: pd.DataFrame) -> pd.DataFrame:
+
+def add_macro_competence(
+    df_skills: pd.DataFrame,
+    df_macro: Optional[pd.DataFrame] = None,
+    mapping: Optional[macro_mapping.MacroMapping] = None,
+    fuzzy_threshold: Optional[float] = None,
+) -> pd.DataFrame:
     """Adds macro-competence mapping to skills DataFrame.
 
+    With ``fuzzy_threshold``, the competences without an exact match take the
+    macro-competence of the most similar key (trigram similarity, see
+    ``fuzzy_matcher.TrigramIndex``) when it reaches the threshold, and two
+    columns are added: the similarity (1 for exact matches) and the matched
+    key; both are empty for the competences left unmatched.
+
     Args:
         df_skills (pd.DataFrame): DataFrame containing skills with 'Compétences' column
-        df_macro (pd.DataFrame): DataFrame containing macro-competence mappings
+        df_macro (pd.DataFrame | None): DataFrame containing macro-competence mappings
+        mapping (MacroMapping | None): Precompiled mapping of the macro file (see
+            ``macro_mapping.get_cache``), used instead of ``df_macro``
+        fuzzy_threshold (float | None): Minimal similarity of a fuzzy match, in
+            ]0, 1]; no fuzzy fallback if None
 
     Returns:
         pd.DataFrame: Original skills DataFrame with added 'Macro-Compétence' column
     """
+    if mapping is None and df_macro is None:
+        raise ValueError("Either df_macro or mapping is required")
     df_result = df_skills.copy()
-    df_macro = df_macro.copy()
-
-    df_result['clean_competence'] = clean_text(df_result['Compétences'])
-
-    for col_to_explode in ["5 - Compétence", "5 - Compétence (bis)"]:
-        df_macro[col_to_explode] = df_macro[col_to_explode].astype(str).str.split(r"[•;\n]")
-        df_macro = df_macro.explode(col_to_explode).reset_index(drop=True)
+    clean_competence = clean_text(df_result["Compétences"])
+    if mapping is None and fuzzy_threshold is None:
+        df_result["Macro-Compétence"] = clean_competence.map(
+            build_macro_mapping(df_macro)
+        )
+        return df_result
+
+    if mapping is None:
+        mapping = macro_mapping.MacroMapping.compile(build_macro_mapping(df_macro))
+    macros = mapping.lookup(clean_competence)
+    df_result["Macro-Compétence"] = macros
+    if fuzzy_threshold is None:
+        return df_result
+
+    found = macros.notna().to_numpy()
+    if found.all():
+        # Every label matched exactly: no index to build or query
+        df_result[FUZZY_SCORE_COL] = 1.0
+        df_result[FUZZY_KEY_COL] = clean_competence.to_numpy(dtype=object)
+        return df_result
+
+    # Fuzzy fallback on the distinct labels without an exact match
+    codes, labels = pd.factorize(clean_competence[~found])
+    index = fuzzy_matcher.get_index(mapping)
+    positions, similarities = index.match(labels, threshold=fuzzy_threshold)
+    matched = positions >= 0
+    label_macros = np.full(len(labels), np.nan, dtype=object)
+    label_macros[matched] = mapping.macros.astype(object)[
+        mapping.codes[positions[matched]]
+    ]
+    label_keys = np.full(len(labels), None, dtype=object)
+    label_keys[matched] = [index.keys[p] for p in positions[matched]]
+
+    scores = np.where(found, 1.0, np.nan)
+    scores[~found] = np.where(matched, similarities, np.nan)[codes]
+    keys = clean_competence.to_numpy(dtype=object).copy()
+    keys[~found] = label_keys[codes]
+    df_result.loc[~found, "Macro-Compétence"] = label_macros[codes]
+    df_result[FUZZY_SCORE_COL] = scores
+    df_result[FUZZY_KEY_COL] = keys
+    return df_result
+
+
+SKILLS_REQUIRED_COLS = ["Code Métier", "Intitulé", "Macro Compétence", "Catégorie"]
+
+# Reader type hints: text columns are read as strings, without type inference
+SKILLS_DTYPES = {c: str for c in SKILLS_REQUIRED_COLS}
+CLIENT_DTYPES = {"Code ROME": str}
+MACRO_DTYPES = {
+    "4 - Macro-compétence": str,
+    "5 - Compétence": str,
+    "5 - Compétence (bis)": str,
+}
+
+
+def validate_skills(df: pd.DataFrame) -> pd.DataFrame:
+    """Validate a "Macro-Compétences" sheet and drop incomplete rows.
 
-    df_macro["key_1"] = clean_text(df_macro["5 - Compétence"])
-    df_macro["key_2"] = clean_text(df_macro["5 - Compétence (bis)"])
-    df_macro["key_3"] = clean_text(df_macro["4 - Macro-compétence"])
+    Args:
+        df: Raw skills DataFrame
 
-    mapping_dict = {}
-    for col in ["key_1", "key_2", "key_3"]:
-        temp_dict = (df_macro.dropna(subset=[col, "4 - Macro-compétence"])
-                      .sort_values("4 - Macro-compétence", na_position="last")
-                      .drop_duplicates(subset=col, keep="first")
-                      .set_index(col)["4 - Macro-compétence"]
-                      .to_dict())
-        mapping_dict.update({k: v for k, v in temp_dict.items() if k not in mapping_dict})
+    Returns:
+        pd.DataFrame: Rows with a job code, a title and a macro-competence,
+        the ``SKILLS_REQUIRED_COLS`` encoded as categoricals (``encode_text``)
 
-    df_result["Macro-Compétence"] = df_result['clean_competence'].map(mapping_dict)
+    Raises:
+        ValueError: If required columns are missing
+    """
+    missing_cols = [c for c in SKILLS_REQUIRED_COLS if c not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {', '.join(missing_cols)}")
 
-    return df_result.drop(columns='clean_competence')
+    df = df.dropna(subset=["Code Métier", "Intitulé", "Macro Compétence"])
+    # Integer codes plus one vocabulary per column instead of a string per row
+    return df.assign(**{c: encode_text(df[c]) for c in SKILLS_REQUIRED_COLS})
 
 
 def load_and_validate_skills(file_buffer) -> pd.DataFrame:
@@ -67,23 +242,25 @@ def load_and_validate_skills(file_buffer) -> pd.DataFrame:
         file_buffer: Uploaded Excel file object
 
     Returns:
-        pd.DataFrame: Cleaned and validated DataFrame with skills data
+        pd.DataFrame: Cleaned and validated DataFrame with skills data, the
+        ``SKILLS_REQUIRED_COLS`` encoded as categoricals (``encode_text``)
 
     Raises:
         ValueError: If file is invalid or missing required columns
     """
     try:
-        df = pd.read_excel(file_buffer, sheet_name="Macro-Compétences")
-
-        required_cols = {"Code Métier", "Intitulé", "Macro Compétence", "Catégorie"}
-        missing_cols = required_cols - set(df.columns)
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {', '.join(missing_cols)}")
-
-        df = df.dropna(subset=["Code Métier", "Intitulé", "Macro Compétence"])
-        df["Code Métier"] = clean_text(df["Code Métier"]).str.upper()
-        df["Macro Compétence"] = clean_text(df["Macro Compétence"])
-        df["Catégorie"] = clean_text(df["Catégorie"])
+        df = validate_skills(
+            excel_reader.read_excel(
+                file_buffer,
+                sheet_name="Macro-Compétences",
+                columns=SKILLS_REQUIRED_COLS,
+                dtype=SKILLS_DTYPES,
+            )
+        )
+        df["Code Métier"] = encode_text(df["Code Métier"], clean=True, upper=True)
+        df["Intitulé"] = encode_text(df["Intitulé"])
+        df["Macro Compétence"] = encode_text(df["Macro Compétence"], clean=True)
+        df["Catégorie"] = encode_text(df["Catégorie"], clean=True)
 
         return df
 
@@ -98,18 +275,20 @@ def load_and_validate_client(file_buffer) -> pd.DataFrame:
         file_buffer: Uploaded Excel file object
 
     Returns:
-        pd.DataFrame: Cleaned DataFrame with client job codes
+        pd.DataFrame: Cleaned DataFrame with client job codes (categorical)
 
     Raises:
         ValueError: If required columns are missing
     """
     try:
-        df = pd.read_excel(file_buffer)
+        df = excel_reader.read_excel(
+            file_buffer, columns=list(CLIENT_DTYPES), dtype=CLIENT_DTYPES
+        )
 
         if "Code ROME" not in df.columns:
             raise ValueError("Client file must contain 'Code ROME' column")
 
-        df["Code ROME"] = clean_text(df["Code ROME"]).str.upper()
+        df["Code ROME"] = encode_text(df["Code ROME"], clean=True, upper=True)
         df = df.dropna(subset=["Code ROME"])
 
         return df
@@ -118,6 +297,17 @@ def load_and_validate_client(file_buffer) -> pd.DataFrame:
         raise ValueError(f"Error processing client file: {str(e)}")
 
 
+def _similarity_results(result_df: pd.DataFrame) -> pd.DataFrame:
+    """Title-case the intitulés, add the per-job total and sort by it."""
+    if result_df.empty:
+        return pd.DataFrame()
+    result_df["Intitulé"] = result_df["Intitulé"].str.title()
+    result_df["Score pondéré total"] = result_df.groupby(["Code Métier", "Intitulé"])[
+        "Score pondéré"
+    ].transform("sum")
+    return result_df.sort_values("Score pondéré total", ascending=False)
+
+
 def calculate_job_similarities(
     start_df: pd.DataFrame,
     target_df: pd.DataFrame,
@@ -140,53 +330,122 @@ def calculate_job_similarities(
     """
     try:
         selected_job_code = selected_job_code.strip().upper()
-        selected_skills = set(
-            start_df[start_df["Code Métier"] == selected_job_code]["Macro Compétence"]
+        matrix = passerelle_engine.SkillMatrix.from_frame(target_df)
+        selected_skills = start_df[start_df["Code Métier"] == selected_job_code][
+            "Macro Compétence"
+        ]
+
+        result_df = passerelle_engine.score_passerelles(
+            matrix,
+            start_code=selected_job_code,
+            start_skill_ids=matrix.skill_ids(selected_skills.dropna()),
+            target_codes=matrix.job_codes,
+            weights={c: weights.get(c.lower(), 0) for c in matrix.categories},
+            sector_bonus=1.25,
         )
-        start_letter = selected_job_code[0]
-        results = []
-
-        for job_code, group in target_df.groupby("Code Métier"):
-            if job_code == selected_job_code:
-                continue
-
-            title = group["Intitulé"].iloc[0]
-            job_skills = set(group["Macro Compétence"])
-            common_skills = selected_skills & job_skills
-
-            if common_skills:
-                for skill in common_skills:
-                    category = group[group["Macro Compétence"] == skill][
-                        "Catégorie"
-                    ].iloc[0]
-                    weight = weights.get(category.lower(), 0)
-                    bonus = 1.25 if job_code.startswith(start_letter) else 1
-                    weighted_score = (len(common_skills) * weight / 100) * bonus
-
-                    results.append(
-                        {
-                            "Code Métier": job_code,
-                            "Intitulé": title.title(),
-                            "Nb de passerelles communes": len(common_skills),
-                            "Score pondéré": weighted_score,
-                            "Catégorie": category,
-                            "Compétence commune": skill,
-                        }
-                    )
-
-        if results:
-            result_df = pd.DataFrame(results)
-            result_df["Score pondéré total"] = result_df.groupby(
-                ["Code Métier", "Intitulé"]
-            )["Score pondéré"].transform("sum")
-            return result_df.sort_values("Score pondéré total", ascending=False)
-
-        return pd.DataFrame()
+        return _similarity_results(result_df)
 
     except Exception as e:
         raise ValueError(f"Error calculating similarities: {str(e)}")
 
 
+PASSERELLE_DETAIL_COLUMNS = [
+    "Code Métier",
+    "Intitulé",
+    "Score pondéré total",
+    "Nb de passerelles communes",
+    "Catégorie",
+    "Compétence commune",
+]
+
+
+def passerelle_details(results_df: pd.DataFrame) -> pd.DataFrame:
+    """Format per-skill passerelle rows for display and export.
+
+    Args:
+        results_df: Rows of ``passerelle_engine.score_passerelles``
+
+    Returns:
+        pd.DataFrame: ``PASSERELLE_DETAIL_COLUMNS`` rows sorted by decreasing
+        total score, then job code and title
+    """
+    df = results_df.copy()
+    df["Score pondéré total"] = df.groupby(["Code Métier", "Intitulé"])[
+        "Score pondéré"
+    ].transform("sum")
+    return df[PASSERELLE_DETAIL_COLUMNS].sort_values(
+        by=["Score pondéré total", "Code Métier", "Intitulé"],
+        ascending=[False, True, True],
+    )
+
+
+class TopPasserelles:
+    """
+    The K best target jobs of a start job.
+
+    ``ranking`` holds one row per selected job. The per-skill explanation rows
+    are only expanded, for those K jobs, on the first call to ``details``.
+    """
+
+    def __init__(self, ranking: pd.DataFrame, expand: Callable[[], pd.DataFrame]):
+        self.ranking = ranking
+        self._expand = expand
+        self._details: Optional[pd.DataFrame] = None
+
+    @property
+    def empty(self) -> bool:
+        return self.ranking.empty
+
+    def details(self) -> pd.DataFrame:
+        """Per-skill rows of the selected jobs (``PASSERELLE_DETAIL_COLUMNS``)."""
+        if self._details is None:
+            self._details = passerelle_details(self._expand())
+        return self._details
+
+
+def top_k_passerelles(
+    matrix: passerelle_engine.SkillMatrix,
+    start_code: str,
+    start_skill_ids,
+    target_codes: Iterable[str],
+    weights: Dict[str, float],
+    k: int = 20,
+    categories: Optional[Iterable[str]] = None,
+    sector_bonus: float = 1.0,
+) -> TopPasserelles:
+    """Select the K best passerelles of a start job without materializing all rows.
+
+    Args:
+        matrix: Incidence matrix of the referential
+        start_code: Code of the start job
+        start_skill_ids: Macro-competence ids of the start job
+        target_codes: Codes of the candidate target jobs
+        weights: Weight (in %) of each category label
+        k: Number of target jobs to keep
+        categories: Categories taken into account, all if None
+        sector_bonus: Multiplier applied to targets of the same ROME sector
+
+    Returns:
+        TopPasserelles: Ranking of the K jobs with lazily expanded details
+    """
+    target_codes = list(target_codes)
+    scoring_args = dict(
+        start_code=start_code,
+        start_skill_ids=start_skill_ids,
+        target_codes=target_codes,
+        weights=weights,
+        categories=categories,
+        sector_bonus=sector_bonus,
+    )
+    ranking = passerelle_engine.rank_passerelles(matrix, k=k, **scoring_args)
+    return TopPasserelles(
+        ranking,
+        lambda: passerelle_engine.score_passerelles(
+            matrix, only_codes=ranking["Code Métier"], **scoring_args
+        ),
+    )
+
+
 def join_on_columns(
     df_left: pd.DataFrame,
     df_right: pd.DataFrame,
@@ -210,4 +469,4 @@ def join_on_columns(
         left_on=left_col,
         right_on=right_col,
     )
-    return joined
\ No newline at end of file
+    return joined
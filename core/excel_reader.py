@@ -0,0 +1,72 @@
+import importlib.util
+import logging
+import os
+from typing import Dict, Optional, Sequence, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("calamine", "openpyxl")
+
+
+def excel_engine() -> str:
+    """Return the engine used to read Excel files.
+
+    ``PASSERELLES_EXCEL_ENGINE`` ("calamine" or "openpyxl") when set,
+    otherwise calamine (Rust parser, several times faster) when
+    python-calamine is installed, openpyxl otherwise. An unknown value is
+    ignored with a warning.
+    """
+    configured = os.getenv("PASSERELLES_EXCEL_ENGINE", "").strip().lower()
+    if configured in ENGINES:
+        return configured
+    if configured:
+        logger.warning(
+            "Unknown PASSERELLES_EXCEL_ENGINE %r (expected one of %s)",
+            configured,
+            ", ".join(ENGINES),
+        )
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return "openpyxl"
+
+
+def read_excel(
+    source,
+    sheet_name: Union[str, int] = 0,
+    columns: Optional[Sequence[str]] = None,
+    dtype: Optional[Dict[str, type]] = None,
+    engine: Optional[str] = None,
+) -> pd.DataFrame:
+    """Read one sheet of an Excel file, keeping only the needed columns.
+
+    Args:
+        source: File path or binary file object.
+        sheet_name (str | int): Worksheet name or index.
+        columns (Sequence[str] | None): Columns to read, all if None; columns
+            absent from the sheet are ignored (callers check the required
+            ones).
+        dtype (Dict[str, type] | None): Type hints (e.g. ``str`` for text
+            columns), which skip type inference.
+        engine (str | None): "calamine" or "openpyxl", ``excel_engine()`` if
+            None.
+
+    Returns:
+        pd.DataFrame: The sheet, projected on ``columns``.
+
+    Raises:
+        ValueError: If the sheet does not exist.
+    """
+    engine = engine or excel_engine()
+    wanted = None if columns is None else set(columns)
+    if wanted is not None and dtype is not None:
+        dtype = {c: t for c, t in dtype.items() if c in wanted}
+    return pd.read_excel(
+        source,
+        sheet_name=sheet_name,
+        usecols=None if wanted is None else (lambda name: name in wanted),
+        dtype=dtype,
+        # pandas picks openpyxl for .xlsx, and still reads legacy .xls files
+        engine=None if engine == "openpyxl" else engine,
+    )
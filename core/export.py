@@ -1,11 +1,30 @@
+import gzip
 import io
-from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
-import matplotlib.pyplot as plt
 import pandas as pd
-import streamlit as st
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
 
-from core import auth_utils
+from core import passerelle_engine, report_writer
+
+EXCEL_MAX_ROWS = 1_048_576
+
+# Column holding the sheet name in single-table formats (Parquet, CSV)
+SHEET_COLUMN = "Type de passerelle"
+
+# Parquet type of the label columns: each distinct label is stored once
+LABEL_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+# Parquet types of the non-label columns of the exported tables
+VALUE_TYPES = {
+    "Nombre de compétences partagées": pa.int64(),
+    "Nb de passerelles communes": pa.int64(),
+    "Score pondéré": pa.float64(),
+    "Score pondéré total": pa.float64(),
+    "Rang": pa.int64(),
+}
 
 
 def excel_export(
@@ -17,43 +36,346 @@ def excel_export(
     poids_se=None,
     poids_savoirs=None,
 ):
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        workbook = writer.book
-        worksheet = workbook.add_worksheet(sheet_name)
-        writer.sheets[sheet_name] = worksheet
-
-        format_titre = workbook.add_format({"bold": True, "font_size": 14})
-        format_soustitre = workbook.add_format({"italic": True})
-
-        # Écriture du titre et des dimensions choisies
-        worksheet.write("A1", f"Métier de départ : {source_job}", format_titre)
-        worksheet.write(
-            "A2",
-            f"Dimensions sélectionnées : {categories_str}",
-            format_soustitre,
+    """Build a one-sheet passerelle report for a start job.
+
+    Only the weights that are given are listed in the header.
+
+    Returns:
+        bytes: The xlsx file content.
+    """
+    weights = {
+        category: weight
+        for category, weight in [
+            ("Savoir-faire", poids_sf),
+            ("Savoir-être professionnels", poids_se),
+            ("Savoirs", poids_savoirs),
+        ]
+        if weight is not None
+    }
+    return report_writer.report_bytes(
+        [report_writer.ReportSheet(sheet_name, f"Métier de départ : {source_job}", df)],
+        report_writer.report_metadata(categories_str, weights),
+    )
+
+
+def _continuation_sheet_name(sheet_name: str, part: int) -> str:
+    """Name of the ``part``-th sheet of a split table (31 characters max)."""
+    if part == 1:
+        return sheet_name[:31]
+    suffix = f" ({part})"
+    return sheet_name[: 31 - len(suffix)] + suffix
+
+
+def stream_excel(
+    output,
+    sheets: Iterable[Tuple[str, Iterable[pd.DataFrame]]],
+    columns: Sequence[str],
+    max_rows: int = EXCEL_MAX_ROWS,
+) -> Dict[str, int]:
+    """Write row batches to an xlsx file in xlsxwriter constant-memory mode.
+
+    Batches are written as soon as they are produced and only the current row
+    is held by xlsxwriter, so memory stays bounded whatever the output size.
+    A sheet that would exceed ``max_rows`` rows (header included) continues on
+    "<name> (2)", "<name> (3)"… with the header repeated.
+
+    Args:
+        output: File path or binary file object to write to.
+        sheets: ``(sheet name, batches)`` pairs, written in order.
+        columns: Column names, in output order, shared by every batch.
+        max_rows: Maximum number of rows per sheet.
+
+    Returns:
+        Dict[str, int]: Number of data rows written per requested sheet.
+    """
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    header_format = workbook.add_format({"bold": True})
+    written = {}
+
+    try:
+        for sheet_name, batches in sheets:
+            part = 1
+            worksheet = workbook.add_worksheet(
+                _continuation_sheet_name(sheet_name, part)
+            )
+            worksheet.write_row(0, 0, columns, header_format)
+            row = 1
+            written[sheet_name] = 0
+
+            for batch in batches:
+                if batch.empty:
+                    continue
+                values = batch[list(columns)].astype(object)
+                values = values.where(values.notna(), None)
+                for record in values.itertuples(index=False, name=None):
+                    if row >= max_rows:
+                        part += 1
+                        worksheet = workbook.add_worksheet(
+                            _continuation_sheet_name(sheet_name, part)
+                        )
+                        worksheet.write_row(0, 0, columns, header_format)
+                        row = 1
+                    worksheet.write_row(row, 0, record)
+                    row += 1
+                written[sheet_name] += len(values)
+    finally:
+        workbook.close()
+
+    return written
+
+
+def parquet_schema(
+    columns: Sequence[str], value_types: Optional[Dict[str, pa.DataType]] = None
+) -> pa.Schema:
+    """Return the Parquet schema of a table with a ``SHEET_COLUMN`` first.
+
+    Args:
+        columns: Column names, in output order.
+        value_types: Arrow types of the non-label columns, ``VALUE_TYPES``
+            if None; every other column is a label, dictionary-encoded.
+
+    Returns:
+        pa.Schema: The same schema whatever the number of rows.
+    """
+    if value_types is None:
+        value_types = VALUE_TYPES
+    return pa.schema(
+        [(SHEET_COLUMN, LABEL_TYPE)]
+        + [(c, value_types.get(c, LABEL_TYPE)) for c in columns]
+    )
+
+
+def stream_parquet(
+    output,
+    sheets: Iterable[Tuple[str, Iterable[pd.DataFrame]]],
+    columns: Sequence[str],
+    value_types: Optional[Dict[str, pa.DataType]] = None,
+    row_group_size: int = 100_000,
+) -> Dict[str, int]:
+    """Write row batches to a single Parquet file.
+
+    The sheet name is stored in the ``SHEET_COLUMN`` column. Batches are
+    buffered up to ``row_group_size`` rows, so memory stays bounded. The
+    file has the ``parquet_schema`` of ``columns``, even without any row.
+
+    Args:
+        output: File path or binary file object to write to.
+        sheets: ``(sheet name, batches)`` pairs, written in order.
+        columns: Column names, in output order, shared by every batch.
+        value_types: Arrow types of the non-label columns (see
+            ``parquet_schema``).
+        row_group_size: Number of rows per Parquet row group.
+
+    Returns:
+        Dict[str, int]: Number of data rows written per requested sheet.
+    """
+    schema = parquet_schema(columns, value_types)
+    labels = [f.name for f in schema if pa.types.is_dictionary(f.type)]
+    out_columns = [SHEET_COLUMN, *columns]
+    pending: List[pd.DataFrame] = []
+    pending_rows = 0
+    written = {}
+
+    def flush():
+        nonlocal pending, pending_rows
+        if not pending:
+            return
+        table = pa.Table.from_pandas(
+            pd.concat(pending, ignore_index=True), schema=schema, preserve_index=False
         )
-        # Définir les pondérations appliquées (selon sélection)
-        pond_list = []
-        if poids_sf is None:
-            pond_list.append(f"Savoir-faire = {poids_sf}%")
-        if poids_se is None:
-            pond_list.append(f"Savoir-être professionnels = {poids_se}%")
-        if poids_savoirs is None:
-            pond_list.append(f"Savoirs = {poids_savoirs}%")
+        writer.write_table(table, row_group_size=row_group_size)
+        pending, pending_rows = [], 0
+
+    writer = pq.ParquetWriter(
+        output, schema, use_dictionary=labels, compression="snappy"
+    )
+    try:
+        for sheet_name, batches in sheets:
+            written[sheet_name] = 0
+            for batch in batches:
+                if batch.empty:
+                    continue
+                batch = batch[list(columns)].copy()
+                batch.insert(0, SHEET_COLUMN, sheet_name)
+                pending.append(batch[out_columns])
+                pending_rows += len(batch)
+                written[sheet_name] += len(batch)
+                if pending_rows >= row_group_size:
+                    flush()
+        flush()
+    finally:
+        writer.close()
+
+    return written
+
+
+def stream_csv_gz(
+    output,
+    sheets: Iterable[Tuple[str, Iterable[pd.DataFrame]]],
+    columns: Sequence[str],
+) -> Dict[str, int]:
+    """Write row batches to a single gzip-compressed CSV file.
+
+    The sheet name is stored in the ``SHEET_COLUMN`` column.
+
+    Args:
+        output: File path or binary file object to write to.
+        sheets: ``(sheet name, batches)`` pairs, written in order.
+        columns: Column names, in output order, shared by every batch.
 
-        pond_str = " / ".join(pond_list)
-        worksheet.write("A3", f"Pondérations appliquées : {pond_str}", format_soustitre)
+    Returns:
+        Dict[str, int]: Number of data rows written per requested sheet.
+    """
+    written = {}
+    with gzip.open(output, "wt", encoding="utf-8", newline="") as csv_file:
+        pd.DataFrame(columns=[SHEET_COLUMN, *columns]).to_csv(csv_file, index=False)
+        for sheet_name, batches in sheets:
+            written[sheet_name] = 0
+            for batch in batches:
+                if batch.empty:
+                    continue
+                batch = batch[list(columns)].copy()
+                batch.insert(0, SHEET_COLUMN, sheet_name)
+                batch.to_csv(csv_file, header=False, index=False)
+                written[sheet_name] += len(batch)
+    return written
 
-        date_export = datetime.now().strftime("%d/%m/%Y à %Hh%M")
-        worksheet.write("A4", f"Date d’export : {date_export}", format_soustitre)
 
-        # Export des données à partir de la ligne 6 (index 5)
-        df.to_excel(writer, index=False, startrow=5, sheet_name=sheet_name)
+# Raw passerelle dump formats: label → (writer, file extension, MIME type)
+STREAM_FORMATS = {
+    "Excel (.xlsx)": (
+        stream_excel,
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "Parquet (.parquet)": (stream_parquet, "parquet", "application/vnd.apache.parquet"),
+    "CSV compressé (.csv.gz)": (stream_csv_gz, "csv.gz", "application/gzip"),
+}
 
-        # Ajustement automatique de la largeur des colonnes
-        for i, col in enumerate(df.columns):
-            column_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-            worksheet.set_column(i, i, column_len)
 
+def write_raw_passerelles(
+    output,
+    label: str,
+    matrix: passerelle_engine.SkillMatrix,
+    client_codes: Iterable[str],
+    modes: Sequence[str] = ("Passerelle entrante", "Passerelle sortante"),
+    categories: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> Dict[str, int]:
+    """Compute every passerelle between client and non-client jobs and stream
+    them to a file of one of the ``STREAM_FORMATS``.
+
+    Args:
+        output: File path or binary file object to write to.
+        label (str): Key of ``STREAM_FORMATS``.
+        matrix: Incidence matrix of the referential.
+        client_codes (Iterable[str]): Codes of the client jobs.
+        modes (Sequence[str]): "Passerelle entrante" (non-client → client)
+            and/or "Passerelle sortante" (client → non-client), one sheet each.
+        categories (Iterable[str] | None): Categories taken into account.
+        workers (int | None): Number of processes (``default_workers()``).
+        progress: Optional callback receiving the sheet name and its
+            completed fraction.
+
+    Returns:
+        Dict[str, int]: Number of rows written per sheet.
+    """
+    writer, _, _ = STREAM_FORMATS[label]
+    client_codes = list(client_codes)
+    client_code_set = set(client_codes)
+    non_client_codes = [c for c in matrix.job_codes if c not in client_code_set]
+    directions = {
+        "Passerelle entrante": (
+            "Passerelles entrantes",
+            non_client_codes,
+            client_codes,
+        ),
+        "Passerelle sortante": (
+            "Passerelles sortantes",
+            client_codes,
+            non_client_codes,
+        ),
+    }
+
+    def sheet_progress(sheet_name: str) -> Optional[Callable[[float], None]]:
+        if progress is None:
+            return None
+        return lambda fraction: progress(sheet_name, fraction)
+
+    sheets = [
+        (
+            sheet_name,
+            passerelle_engine.iter_transitions_parallel(
+                matrix,
+                start_codes,
+                target_codes,
+                categories=categories,
+                workers=workers,
+                progress=sheet_progress(sheet_name),
+            ),
+        )
+        for sheet_name, start_codes, target_codes in (
+            directions[mode] for mode in modes
+        )
+    ]
+    return writer(output, sheets, columns=passerelle_engine.TRANSITION_COLUMNS)
+
+
+def batch_report_excel(
+    report_df: pd.DataFrame,
+    mode: str,
+    categories_str: str,
+    weights: Dict[str, float],
+) -> bytes:
+    """Build the multi-sheet workbook of a batch passerelle report.
+
+    The "Synthèse" sheet holds every row; each client job then gets its own
+    sheet, named after its ROME code, with the usual header block.
+
+    Args:
+        report_df (pd.DataFrame): Output of
+            ``passerelle_engine.batch_rank_passerelles``.
+        mode (str): "Passerelle entrante" or "Passerelle sortante".
+        categories_str (str): Selected dimensions, for the header.
+        weights (Dict[str, float]): Weight (in %) of each category label.
+
+    Returns:
+        bytes: The xlsx file content.
+    """
+    sheets = [
+        report_writer.ReportSheet(
+            "Synthèse", f"{mode} — tous les métiers client", report_df
+        )
+    ]
+    for (code, title), df in report_df.groupby(
+        ["Code Métier client", "Intitulé client"], sort=False
+    ):
+        sheets.append(
+            report_writer.ReportSheet(str(code), f"{mode} — {code} - {title}", df)
+        )
+    return report_writer.report_bytes(
+        sheets, report_writer.report_metadata(categories_str, weights)
+    )
+
+
+def batch_report_parquet(report_df: pd.DataFrame, *_args) -> bytes:
+    """Build the single-table Parquet file of a batch passerelle report."""
+    buffer = io.BytesIO()
+    report_df.to_parquet(buffer, index=False)
     return buffer.getvalue()
+
+
+# Batch report formats: label → (builder, file extension, MIME type)
+BATCH_FORMATS = {
+    "Excel (.xlsx)": (
+        batch_report_excel,
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "Parquet (.parquet)": (
+        batch_report_parquet,
+        "parquet",
+        "application/vnd.apache.parquet",
+    ),
+}
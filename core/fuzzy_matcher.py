@@ -0,0 +1,183 @@
+import math
+import threading
+import weakref
+from typing import Dict, Iterable, Sequence, Set, Tuple
+
+import numpy as np
+
+from core.macro_mapping import MacroMapping
+
+# Default minimal trigram similarity (Jaccard) of a fuzzy match
+DEFAULT_THRESHOLD = 0.35
+
+# Keys scored exactly per label, at most (the best candidates of the index)
+SHORTLIST_SIZE = 50
+
+# Postings read per label, at most (rarest trigrams first)
+MAX_POSTINGS = 20_000
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the trigrams of every word of ``text``, padded like pg_trgm.
+
+    Each word is padded with two spaces before and one after, so short
+    words and word starts weigh more than word middles.
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Inverted index of the trigrams of a set of keys, for fuzzy lookups.
+
+    The similarity of two labels is the Jaccard index of their trigram sets.
+    A label is only compared with the keys sharing one of its rarest
+    trigrams (prefix filtering: with a threshold t, a key scoring at least t
+    shares at least ``ceil(t · n)`` of the ``n`` trigrams of the label, so
+    it owns one of the ``n - ceil(t · n) + 1`` rarest ones). The candidates
+    are then cut to the ``shortlist`` sharing the most trigrams and scored
+    exactly, so the cost per label is bounded whatever the number of keys.
+    """
+
+    def __init__(self, keys: Sequence[str]):
+        self.keys = list(keys)
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        for key in self.keys:
+            ids = sorted(
+                {vocabulary.setdefault(g, len(vocabulary)) for g in trigrams(key)}
+            )
+            indices.extend(ids)
+            indptr.append(len(indices))
+        self._vocabulary = vocabulary
+        # Key → trigrams (CSR rows) and trigram → keys (postings)
+        self._indptr = np.asarray(indptr, dtype=np.int64)
+        self._indices = np.asarray(indices, dtype=np.int32)
+        self._sizes = np.diff(self._indptr)
+        owners = np.repeat(np.arange(len(self.keys), dtype=np.int32), self._sizes)
+        order = np.argsort(self._indices, kind="stable")
+        self._postings = owners[order]
+        self._postings_indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self._indices, minlength=len(vocabulary)),
+            out=self._postings_indptr[1:],
+        )
+
+    @classmethod
+    def from_mapping(cls, mapping: MacroMapping) -> "TrigramIndex":
+        """Index the keys of a compiled macro-competence mapping."""
+        return cls(key.decode("utf-8") for key in mapping.keys.tolist())
+
+    def _frequency(self, gram_id: int) -> int:
+        return int(self._postings_indptr[gram_id + 1] - self._postings_indptr[gram_id])
+
+    def match_one(
+        self,
+        label: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        shortlist: int = SHORTLIST_SIZE,
+        max_postings: int = MAX_POSTINGS,
+    ) -> Tuple[int, float]:
+        """Return the position of the most similar key and its similarity.
+
+        Args:
+            label (str): Label, normalized like the keys.
+            threshold (float): Minimal similarity, in ]0, 1].
+            shortlist (int): Candidates scored exactly, at most.
+            max_postings (int): Postings read, at most.
+
+        Returns:
+            Tuple[int, float]: Key position and similarity, or (-1, 0.0)
+            when no key reaches ``threshold``.
+        """
+        grams = trigrams(label)
+        if not grams:
+            return -1, 0.0
+        known = [self._vocabulary[g] for g in grams if g in self._vocabulary]
+        # Unknown trigrams are the rarest of all: they come first in the prefix
+        prefix = len(grams) - max(1, math.ceil(threshold * len(grams))) + 1
+        probes = sorted(known, key=self._frequency)[
+            : prefix - (len(grams) - len(known))
+        ]
+        if not probes:
+            return -1, 0.0
+
+        postings = []
+        read = 0
+        for gram_id in probes:
+            start = self._postings_indptr[gram_id]
+            end = self._postings_indptr[gram_id + 1]
+            if postings and read + end - start > max_postings:
+                break
+            postings.append(self._postings[start:end])
+            read += end - start
+        candidates, shared = np.unique(np.concatenate(postings), return_counts=True)
+        if len(candidates) > shortlist:
+            candidates = candidates[np.argpartition(-shared, shortlist - 1)[:shortlist]]
+            candidates.sort()
+
+        # Exact similarity of the shortlist
+        starts, ends = self._indptr[candidates], self._indptr[candidates + 1]
+        gathered = np.concatenate(
+            [self._indices[start:end] for start, end in zip(starts, ends)]
+        )
+        rows = np.repeat(np.arange(len(candidates)), ends - starts)
+        overlap = np.bincount(
+            rows, weights=np.isin(gathered, known), minlength=len(candidates)
+        )
+        scores = overlap / (len(grams) + self._sizes[candidates] - overlap)
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return -1, 0.0
+        return int(candidates[best]), float(scores[best])
+
+    def match(
+        self,
+        labels: Iterable[str],
+        threshold: float = DEFAULT_THRESHOLD,
+        shortlist: int = SHORTLIST_SIZE,
+        max_postings: int = MAX_POSTINGS,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Same as ``match_one`` for every label.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Key positions (-1 when unmatched)
+            and similarities.
+        """
+        results = [
+            self.match_one(label, threshold, shortlist, max_postings)
+            for label in labels
+        ]
+        positions = np.array([r[0] for r in results], dtype=np.int64)
+        scores = np.array([r[1] for r in results], dtype=np.float64)
+        return positions, scores
+
+
+_INDEXES: Dict[int, TrigramIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_index(mapping: MacroMapping) -> TrigramIndex:
+    """Return the trigram index of a compiled mapping, built once per mapping.
+
+    The index lives as long as the mapping's key array: it is dropped with
+    the mapping, e.g. when the mapping leaves ``macro_mapping.get_cache()``.
+    """
+    key = id(mapping.keys)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+    if index is not None:
+        return index
+
+    index = TrigramIndex.from_mapping(mapping)
+    with _INDEXES_LOCK:
+        if key not in _INDEXES:
+            _INDEXES[key] = index
+            # Runs before the id can be reused by another array
+            weakref.finalize(mapping.keys, _INDEXES.pop, key, None)
+        return _INDEXES[key]
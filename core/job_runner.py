@@ -0,0 +1,256 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from core import utils
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_DIR = os.path.join(tempfile.gettempdir(), "passerelles_jobs")
+DEFAULT_TTL_HOURS = 24
+
+QUEUED = "en attente"
+RUNNING = "en cours"
+DONE = "terminé"
+CANCELLED = "annulé"
+FAILED = "erreur"
+
+# A task writes its artifact to the given path and reports its progress
+Task = Callable[[str, Callable[[float], None]], None]
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once cancellation is requested."""
+
+
+class Job:
+    """
+    One background computation and its on-disk artifact.
+
+    ``status`` and ``progress`` are updated by the worker thread and polled by
+    the Streamlit sessions; ``path`` is only meaningful once the job is done.
+    """
+
+    def __init__(self, job_id: str, owner: str, label: str, path: str):
+        self.id = job_id
+        self.owner = owner
+        self.label = label
+        self.path = path
+        self.status = QUEUED
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+        self._future: Optional[Future] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "owner": self.owner,
+            "label": self.label,
+            "path": self.path,
+            "status": self.status,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        job = cls(data["id"], data["owner"], data["label"], data["path"])
+        job.status = data["status"]
+        job.progress = 1.0
+        job.created = data["created"]
+        job.finished = data["finished"]
+        return job
+
+
+class JobRunner:
+    """
+    Process-wide queue of long computations (raw passerelle generations).
+
+    Jobs run on a bounded thread pool, outside the Streamlit script threads,
+    so a rerun or a closed tab does not interrupt them and at most
+    ``max_workers`` heavy jobs compete with the interactive sessions. Each job
+    writes one artifact in ``jobs_dir``; finished jobs are recorded next to it
+    in a JSON file so they survive restarts, and are deleted after ``ttl``
+    seconds. ``jobs_dir`` is private to the process owner, and the paths read
+    back from the records are only used when they resolve inside it.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        jobs_dir: Optional[str] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.max_workers = max_workers or int(os.getenv("PASSERELLES_JOB_SLOTS", "1"))
+        self.jobs_dir = jobs_dir or os.getenv("PASSERELLES_JOBS_DIR", DEFAULT_JOBS_DIR)
+        self.ttl = ttl or 3600 * float(
+            os.getenv("PASSERELLES_JOBS_TTL_HOURS", DEFAULT_TTL_HOURS)
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="passerelles-job"
+        )
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._load_finished()
+
+    def _metadata_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _owns(self, path: str) -> bool:
+        """Whether ``path`` resolves to an entry of ``jobs_dir``."""
+        root = os.path.realpath(self.jobs_dir)
+        return os.path.dirname(os.path.realpath(path)) == root
+
+    def _load_finished(self) -> None:
+        if not os.path.isdir(self.jobs_dir):
+            return
+        try:
+            utils.private_dir(self.jobs_dir)
+        except OSError as e:
+            logger.warning("Job records of %s ignored: %s", self.jobs_dir, e)
+            return
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.jobs_dir, name), encoding="utf-8") as f:
+                    job = Job.from_dict(json.load(f))
+            except Exception as e:
+                logger.warning("Unreadable job record %s: %s", name, e)
+                continue
+            if not (self._owns(job.path) and self._owns(self._metadata_path(job.id))):
+                logger.warning("Job record %s points outside %s", name, self.jobs_dir)
+                continue
+            if os.path.exists(job.path):
+                self._jobs[job.id] = job
+        self.purge_expired()
+
+    def submit(self, owner: str, label: str, extension: str, task: Task) -> str:
+        """Queue a job and return its id.
+
+        Args:
+            owner (str): User the job belongs to.
+            label (str): Description shown in the job list.
+            extension (str): Extension of the artifact file.
+            task (Task): ``task(path, progress)`` writes the artifact to
+                ``path`` and calls ``progress(fraction)`` regularly; the call
+                raises ``JobCancelled`` once the job is cancelled.
+
+        Returns:
+            str: The job id.
+        """
+        self.purge_expired()
+        utils.private_dir(self.jobs_dir)
+        job_id = uuid.uuid4().hex
+        job = Job(
+            job_id, owner, label, os.path.join(self.jobs_dir, f"{job_id}.{extension}")
+        )
+        with self._lock:
+            self._jobs[job_id] = job
+        job._future = self._executor.submit(self._run, job, task)
+        return job_id
+
+    def _run(self, job: Job, task: Task) -> None:
+        if job._cancel.is_set():
+            job.status = CANCELLED
+            job.finished = time.time()
+            return
+        job.status = RUNNING
+
+        def progress(fraction: float) -> None:
+            if job._cancel.is_set():
+                raise JobCancelled()
+            job.progress = fraction
+
+        try:
+            task(job.path, progress)
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            job.status = FAILED
+            job.error = str(e)
+        else:
+            job.status = DONE
+            job.progress = 1.0
+        job.finished = time.time()
+
+        if job.status == DONE:
+            try:
+                with open(self._metadata_path(job.id), "w", encoding="utf-8") as f:
+                    json.dump(job.to_dict(), f)
+            except OSError as e:  # the job stays available until restart
+                logger.warning("Job record %s not saved: %s", job.id, e)
+        elif os.path.exists(job.path):
+            os.remove(job.path)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner: Optional[str] = None) -> List[Job]:
+        """Return the jobs of an owner (all if None), newest first."""
+        self.purge_expired()
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if owner in (None, j.owner)]
+        return sorted(jobs, key=lambda j: j.created, reverse=True)
+
+    def cancel(self, job_id: str) -> None:
+        """Request the cancellation of a queued or running job."""
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            job.status = CANCELLED
+            job.finished = time.time()
+
+    def remove(self, job_id: str) -> None:
+        """Forget a finished job and delete its artifact."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.active:
+                return
+            del self._jobs[job_id]
+        for path in (job.path, self._metadata_path(job_id)):
+            if self._owns(path) and os.path.exists(path):
+                os.remove(path)
+
+    def purge_expired(self) -> int:
+        """Delete the jobs finished more than ``ttl`` seconds ago."""
+        deadline = time.time() - self.ttl
+        with self._lock:
+            expired = [
+                j.id
+                for j in self._jobs.values()
+                if j.finished is not None and j.finished < deadline
+            ]
+        for job_id in expired:
+            self.remove(job_id)
+        return len(expired)
+
+
+_RUNNER: Optional[JobRunner] = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_runner() -> JobRunner:
+    """Return the process-wide job runner, created on first use."""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = JobRunner()
+        return _RUNNER
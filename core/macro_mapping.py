@@ -0,0 +1,218 @@
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from core import referential_cache, utils
+
+logger = logging.getLogger(__name__)
+
+# Bump when the key normalization (``clean_text``) or the mapping rules
+# change: artifacts compiled by an older version are then ignored
+MAPPING_VERSION = 1
+
+_ARRAYS = ("keys", "codes", "macros")
+
+
+class MacroMapping(NamedTuple):
+    """
+    Compiled cleaned competence label → macro-competence mapping.
+
+    The keys are stored UTF-8 encoded in one sorted fixed-width byte array
+    and looked up by binary search; each key points to a macro-competence
+    of the (small) vocabulary ``macros``. The three arrays are saved as
+    ``.npy`` files and memory-mapped on load.
+    """
+
+    keys: np.ndarray
+    codes: np.ndarray
+    macros: np.ndarray
+
+    @classmethod
+    def compile(cls, mapping: Dict[str, str]) -> "MacroMapping":
+        """Compile a ``build_macro_mapping`` dictionary."""
+        keys = np.array([key.encode("utf-8") for key in mapping], dtype=bytes)
+        macros, codes = np.unique(
+            np.array(list(mapping.values()), dtype=str), return_inverse=True
+        )
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], codes[order].astype(np.int32), macros)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, cleaned: pd.Series) -> pd.Series:
+        """Return the macro-competence of every cleaned label (NaN if unknown).
+
+        Args:
+            cleaned (pd.Series): Labels normalized with ``clean_text``.
+
+        Returns:
+            pd.Series: Macro-competences, with the index of ``cleaned``.
+        """
+        codes, uniques = pd.factorize(cleaned)
+        queries = [str(value).encode("utf-8") for value in uniques]
+        # Longer labels than the widest key would be truncated: never found
+        fits = np.array(
+            [len(query) <= self.keys.dtype.itemsize for query in queries], dtype=bool
+        )
+        queries = np.array(queries, dtype=self.keys.dtype)
+        positions = np.searchsorted(self.keys, queries)
+        found = fits & (positions < len(self.keys))
+        found[found] = self.keys[positions[found]] == queries[found]
+
+        values = np.full(len(queries) + 1, np.nan, dtype=object)
+        values[:-1][found] = self.macros.astype(object)[self.codes[positions[found]]]
+        return pd.Series(values[codes], index=cleaned.index, name=cleaned.name)
+
+    def save(self, directory: str) -> None:
+        """Write the arrays as ``.npy`` files in a new private ``directory``."""
+        os.mkdir(directory, 0o700)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str) -> "MacroMapping":
+        """Memory-map the arrays written by ``save`` (read-only)."""
+        return cls(
+            *(
+                np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in _ARRAYS
+            )
+        )
+
+
+class MacroMappingCache:
+    """
+    Process-wide cache of compiled macro-competence mappings, keyed by content.
+
+    A macro file is parsed and compiled once per content (SHA-256): the
+    compiled mapping is kept in memory with LRU eviction and saved to disk,
+    where later processes memory-map it instead of reading the Excel file.
+    The disk store follows the rules of ``ReferentialCache``'s: private
+    directory, ``ttl`` and ``max_bytes`` bounds enforced on write, and files
+    deleted with the in-memory entry.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[float] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.cache_dir = os.path.join(
+            cache_dir
+            or os.getenv("PASSERELLES_CACHE_DIR", referential_cache.DEFAULT_CACHE_DIR),
+            "macro_mappings",
+        )
+        self.max_bytes = max_bytes or 2**20 * float(
+            os.getenv(
+                "PASSERELLES_CACHE_MAX_MB", referential_cache.DEFAULT_CACHE_MAX_MB
+            )
+        )
+        self.ttl = ttl or 3600 * float(
+            os.getenv(
+                "PASSERELLES_CACHE_TTL_HOURS",
+                referential_cache.DEFAULT_CACHE_TTL_HOURS,
+            )
+        )
+        self._entries: "OrderedDict[str, MacroMapping]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.v{MAPPING_VERSION}")
+
+    def _remember(self, digest: str, mapping: MacroMapping) -> None:
+        self._entries[digest] = mapping
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            dropped, _ = self._entries.popitem(last=False)
+            # Memory-mapped arrays of the dropped mapping stay readable
+            referential_cache.remove_entry(self._disk_path(dropped))
+
+    def _spill(self, digest: str, mapping: MacroMapping) -> None:
+        tmp_path = f"{self._disk_path(digest)}.{os.getpid()}.tmp"
+        try:
+            utils.private_dir(self.cache_dir)
+            mapping.save(tmp_path)
+            os.replace(tmp_path, self._disk_path(digest))
+            referential_cache.prune_disk_store(
+                self.cache_dir, ".v", self.max_bytes, self.ttl
+            )
+        except Exception as e:  # the disk store is best effort
+            logger.warning("Macro mapping spill failed: %s", e)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def get(self, digest: str, build: Callable[[], Dict[str, str]]) -> MacroMapping:
+        """Return the compiled mapping of a macro file, building it on a miss.
+
+        Args:
+            digest (str): SHA-256 of the macro file (see
+                ``referential_cache.file_digest``).
+            build (Callable[[], Dict[str, str]]): Parses the file and returns
+                the ``build_macro_mapping`` dictionary; only called on a miss.
+
+        Returns:
+            MacroMapping: The compiled, read-only mapping.
+        """
+        with self._lock:
+            if digest in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(digest)
+                return self._entries[digest]
+
+        path = self._disk_path(digest)
+        if os.path.isdir(path) and referential_cache.is_expired(path, self.ttl):
+            referential_cache.remove_entry(path)
+        elif os.path.isdir(path):
+            try:
+                mapping = MacroMapping.load(path)
+            except Exception as e:
+                logger.warning("Unreadable macro mapping %s: %s", path, e)
+            else:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(digest, mapping)
+                return mapping
+
+        mapping = MacroMapping.compile(build())
+        self._spill(digest, mapping)
+        with self._lock:
+            self.misses += 1
+            self._remember(digest, mapping)
+        return mapping
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and the number of entries in memory."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Drop the in-memory entries and their files."""
+        with self._lock:
+            for digest in self._entries:
+                referential_cache.remove_entry(self._disk_path(digest))
+            self._entries.clear()
+
+
+_CACHE = MacroMappingCache()
+
+
+def get_cache() -> MacroMappingCache:
+    """Return the process-wide compiled mapping cache."""
+    return _CACHE
@@ -0,0 +1,194 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from core.passerelle_engine import SkillMatrix
+
+# Mersenne prime of the universal hash family h(x) = (a·x + b) mod p
+_PRIME = (1 << 31) - 1
+_EMPTY = np.iinfo(np.uint32).max
+
+
+# Hashes computed at once, at most (16 MiB per int64 temporary)
+_MAX_ELEMENTS = 1 << 21
+
+# Permutations hashed together, at most
+_PERM_CHUNK = 64
+
+
+def _signatures(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    hash_a: np.ndarray,
+    hash_b: np.ndarray,
+    max_elements: int = _MAX_ELEMENTS,
+    perm_chunk: int = _PERM_CHUNK,
+) -> np.ndarray:
+    """Compute the MinHash signature of every row of a CSR structure.
+
+    The rows are processed by blocks of at most ``max_elements // perm_chunk``
+    entries (a longer row makes its own block) and the permutations by
+    chunks of ``perm_chunk``, so the hashed temporaries stay under
+    ``max_elements`` values whatever ``num_perm`` and the row lengths. Rows
+    without any skill get ``_EMPTY`` everywhere.
+
+    Returns:
+        np.ndarray: ``(n_rows, num_perm)`` uint32 signatures.
+    """
+    n_rows = len(indptr) - 1
+    num_perm = len(hash_a)
+    signatures = np.full((n_rows, num_perm), _EMPTY, dtype=np.uint32)
+    block_nnz = max(1, max_elements // perm_chunk)
+
+    block_start = 0
+    while block_start < n_rows:
+        # End of the rows whose entries fit in the block (at least one row)
+        block_end = (
+            int(np.searchsorted(indptr, indptr[block_start] + block_nnz, side="right"))
+            - 1
+        )
+        block_end = min(max(block_end, block_start + 1), n_rows)
+        rows = np.arange(block_start, block_end)
+        block_start = block_end
+        rows = rows[indptr[rows + 1] > indptr[rows]]
+        if not len(rows):
+            continue
+        lo, hi = indptr[rows[0]], indptr[rows[-1] + 1]
+        values = indices[lo:hi].astype(np.int64)
+        # Empty rows own no entry, so the segments of kept rows are contiguous
+        offsets = indptr[rows] - lo
+        for perm_start in range(0, num_perm, perm_chunk):
+            perms = slice(perm_start, perm_start + perm_chunk)
+            hashed = np.multiply.outer(hash_a[perms], values)
+            hashed += hash_b[perms, None]
+            hashed %= _PRIME
+            signatures[rows, perms] = np.minimum.reduceat(hashed, offsets, axis=1).T
+
+    return signatures
+
+
+class MinHashLSH:
+    """
+    MinHash signatures of the jobs of a referential, indexed with LSH banding.
+
+    Each job's macro-competence set is summarized by ``num_perm`` min-hashes;
+    the signature is cut into ``bands`` bands whose keys are stored as sorted
+    arrays. Two jobs become candidates when one of their band keys is equal,
+    which happens with probability ``1 - (1 - J^r)^bands`` for a Jaccard
+    similarity J and ``r = num_perm / bands`` rows per band. Lookups are
+    binary searches, so candidate generation does not visit the catalog.
+
+    Not exposed in the application: the best passerelles share few skills
+    (median Jaccard 0.11 for the top 20 on the synthetic referential of
+    ``benchmarks/bench_lsh.py``, 1500 jobs), so a useful recall keeps most
+    of the catalog. Measured on 1000 profiles (exact engine: 2.8 s):
+    512/256 keeps 39 % of the jobs for a recall@20 of 0.92 (2.6 s), and
+    384/128 keeps 6.9 % for a recall of 0.26.
+    """
+
+    def __init__(
+        self,
+        matrix: SkillMatrix,
+        categories: Optional[Iterable[str]] = None,
+        num_perm: int = 512,
+        bands: int = 256,
+        seed: int = 0,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.matrix = matrix
+        self.categories = None if categories is None else frozenset(categories)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+
+        rng = np.random.default_rng(seed)
+        self._hash_a = rng.integers(1, _PRIME, size=num_perm, dtype=np.int64)
+        self._hash_b = rng.integers(0, _PRIME, size=num_perm, dtype=np.int64)
+        self._band_mix = rng.integers(
+            1, np.iinfo(np.int64).max, size=self.rows_per_band, dtype=np.int64
+        ).astype(np.uint64)
+
+        view = matrix.view(self.categories)
+        self._rows = np.flatnonzero(np.diff(view.indptr) > 0)
+        keys = self._band_keys(
+            _signatures(view.indptr, view.indices, self._hash_a, self._hash_b)[
+                self._rows
+            ]
+        )
+        order = np.argsort(keys, axis=0, kind="stable")
+        self._sorted_keys = np.take_along_axis(keys, order, axis=0)
+        self._sorted_rows = self._rows[order]
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Fold each band of the signatures into one uint64 key per band."""
+        bands = signatures.astype(np.uint64).reshape(
+            len(signatures), self.bands, self.rows_per_band
+        )
+        # Wrap-around arithmetic is intended: the key is a hash
+        with np.errstate(over="ignore"):
+            return (bands * self._band_mix).sum(axis=-1, dtype=np.uint64)
+
+    def signatures(self, skill_sets: sparse.csr_matrix) -> np.ndarray:
+        """Return the signatures of the rows of a ``n × skills`` matrix."""
+        skill_sets = sparse.csr_matrix(skill_sets)
+        return _signatures(
+            skill_sets.indptr, skill_sets.indices, self._hash_a, self._hash_b
+        )
+
+    def query_signatures(self, signatures: np.ndarray) -> List[np.ndarray]:
+        """Return, per signature, the sorted rows of its candidate jobs."""
+        keys = self._band_keys(signatures)
+        queries, rows = [], []
+        for band in range(self.bands):
+            column = self._sorted_keys[:, band]
+            lo = np.searchsorted(column, keys[:, band], side="left")
+            hi = np.searchsorted(column, keys[:, band], side="right")
+            lengths = hi - lo
+            # Expand every [lo, hi) bucket range into (query, position) pairs
+            offsets = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+            positions = np.arange(lengths.sum()) + offsets
+            queries.append(np.repeat(np.arange(len(keys)), lengths))
+            rows.append(self._sorted_rows[positions, band])
+
+        pairs = np.unique(
+            np.concatenate(queries).astype(np.int64) * self.matrix.shape[0]
+            + np.concatenate(rows)
+        )
+        bounds = np.searchsorted(
+            pairs, np.arange(len(keys) + 1, dtype=np.int64) * self.matrix.shape[0]
+        )
+        return [
+            pairs[bounds[i] : bounds[i + 1]] % self.matrix.shape[0]
+            for i in range(len(keys))
+        ]
+
+    def query(self, skill_ids: np.ndarray) -> np.ndarray:
+        """Return the sorted rows of the candidate jobs of one skill set."""
+        skill_ids = np.unique(np.asarray(skill_ids, dtype=np.int64))
+        if not len(skill_ids):
+            return np.empty(0, dtype=np.int64)
+        signature = _signatures(
+            np.array([0, len(skill_ids)]), skill_ids, self._hash_a, self._hash_b
+        )
+        return self.query_signatures(signature)[0]
+
+
+def get_index(
+    matrix: SkillMatrix,
+    categories: Optional[Iterable[str]] = None,
+    num_perm: int = 512,
+    bands: int = 256,
+) -> MinHashLSH:
+    """Return the (memoized) LSH index of a referential and category set."""
+    key = (
+        "minhash_lsh",
+        None if categories is None else frozenset(categories),
+        num_perm,
+        bands,
+    )
+    return matrix.memoize(
+        key, lambda: MinHashLSH(matrix, categories, num_perm=num_perm, bands=bands)
+    )
@@ -0,0 +1,933 @@
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Number of derived results (e.g. per start job overlaps) cached per matrix
+MEMO_SIZE = 256
+
+SKILL_COLUMNS = ["Code Métier", "Intitulé", "Macro Compétence", "Catégorie"]
+
+RESULT_COLUMNS = [
+    "Code Métier",
+    "Intitulé",
+    "Nb de passerelles communes",
+    "Score pondéré",
+    "Catégorie",
+    "Compétence commune",
+]
+
+TRANSITION_COLUMNS = [
+    "Code Métier Départ",
+    "Intitulé Départ",
+    "Code Métier Arrivée",
+    "Intitulé Arrivée",
+    "Nombre de compétences partagées",
+    "Catégorie",
+    "Compétence commune",
+]
+
+
+BATCH_COLUMNS = [
+    "Code Métier client",
+    "Intitulé client",
+    "Rang",
+    "Code Métier",
+    "Intitulé",
+    "Score pondéré total",
+    "Nombre de compétences partagées",
+    "Compétences communes",
+]
+
+
+class SkillMatrix:
+    """
+    Sparse jobs × macro-competences incidence matrix of a ROME referential.
+
+    The matrix is built once per referential. Each stored cell holds the
+    category code (+1) of the first row where the job lists the skill, which is
+    the category the legacy ``groupby("Code Métier")`` loops picked with
+    ``group[group["Macro Compétence"] == skill]["Catégorie"].iloc[0]``.
+    Category-restricted views, and their inverted index (skill → jobs
+    postings), are derived lazily and memoized.
+    """
+
+    def __init__(
+        self,
+        job_codes: np.ndarray,
+        job_titles: np.ndarray,
+        skills: np.ndarray,
+        categories: Sequence[str],
+        job_idx: np.ndarray,
+        skill_idx: np.ndarray,
+        cat_idx: np.ndarray,
+    ):
+        self.job_codes = job_codes
+        self.job_titles = job_titles
+        self.skills = skills
+        self.categories = tuple(categories)
+
+        # (job, skill, category) triples, deduplicated, in source row order
+        self._job_idx = job_idx
+        self._skill_idx = skill_idx
+        self._cat_idx = cat_idx
+
+        # ROME sector letter of every job, for the same-sector bonus
+        self.job_sectors = np.array([code[:1] for code in job_codes], dtype=object)
+        self._code_pos = {code: i for i, code in enumerate(job_codes)}
+        self._skill_pos = {skill: i for i, skill in enumerate(skills)}
+        self._views: Dict[Optional[frozenset], sparse.csr_matrix] = {}
+        self._postings: Dict[Optional[frozenset], sparse.csr_matrix] = {}
+        self._frozen = False
+        self._memo: "OrderedDict[Any, Any]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SkillMatrix":
+        """Build the matrix from a "Macro-Compétences" sheet.
+
+        Args:
+            df (pd.DataFrame): Frame with the ``SKILL_COLUMNS`` columns.
+
+        Returns:
+            SkillMatrix: Incidence matrix covering every category of the sheet.
+        """
+        df = df.dropna(subset=["Code Métier", "Intitulé", "Macro Compétence"])
+
+        job_idx, job_codes = pd.factorize(df["Code Métier"], sort=True)
+        skill_idx, skills = pd.factorize(df["Macro Compétence"], sort=True)
+        cat_idx, categories = pd.factorize(df["Catégorie"].astype(object).fillna(""))
+        job_titles = (
+            df.groupby("Code Métier", sort=True, observed=True)["Intitulé"]
+            .first()
+            .to_numpy(dtype=object)
+        )
+
+        # Keep the first occurrence of every (job, skill, category) triple
+        flat = (job_idx.astype(np.int64) * len(skills) + skill_idx) * len(
+            categories
+        ) + cat_idx
+        _, first = np.unique(flat, return_index=True)
+        first.sort()
+
+        return cls(
+            job_codes=np.asarray(job_codes, dtype=object),
+            job_titles=job_titles,
+            skills=np.asarray(skills, dtype=object),
+            categories=list(categories),
+            job_idx=job_idx[first].astype(np.int32),
+            skill_idx=skill_idx[first].astype(np.int32),
+            cat_idx=cat_idx[first].astype(np.int16),
+        )
+
+    def to_compact(self, categories: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Export a category view as plain numpy arrays.
+
+        The arrays are cheap to pickle, which is how worker processes receive
+        the referential (see ``iter_transitions_parallel``).
+        """
+        view = self.view(categories)
+        return {
+            "indptr": view.indptr,
+            "indices": view.indices,
+            "data": view.data,
+            "job_codes": self.job_codes,
+            "job_titles": self.job_titles,
+            "skills": self.skills,
+            "categories": self.categories,
+        }
+
+    @classmethod
+    def from_compact(cls, compact: Dict[str, Any]) -> "SkillMatrix":
+        """Rebuild a matrix exported with ``to_compact``."""
+        indptr = compact["indptr"]
+        return cls(
+            job_codes=compact["job_codes"],
+            job_titles=compact["job_titles"],
+            skills=compact["skills"],
+            categories=compact["categories"],
+            job_idx=np.repeat(
+                np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr)
+            ),
+            skill_idx=compact["indices"].astype(np.int32),
+            cat_idx=(compact["data"] - 1).astype(np.int16),
+        )
+
+    @property
+    def shape(self):
+        return len(self.job_codes), len(self.skills)
+
+    def view(self, categories: Optional[Iterable[str]] = None) -> sparse.csr_matrix:
+        """Return the incidence matrix restricted to some categories.
+
+        Args:
+            categories (Iterable[str] | None): Categories to keep, all if None.
+
+        Returns:
+            sparse.csr_matrix: Jobs × skills matrix holding ``category code + 1``.
+        """
+        key = None if categories is None else frozenset(categories)
+        if key not in self._views:
+            if key is None:
+                mask = np.ones(len(self._cat_idx), dtype=bool)
+            else:
+                cat_ids = [i for i, c in enumerate(self.categories) if c in key]
+                mask = np.isin(self._cat_idx, cat_ids)
+
+            job, skill, cat = (
+                self._job_idx[mask],
+                self._skill_idx[mask],
+                self._cat_idx[mask],
+            )
+            # A skill listed under several kept categories uses the first one
+            _, first = np.unique(
+                job.astype(np.int64) * len(self.skills) + skill, return_index=True
+            )
+            matrix = sparse.csr_matrix(
+                (cat[first] + 1, (job[first], skill[first])),
+                shape=self.shape,
+                dtype=np.int16,
+            )
+            matrix.sort_indices()
+            if self._frozen:
+                _make_read_only(matrix.data, matrix.indices, matrix.indptr)
+            self._views[key] = matrix
+        return self._views[key]
+
+    def postings(self, categories: Optional[Iterable[str]] = None) -> sparse.csr_matrix:
+        """Return the inverted index of a view: skills × jobs postings.
+
+        Row ``s`` lists, sorted by job code, the jobs listing skill ``s`` with
+        ``category code + 1`` as value. It is the transpose of ``view`` and is
+        built once per referential version and category set.
+
+        Args:
+            categories (Iterable[str] | None): Categories to keep, all if None.
+
+        Returns:
+            sparse.csr_matrix: Skills × jobs matrix.
+        """
+        key = None if categories is None else frozenset(categories)
+        if key not in self._postings:
+            index = self.view(categories).T.tocsr()
+            index.sort_indices()
+            if self._frozen:
+                _make_read_only(index.data, index.indices, index.indptr)
+            self._postings[key] = index
+        return self._postings[key]
+
+    def candidate_rows(
+        self, skill_ids: np.ndarray, categories: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """Return the sorted rows of the jobs listing at least one of the skills."""
+        index = self.postings(categories)
+        skill_ids = np.asarray(skill_ids, dtype=np.int64)
+        if not len(skill_ids):
+            return np.empty(0, dtype=np.int64)
+        starts, ends = index.indptr[skill_ids], index.indptr[skill_ids + 1]
+        lengths = ends - starts
+        # Gather the postings of every skill in one fancy-indexing pass
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions = np.arange(lengths.sum()) + offsets
+        return np.unique(index.indices[positions]).astype(np.int64)
+
+    def freeze(self) -> "SkillMatrix":
+        """Make every array read-only so the matrix can be shared safely."""
+        self._frozen = True
+        _make_read_only(
+            self.job_codes,
+            self.job_titles,
+            self.job_sectors,
+            self.skills,
+            self._job_idx,
+            self._skill_idx,
+            self._cat_idx,
+        )
+        for view in [*self._views.values(), *self._postings.values()]:
+            _make_read_only(view.data, view.indices, view.indptr)
+        return self
+
+    def memoize(self, key, compute: Callable[[], Any]) -> Any:
+        """Return ``compute()``, cached under ``key`` in a bounded LRU."""
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        value = compute()
+        with self._memo_lock:
+            self._memo[key] = value
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return value
+
+    def memoize_latest(self, slot, key, compute: Callable[[], Any]) -> Any:
+        """Same as ``memoize`` for large values: one value is kept per
+        ``slot``, the value of another ``key`` replaces it.
+
+        The previous value is dropped before ``compute`` runs, so at most one
+        value of the slot is held at a time.
+        """
+        with self._memo_lock:
+            entry = self._memo.get(slot)
+            if entry is not None and entry[0] == key:
+                self._memo.move_to_end(slot)
+                return entry[1]
+            self._memo.pop(slot, None)
+        value = compute()
+        with self._memo_lock:
+            self._memo[slot] = (key, value)
+            self._memo.move_to_end(slot)
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return value
+
+    def active_jobs(self, categories: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Return the codes of the jobs listing at least one skill of the categories."""
+        return self.job_codes[np.diff(self.view(categories).indptr) > 0]
+
+    def job_positions(self, codes: Iterable[str]) -> np.ndarray:
+        """Return the sorted row positions of the known job codes."""
+        positions = [self._code_pos[c] for c in codes if c in self._code_pos]
+        return np.unique(np.asarray(positions, dtype=np.int64))
+
+    def job_skill_ids(
+        self, code: str, categories: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """Return the skill ids listed by a job (empty if the job is unknown)."""
+        pos = self._code_pos.get(code)
+        if pos is None:
+            return np.empty(0, dtype=np.int32)
+        view = self.view(categories)
+        return view.indices[view.indptr[pos] : view.indptr[pos + 1]].copy()
+
+    def skill_ids(self, labels: Iterable[str]) -> np.ndarray:
+        """Return the ids of the known macro-competence labels."""
+        ids = [self._skill_pos[s] for s in labels if s in self._skill_pos]
+        return np.unique(np.asarray(ids, dtype=np.int32))
+
+    def category_weights(self, weights: Dict[str, float]) -> np.ndarray:
+        """Return the weight of every category code (0 when not weighted)."""
+        return np.array([weights.get(c, 0) for c in self.categories], dtype=float)
+
+
+def _make_read_only(*arrays: np.ndarray) -> None:
+    for array in arrays:
+        array.flags.writeable = False
+
+
+class SharedSkills(NamedTuple):
+    """
+    Weight-independent overlap between a start job and its target jobs.
+
+    Only targets sharing at least one skill are kept. ``shared`` holds, per
+    such target, its shared skills with ``category code + 1`` as value, and
+    ``category_counts`` the number of shared skills of each category.
+    """
+
+    target_rows: np.ndarray
+    shared: sparse.csr_matrix
+    counts: np.ndarray
+    category_counts: np.ndarray
+    same_sector: np.ndarray
+
+
+def _compute_shared_skills(
+    matrix: SkillMatrix,
+    start_code: str,
+    start_skill_ids: np.ndarray,
+    target_rows: np.ndarray,
+    categories: Optional[Iterable[str]],
+) -> SharedSkills:
+    view = matrix.view(categories)
+    # Only targets reachable from the start skills can share anything
+    target_rows = np.intersect1d(
+        target_rows,
+        matrix.candidate_rows(start_skill_ids, categories),
+        assume_unique=True,
+    )
+    start_mask = np.zeros(matrix.shape[1], dtype=view.dtype)
+    start_mask[start_skill_ids] = 1
+    shared = (view[target_rows] @ sparse.diags(start_mask, dtype=view.dtype)).tocsr()
+    shared.eliminate_zeros()
+
+    counts = np.diff(shared.indptr)
+    hits = np.flatnonzero(counts)
+    shared = shared[hits]
+    shared.sort_indices()
+    counts = counts[hits]
+    target_rows = target_rows[hits]
+
+    n_categories = len(matrix.categories)
+    entry_rows = np.repeat(np.arange(len(hits)), counts)
+    category_counts = np.bincount(
+        entry_rows * n_categories + (shared.data - 1),
+        minlength=len(hits) * n_categories,
+    ).reshape(len(hits), n_categories)
+
+    same_sector = matrix.job_sectors[target_rows] == start_code[0]
+    return SharedSkills(target_rows, shared, counts, category_counts, same_sector)
+
+
+def shared_skills(
+    matrix: SkillMatrix,
+    start_code: str,
+    start_skill_ids: np.ndarray,
+    target_codes: Iterable[str],
+    categories: Optional[Iterable[str]] = None,
+) -> SharedSkills:
+    """Return the (memoized) overlap of a start job with its target jobs.
+
+    The result does not depend on the category weights, so it is cached on
+    the matrix and a weight change only costs a dot product and a sort.
+
+    Args:
+        matrix: Incidence matrix of the referential.
+        start_code: Code of the start job, excluded from the targets.
+        start_skill_ids: Macro-competence ids of the start job.
+        target_codes: Codes of the candidate target jobs.
+        categories: Categories taken into account, all if None.
+
+    Returns:
+        SharedSkills: Shared skills, counts and per-category counts.
+    """
+    target_rows = matrix.job_positions(c for c in target_codes if c != start_code)
+    start_skill_ids = np.asarray(start_skill_ids, dtype=np.int32)
+    key = (
+        start_code,
+        None if categories is None else frozenset(categories),
+        start_skill_ids.tobytes(),
+        target_rows.tobytes(),
+    )
+    return matrix.memoize(
+        key,
+        lambda: _compute_shared_skills(
+            matrix, start_code, start_skill_ids, target_rows, categories
+        ),
+    )
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the k highest scores, best first.
+
+    Selection uses ``np.argpartition`` (linear time) and only the k selected
+    values are sorted. Ties are broken by ascending index, i.e. job code.
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[: k - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
+
+
+def _sector_bonus(overlap: SharedSkills, sector_bonus: float) -> np.ndarray:
+    return np.where(overlap.same_sector, sector_bonus, 1.0)
+
+
+def score_passerelles(
+    matrix: SkillMatrix,
+    start_code: str,
+    start_skill_ids: np.ndarray,
+    target_codes: Iterable[str],
+    weights: Dict[str, float],
+    categories: Optional[Iterable[str]] = None,
+    sector_bonus: float = 1.0,
+    only_codes: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Score every target job against a start job in one vectorized pass.
+
+    Args:
+        matrix: Incidence matrix of the referential.
+        start_code: Code of the start job, excluded from the targets.
+        start_skill_ids: Macro-competence ids of the start job.
+        target_codes: Codes of the candidate target jobs.
+        weights: Weight (in %) of each category label.
+        categories: Categories taken into account, all if None.
+        sector_bonus: Multiplier applied to targets of the same ROME sector.
+        only_codes: Expand the rows of these targets only, all if None.
+
+    Returns:
+        pd.DataFrame: One row per shared macro-competence with the
+        ``RESULT_COLUMNS`` columns, ordered by job code then skill.
+    """
+    overlap = shared_skills(
+        matrix, start_code, start_skill_ids, target_codes, categories
+    )
+    selected = np.arange(len(overlap.target_rows))
+    if only_codes is not None:
+        selected = np.flatnonzero(
+            np.isin(overlap.target_rows, matrix.job_positions(only_codes))
+        )
+    if not len(selected):
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    shared = overlap.shared[selected]
+    counts = overlap.counts[selected]
+    entry_rows = np.repeat(selected, counts)
+    entry_jobs = overlap.target_rows[entry_rows]
+    entry_cats = shared.data - 1
+    entry_counts = overlap.counts[entry_rows]
+    category_weights = matrix.category_weights(weights)
+
+    return pd.DataFrame(
+        {
+            "Code Métier": matrix.job_codes[entry_jobs],
+            "Intitulé": matrix.job_titles[entry_jobs],
+            "Nb de passerelles communes": entry_counts,
+            "Score pondéré": entry_counts
+            * category_weights[entry_cats]
+            / 100
+            * _sector_bonus(overlap, sector_bonus)[entry_rows],
+            "Catégorie": np.asarray(matrix.categories, dtype=object)[entry_cats],
+            "Compétence commune": matrix.skills[shared.indices],
+        }
+    )
+
+
+def rank_passerelles(
+    matrix: SkillMatrix,
+    start_code: str,
+    start_skill_ids: np.ndarray,
+    target_codes: Iterable[str],
+    weights: Dict[str, float],
+    categories: Optional[Iterable[str]] = None,
+    sector_bonus: float = 1.0,
+    k: Optional[int] = None,
+) -> pd.DataFrame:
+    """Rank target jobs by total weighted score, one row per target.
+
+    Same scores as summing ``score_passerelles`` per job, computed from the
+    cached per-category counts: ``count × (category_counts · weights) / 100``.
+    With ``k``, only the k best targets are selected (``top_k_indices``) and
+    materialized.
+
+    Args:
+        matrix: Incidence matrix of the referential.
+        start_code: Code of the start job, excluded from the targets.
+        start_skill_ids: Macro-competence ids of the start job.
+        target_codes: Codes of the candidate target jobs.
+        weights: Weight (in %) of each category label.
+        categories: Categories taken into account, all if None.
+        sector_bonus: Multiplier applied to targets of the same ROME sector.
+        k: Number of targets to keep, all if None.
+
+    Returns:
+        pd.DataFrame: ``Code Métier``, ``Intitulé``, one weighted score column
+        per category (each of ``categories`` when given), ``Score pondéré
+        total`` and ``Nombre de compétences partagées``, sorted by decreasing
+        total score then job code.
+    """
+    overlap = shared_skills(
+        matrix, start_code, start_skill_ids, target_codes, categories
+    )
+    scale = overlap.counts * _sector_bonus(overlap, sector_bonus) / 100
+    totals = (overlap.category_counts @ matrix.category_weights(weights)) * scale
+    order = top_k_indices(totals, len(totals) if k is None else k)
+
+    rows = overlap.target_rows[order]
+    category_scores = (
+        overlap.category_counts[order]
+        * matrix.category_weights(weights)
+        * scale[order, None]
+    )
+    ranked = pd.DataFrame(
+        {
+            "Code Métier": matrix.job_codes[rows],
+            "Intitulé": matrix.job_titles[rows],
+        }
+    )
+    for category in matrix.categories if categories is None else categories:
+        if category in matrix.categories:
+            ranked[category] = category_scores[:, matrix.categories.index(category)]
+        else:
+            ranked[category] = 0.0
+    ranked["Score pondéré total"] = totals[order]
+    ranked["Nombre de compétences partagées"] = overlap.counts[order]
+    return ranked
+
+
+def category_matrices(
+    matrix: SkillMatrix, categories: Optional[Iterable[str]]
+) -> List[sparse.csr_matrix]:
+    """Split a category view into one binary jobs × skills matrix per category."""
+    coo = matrix.view(categories).tocoo()
+    result = []
+    for code in range(len(matrix.categories)):
+        selected = coo.data == code + 1
+        result.append(
+            sparse.csr_matrix(
+                (
+                    np.ones(selected.sum(), dtype=np.int32),
+                    (coo.row[selected], coo.col[selected]),
+                ),
+                shape=matrix.shape,
+            )
+        )
+    return result
+
+
+def batch_rank_passerelles(
+    matrix: SkillMatrix,
+    client_codes: Iterable[str],
+    weights: Dict[str, float],
+    incoming: bool = False,
+    k: int = 20,
+    categories: Optional[Iterable[str]] = None,
+    sector_bonus: float = 1.25,
+    block_size: int = 256,
+) -> pd.DataFrame:
+    """Top-K passerelles of every client job, computed with matrix products.
+
+    Scores follow ``calculate_job_similarities``: for a start job s and a
+    target job t, ``|S ∩ T| × Σ weight(category of the skill in t) / 100``,
+    multiplied by ``sector_bonus`` when both codes share their first letter.
+    Per-category shared counts come from one sparse product per category,
+    processed by blocks of ``block_size`` client jobs and restricted to the
+    candidates found in the inverted index (``SkillMatrix.postings``).
+
+    Args:
+        matrix: Incidence matrix of the referential.
+        client_codes: Codes of the client jobs.
+        weights: Weight (in %) of each category label.
+        incoming: Rank the jobs leading to each client job (every other job
+            of the referential) instead of the non-client jobs it leads to.
+        k: Number of passerelles kept per client job.
+        categories: Categories taken into account, all if None.
+        sector_bonus: Multiplier applied to pairs of the same ROME sector.
+        block_size: Number of client jobs scored per block.
+
+    Returns:
+        pd.DataFrame: ``BATCH_COLUMNS`` plus one weighted score column per
+        category (each of ``categories`` when given), ordered by client code
+        then rank.
+    """
+    client_rows = matrix.job_positions(client_codes)
+    if incoming:
+        other_rows = np.arange(matrix.shape[0])
+    else:
+        other_rows = np.setdiff1d(np.arange(matrix.shape[0]), client_rows)
+
+    view = matrix.view(categories)
+    binary = (view != 0).astype(np.int32)
+    per_category = category_matrices(matrix, categories)
+    category_weights = matrix.category_weights(weights)
+    sectors = matrix.job_sectors
+    shown_categories = list(matrix.categories if categories is None else categories)
+
+    frames = []
+    for block_start in range(0, len(client_rows), block_size):
+        block = client_rows[block_start : block_start + block_size]
+        # Candidates: jobs listing at least one skill of the block (postings)
+        candidates = np.intersect1d(
+            other_rows,
+            matrix.candidate_rows(np.unique(view[block].indices), categories),
+            assume_unique=True,
+        )
+        if incoming:
+            # Target = client job: categories are read on the client side
+            category_counts = np.stack(
+                [(m[block] @ binary[candidates].T).toarray() for m in per_category],
+                axis=-1,
+            )
+        else:
+            category_counts = np.stack(
+                [(binary[block] @ m[candidates].T).toarray() for m in per_category],
+                axis=-1,
+            )
+        counts = category_counts.sum(axis=-1)
+        bonus = np.where(
+            sectors[block][:, None] == sectors[candidates][None, :],
+            sector_bonus,
+            1.0,
+        )
+        scale = counts * bonus / 100
+        totals = (category_counts @ category_weights) * scale
+
+        for i, client in enumerate(block):
+            valid = np.flatnonzero((counts[i] > 0) & (candidates != client))
+            order = valid[top_k_indices(totals[i, valid], k)]
+            rows = candidates[order]
+
+            client_skills = view.indices[view.indptr[client] : view.indptr[client + 1]]
+            frame = pd.DataFrame(
+                {
+                    "Code Métier client": matrix.job_codes[client],
+                    "Intitulé client": matrix.job_titles[client],
+                    "Rang": np.arange(1, len(order) + 1),
+                    "Code Métier": matrix.job_codes[rows],
+                    "Intitulé": matrix.job_titles[rows],
+                }
+            )
+            for category in shown_categories:
+                if category in matrix.categories:
+                    code = matrix.categories.index(category)
+                    frame[category] = (
+                        category_counts[i, order, code]
+                        * category_weights[code]
+                        * scale[i, order]
+                    )
+                else:
+                    frame[category] = 0.0
+            frame["Score pondéré total"] = totals[i, order]
+            frame["Nombre de compétences partagées"] = counts[i, order]
+            frame["Compétences communes"] = [
+                " ; ".join(
+                    matrix.skills[
+                        np.intersect1d(
+                            client_skills,
+                            view.indices[view.indptr[row] : view.indptr[row + 1]],
+                            assume_unique=True,
+                        )
+                    ]
+                )
+                for row in rows
+            ]
+            frames.append(frame)
+
+    columns = BATCH_COLUMNS[:5] + shown_categories + BATCH_COLUMNS[5:]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+def _iter_transition_entries(
+    matrix: SkillMatrix,
+    start_rows: np.ndarray,
+    target_rows: np.ndarray,
+    categories: Optional[Iterable[str]] = None,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield, per start row, the integer-encoded shared skills of every target.
+
+    Each item is ``(start_row, target_rows, pair_counts, category_ids,
+    skill_ids)`` with one array entry per shared skill.
+    """
+    view = matrix.view(categories)
+    # Targets outside the postings of every start skill share nothing
+    target_rows = np.intersect1d(
+        target_rows,
+        matrix.candidate_rows(np.unique(view[start_rows].indices), categories),
+        assume_unique=True,
+    )
+    targets = view[target_rows]
+    binary = (view != 0).astype(np.int32)
+    counts = (binary[start_rows] @ binary[target_rows].T).tocsr()
+    counts.sort_indices()
+
+    for i, start in enumerate(start_rows):
+        hits = counts.indices[counts.indptr[i] : counts.indptr[i + 1]]
+        if not len(hits):
+            empty = np.empty(0, dtype=np.int32)
+            yield start, empty, empty, empty, empty
+            continue
+
+        start_mask = np.zeros(matrix.shape[1], dtype=view.dtype)
+        start_mask[view.indices[view.indptr[start] : view.indptr[start + 1]]] = 1
+        shared = (targets[hits] @ sparse.diags(start_mask, dtype=view.dtype)).tocsr()
+        shared.eliminate_zeros()
+        shared.sort_indices()
+
+        pair_counts = np.diff(shared.indptr)
+        yield (
+            start,
+            target_rows[np.repeat(hits, pair_counts)].astype(np.int32),
+            np.repeat(pair_counts, pair_counts).astype(np.int32),
+            (shared.data - 1).astype(np.int16),
+            shared.indices.astype(np.int32),
+        )
+
+
+def _transition_frame(
+    matrix: SkillMatrix,
+    start: int,
+    entry_jobs: np.ndarray,
+    entry_counts: np.ndarray,
+    entry_cats: np.ndarray,
+    entry_skills: np.ndarray,
+) -> pd.DataFrame:
+    """Decode integer-encoded transitions into a ``TRANSITION_COLUMNS`` frame."""
+    if not len(entry_jobs):
+        return pd.DataFrame(columns=TRANSITION_COLUMNS)
+    n_entries = len(entry_jobs)
+    return pd.DataFrame(
+        {
+            "Code Métier Départ": np.repeat(matrix.job_codes[start], n_entries),
+            "Intitulé Départ": np.repeat(matrix.job_titles[start], n_entries),
+            "Code Métier Arrivée": matrix.job_codes[entry_jobs],
+            "Intitulé Arrivée": matrix.job_titles[entry_jobs],
+            "Nombre de compétences partagées": entry_counts,
+            "Catégorie": np.asarray(matrix.categories, dtype=object)[entry_cats],
+            "Compétence commune": matrix.skills[entry_skills],
+        }
+    )
+
+
+def iter_transitions(
+    matrix: SkillMatrix,
+    start_codes: Iterable[str],
+    target_codes: Iterable[str],
+    categories: Optional[Iterable[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield the raw passerelles of every start job towards the target jobs.
+
+    The shared-skill counts of all start × target pairs come from a single
+    sparse product of the incidence matrix with its transpose; the shared
+    skills of each pair are then read from the nonzero structure.
+
+    Args:
+        matrix: Incidence matrix of the referential.
+        start_codes: Codes of the start jobs.
+        target_codes: Codes of the target jobs.
+        categories: Categories taken into account, all if None.
+
+    Yields:
+        pd.DataFrame: One frame per start job (possibly empty), in job code
+        order, with the ``TRANSITION_COLUMNS`` columns.
+    """
+    for entries in _iter_transition_entries(
+        matrix,
+        matrix.job_positions(start_codes),
+        matrix.job_positions(target_codes),
+        categories,
+    ):
+        yield _transition_frame(matrix, *entries)
+
+
+def default_workers() -> int:
+    """Return the worker count set in ``PASSERELLES_WORKERS`` (CPU count otherwise)."""
+    return int(os.getenv("PASSERELLES_WORKERS") or os.cpu_count() or 1)
+
+
+_WORKER_MATRIX: Optional[SkillMatrix] = None
+
+
+def _init_worker(compact: Dict[str, Any]) -> None:
+    global _WORKER_MATRIX
+    _WORKER_MATRIX = SkillMatrix.from_compact(compact)
+
+
+def _transitions_shard(start_rows: np.ndarray, target_rows: np.ndarray):
+    return list(_iter_transition_entries(_WORKER_MATRIX, start_rows, target_rows))
+
+
+def _bounded_map(
+    executor: Executor, fn: Callable[..., Any], items: Iterable[tuple], window: int
+) -> Iterator[Any]:
+    """Same as ``executor.map(fn, *zip(*items))``, with at most ``window`` tasks.
+
+    ``Executor.map`` submits every task up front, so finished results pile up
+    when the consumer is slower than the workers. Here a new task is only
+    submitted once a result has been consumed, results are yielded in
+    submission order, and pending tasks are cancelled if the consumer stops.
+    """
+    items = iter(items)
+    pending = deque(executor.submit(fn, *item) for item in islice(items, window))
+    try:
+        while pending:
+            yield pending.popleft().result()
+            item = next(items, None)
+            if item is not None:
+                pending.append(executor.submit(fn, *item))
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _iter_pool_entries(
+    matrix: SkillMatrix,
+    start_rows: np.ndarray,
+    target_rows: np.ndarray,
+    categories: Optional[Iterable[str]],
+    workers: int,
+    shards_per_worker: int,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    n_shards = min(len(start_rows), workers * shards_per_worker) or 1
+    shards = np.array_split(start_rows, n_shards)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(matrix.to_compact(categories),),
+    ) as executor:
+        try:
+            # At most two shards per worker are computed ahead of the consumer
+            # (e.g. the constant-memory xlsx writer), so memory stays bounded
+            for shard in _bounded_map(
+                executor,
+                _transitions_shard,
+                ((rows, target_rows) for rows in shards),
+                window=2 * workers,
+            ):
+                yield from shard
+        finally:
+            # An abandoned generation (error, cancelled job) drops pending shards
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_transitions_parallel(
+    matrix: SkillMatrix,
+    start_codes: Iterable[str],
+    target_codes: Iterable[str],
+    categories: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    shards_per_worker: int = 4,
+    progress: Optional[Callable[[float], None]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Same output as ``iter_transitions``, sharded across a process pool.
+
+    Start jobs are split into contiguous shards. Each worker receives the
+    compact CSR arrays of the referential once, at start-up, and sends back
+    integer-encoded entries that are decoded here, in job code order whatever
+    the completion order.
+
+    Args:
+        matrix: Incidence matrix of the referential.
+        start_codes: Codes of the start jobs.
+        target_codes: Codes of the target jobs.
+        categories: Categories taken into account, all if None.
+        workers: Number of processes, ``default_workers()`` if None; 1
+            computes in the calling process.
+        shards_per_worker: Shards per process, for load balancing.
+        progress: Optional callback receiving the completed fraction.
+
+    Yields:
+        pd.DataFrame: One frame per start job, as ``iter_transitions``.
+    """
+    workers = workers or default_workers()
+    start_rows = matrix.job_positions(start_codes)
+    target_rows = matrix.job_positions(target_codes)
+
+    if workers <= 1:
+        entries = _iter_transition_entries(matrix, start_rows, target_rows, categories)
+    else:
+        entries = _iter_pool_entries(
+            matrix, start_rows, target_rows, categories, workers, shards_per_worker
+        )
+
+    total = max(len(start_rows), 1)
+    for i, entry in enumerate(entries):
+        yield _transition_frame(matrix, *entry)
+        if progress:
+            progress((i + 1) / total)
@@ -1,16 +1,31 @@
-import pandas as pd
 import streamlit as st
 
+from core import data_processing, excel_reader, macro_mapping, referential_cache
 
-def safe_read_excel(uploaded_file, sheet_name, required_cols, file_label):
+
+def safe_read_excel(
+    uploaded_file,
+    sheet_name,
+    required_cols,
+    file_label,
+    extra_cols=None,
+    all_columns=False,
+    dtype=None,
+):
     """
     Open an Excel file securely and ensure that required columns exist.
 
+    Only ``required_cols`` and ``extra_cols`` are kept, read with the fastest
+    available reader backend (``excel_reader.excel_engine``).
+
     Args:
         uploaded_file (BytesIO): Streamlit‐uploaded file.
         sheet_name (str | int): Worksheet name or index to read.
         required_cols (list[str]): Column names that must be present.
         file_label (str): Human-friendly file name used in error messages.
+        extra_cols (list[str] | None): Optional columns also read when present.
+        all_columns (bool): Read every column of the sheet.
+        dtype (dict | None): Type hints, e.g. ``str`` for text columns.
 
     Returns:
         pd.DataFrame: The loaded dataframe if everything is OK.
@@ -21,8 +36,11 @@ def safe_read_excel(uploaded_file, sheet_name, required_cols, file_label):
         - The file cannot be opened.
         - Required columns are absent.
     """
+    columns = None if all_columns else list(required_cols) + list(extra_cols or [])
     try:
-        df = pd.read_excel(uploaded_file, sheet_name=sheet_name)
+        df = excel_reader.read_excel(
+            uploaded_file, sheet_name=sheet_name, columns=columns, dtype=dtype
+        )
     except ValueError:
         st.error(
             f"❌ Impossible de trouver l’onglet « {sheet_name} » dans {file_label}."
@@ -38,3 +56,72 @@ def safe_read_excel(uploaded_file, sheet_name, required_cols, file_label):
         st.stop()
 
     return df
+
+
+def cached_read_excel(
+    uploaded_file,
+    sheet_name,
+    required_cols,
+    file_label,
+    dtype=None,
+    keep_in_memory=True,
+):
+    """
+    Same as ``safe_read_excel``, served from the process-wide referential cache.
+
+    The file is parsed only the first time its content (SHA-256), sheet and
+    columns are seen; the returned frame holds only ``required_cols``, with
+    text columns stored as categories, and must not be modified in place.
+
+    Args:
+        uploaded_file (BytesIO): Streamlit‐uploaded file.
+        sheet_name (str | int): Worksheet name or index to read.
+        required_cols (list[str]): Column names that must be present.
+        file_label (str): Human-friendly file name used in error messages.
+        dtype (dict | None): Type hints, e.g. ``str`` for text columns.
+        keep_in_memory (bool): Keep the frame in the in-memory LRU (False
+            when the caller keeps its own copy of the data, see
+            ``ReferentialCache``).
+
+    Returns:
+        pd.DataFrame: The cached dataframe projected on ``required_cols``.
+    """
+    return referential_cache.get_cache().get(
+        referential_cache.file_digest(uploaded_file),
+        sheet_name,
+        required_cols,
+        lambda: safe_read_excel(
+            uploaded_file, sheet_name, required_cols, file_label, dtype=dtype
+        ),
+        keep_in_memory=keep_in_memory,
+    )
+
+
+def load_macro_mapping(uploaded_file, file_label):
+    """
+    Compiled mapping of a macro-competence file, from the process-wide cache.
+
+    The "Macro-Compétences" sheet is only parsed and compiled the first time
+    its content (SHA-256) is seen; afterwards the compiled mapping is served
+    from memory or memory-mapped from disk, without reading the Excel file.
+
+    Args:
+        uploaded_file (BytesIO): Streamlit‐uploaded macro-competence file.
+        file_label (str): Human-friendly file name used in error messages.
+
+    Returns:
+        MacroMapping: Mapping to pass to ``add_macro_competence``.
+    """
+    return macro_mapping.get_cache().get(
+        referential_cache.file_digest(uploaded_file),
+        lambda: data_processing.build_macro_mapping(
+            safe_read_excel(
+                uploaded_file=uploaded_file,
+                sheet_name="Macro-Compétences",
+                required_cols=["4 - Macro-compétence", "5 - Compétence"],
+                file_label=file_label,
+                extra_cols=["5 - Compétence (bis)"],
+                dtype=data_processing.MACRO_DTYPES,
+            )
+        ),
+    )
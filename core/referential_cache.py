@@ -0,0 +1,257 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from core import utils
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "passerelles_cache")
+DEFAULT_CACHE_TTL_HOURS = 24
+DEFAULT_CACHE_MAX_MB = 512
+
+
+def remove_entry(path: str) -> None:
+    """Delete a disk store entry (file or directory), if it still exists."""
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _entry_size(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def prune_disk_store(
+    directory: str, marker: str, max_bytes: float, ttl: float
+) -> List[str]:
+    """Delete the entries of a disk store written more than ``ttl`` seconds
+    ago, then the oldest ones until the store holds at most ``max_bytes``.
+
+    Args:
+        directory (str): Directory of the store.
+        marker (str): Part of the name of every entry (and of its temporary
+            files), so other files of ``directory`` are left alone.
+        max_bytes (float): Maximal total size of the entries.
+        ttl (float): Maximal age of an entry, in seconds.
+
+    Returns:
+        List[str]: Paths of the deleted entries.
+    """
+    entries = []
+    for name in os.listdir(directory):
+        if marker not in name:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            entries.append((os.path.getmtime(path), _entry_size(path), path))
+        except OSError:  # deleted meanwhile
+            continue
+    entries.sort()
+
+    deadline = time.time() - ttl
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for mtime, size, path in entries:
+        if mtime >= deadline and total <= max_bytes:
+            break
+        remove_entry(path)
+        total -= size
+        removed.append(path)
+    return removed
+
+
+def is_expired(path: str, ttl: float) -> bool:
+    """Whether a disk store entry was written more than ``ttl`` seconds ago."""
+    try:
+        return os.path.getmtime(path) < time.time() - ttl
+    except OSError:  # deleted meanwhile
+        return False
+
+
+def file_digest(uploaded_file) -> str:
+    """Return the SHA-256 hex digest of an uploaded file's content.
+
+    Args:
+        uploaded_file (BytesIO): Streamlit-uploaded file or any binary buffer.
+
+    Returns:
+        str: Hex digest of the whole content; the read position is preserved.
+    """
+    if hasattr(uploaded_file, "getvalue"):
+        return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    position = uploaded_file.tell()
+    uploaded_file.seek(0)
+    digest = hashlib.sha256(uploaded_file.read()).hexdigest()
+    uploaded_file.seek(position)
+    return digest
+
+
+def encode_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert text columns to the ``category`` dtype."""
+    text_cols = [c for c in df.columns if df[c].dtype == object]
+    return df.astype({c: "category" for c in text_cols})
+
+
+class ReferentialCache:
+    """
+    Process-wide cache of parsed Excel sheets, keyed by content.
+
+    Entries are keyed by the SHA-256 of the file bytes, the sheet and the
+    projected columns, kept in memory with LRU eviction, and spilled to a
+    Parquet store on disk so they survive restarts. Frames whose data is
+    owned elsewhere (the referential store keeps the matrix built from them)
+    are read with ``keep_in_memory=False``: they are only spilled, so the
+    cache never holds a second copy of what the owner has released.
+
+    The files hold client data: the store directory is private to the
+    process owner, entries are deleted once written more than ``ttl``
+    seconds ago, the oldest ones as soon as the store exceeds ``max_bytes``,
+    and an entry's file goes with it when it leaves the in-memory LRU.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 8,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[float] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir or os.getenv(
+            "PASSERELLES_CACHE_DIR", DEFAULT_CACHE_DIR
+        )
+        self.max_bytes = max_bytes or 2**20 * float(
+            os.getenv("PASSERELLES_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB)
+        )
+        self.ttl = ttl or 3600 * float(
+            os.getenv("PASSERELLES_CACHE_TTL_HOURS", DEFAULT_CACHE_TTL_HOURS)
+        )
+        self._entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(digest: str, sheet_name, columns: Sequence[str]) -> str:
+        """Build the cache key of a (file content, sheet, columns) triple."""
+        raw = "\x1f".join([digest, str(sheet_name), *columns])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _remember(self, key: str, df: pd.DataFrame) -> None:
+        self._entries[key] = df
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            dropped, _ = self._entries.popitem(last=False)
+            remove_entry(self._disk_path(dropped))
+
+    def _spill(self, key: str, df: pd.DataFrame) -> None:
+        tmp_path = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+        try:
+            utils.private_dir(self.cache_dir)
+            df.to_parquet(tmp_path, index=False)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self._disk_path(key))
+            prune_disk_store(self.cache_dir, ".parquet", self.max_bytes, self.ttl)
+        except Exception as e:  # the disk store is best effort
+            logger.warning("Referential cache spill failed: %s", e)
+            remove_entry(tmp_path)
+
+    def get(
+        self,
+        digest: str,
+        sheet_name,
+        columns: Sequence[str],
+        loader: Callable[[], pd.DataFrame],
+        keep_in_memory: bool = True,
+    ) -> pd.DataFrame:
+        """Return the cached frame, calling ``loader`` on a miss.
+
+        Args:
+            digest (str): SHA-256 of the source file (see ``file_digest``).
+            sheet_name (str | int): Worksheet name or index.
+            columns (Sequence[str]): Columns kept in the cached frame.
+            loader (Callable[[], pd.DataFrame]): Parses the sheet on a miss.
+            keep_in_memory (bool): Keep the frame in the in-memory LRU; when
+                False, only the disk store is used.
+
+        Returns:
+            pd.DataFrame: Frame projected on ``columns``, text as categories.
+            Callers must not modify it in place.
+        """
+        key = self.make_key(digest, sheet_name, columns)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        path = self._disk_path(key)
+        if os.path.exists(path) and is_expired(path, self.ttl):
+            remove_entry(path)
+        elif os.path.exists(path):
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                logger.warning("Unreadable referential cache file %s: %s", path, e)
+            else:
+                with self._lock:
+                    self.disk_hits += 1
+                    if keep_in_memory:
+                        self._remember(key, df)
+                return df
+
+        df = encode_categories(loader()[list(columns)])
+        self._spill(key, df)
+        with self._lock:
+            self.misses += 1
+            if keep_in_memory:
+                self._remember(key, df)
+        return df
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and the number of entries in memory."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Drop the in-memory entries and their files."""
+        with self._lock:
+            for key in self._entries:
+                remove_entry(self._disk_path(key))
+            self._entries.clear()
+
+
+_CACHE = ReferentialCache()
+
+
+def get_cache() -> ReferentialCache:
+    """Return the process-wide referential cache."""
+    return _CACHE
@@ -0,0 +1,155 @@
+import threading
+import weakref
+from typing import Callable, Dict, NamedTuple, Optional
+
+import pandas as pd
+
+from core import data_processing, passerelle_engine, read_file, referential_cache
+
+SESSION_KEY = "_referential_lease"
+
+
+class Referential(NamedTuple):
+    """
+    One immutable version of the ROME macro-competence referential.
+
+    Instances are shared by every Streamlit session using the same file
+    content. Only the integer-encoded ``matrix`` is kept (codes, titles and
+    macro-competences are stored once in its vocabularies); its arrays are
+    read-only.
+    """
+
+    digest: str
+    matrix: passerelle_engine.SkillMatrix
+
+
+class ReferentialStore:
+    """
+    Process-wide registry of referential versions, deduplicated by content hash.
+
+    Each version is built once, handed out to every session that uploads the
+    same bytes, reference counted, and evicted as soon as no session uses it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._referentials: Dict[str, Referential] = {}
+        self._refcounts: Dict[str, int] = {}
+        self.builds = 0
+
+    def acquire(self, digest: str, loader: Callable[[], pd.DataFrame]) -> Referential:
+        """Return the referential of a file content, building it if needed.
+
+        Every call must be balanced by a ``release`` of the same digest.
+
+        Args:
+            digest (str): SHA-256 of the source file.
+            loader (Callable[[], pd.DataFrame]): Returns the validated
+                "Macro-Compétences" frame; only called on the first acquire.
+
+        Returns:
+            Referential: The shared, read-only referential.
+        """
+        with self._lock:
+            build_lock = self._build_locks.setdefault(digest, threading.Lock())
+
+        # Concurrent sessions uploading the same file wait for a single build
+        with build_lock:
+            with self._lock:
+                referential = self._referentials.get(digest)
+                if referential is not None:
+                    self._refcounts[digest] += 1
+                    return referential
+
+            matrix = passerelle_engine.SkillMatrix.from_frame(loader())
+            matrix.freeze()
+            referential = Referential(digest, matrix)
+
+            with self._lock:
+                self._referentials[digest] = referential
+                self._refcounts[digest] = 1
+                self.builds += 1
+            return referential
+
+    def release(self, digest: str) -> None:
+        """Drop one reference, evicting the version when it was the last."""
+        with self._lock:
+            if digest not in self._refcounts:
+                return
+            self._refcounts[digest] -= 1
+            if self._refcounts[digest] <= 0:
+                del self._refcounts[digest]
+                del self._referentials[digest]
+                self._build_locks.pop(digest, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of live versions, references and builds."""
+        with self._lock:
+            return {
+                "versions": len(self._referentials),
+                "references": sum(self._refcounts.values()),
+                "builds": self.builds,
+            }
+
+
+class ReferentialLease:
+    """
+    A session's reference to a shared referential.
+
+    The reference is released explicitly with ``release`` or, at the latest,
+    when the lease is garbage collected with the session state.
+    """
+
+    def __init__(self, store: ReferentialStore, referential: Referential):
+        self.referential = referential
+        self._finalizer = weakref.finalize(self, store.release, referential.digest)
+
+    def release(self) -> None:
+        self._finalizer()
+
+
+_STORE = ReferentialStore()
+
+
+def get_store() -> ReferentialStore:
+    """Return the process-wide referential store."""
+    return _STORE
+
+
+def session_referential(session_state, uploaded_file, file_label: str) -> Referential:
+    """Return the shared referential of an uploaded skills file for a session.
+
+    The session keeps a lease on the current version in ``session_state``;
+    uploading another file releases the previous version.
+
+    Args:
+        session_state: Streamlit session state (or any mutable mapping).
+        uploaded_file (BytesIO): Uploaded "MACRO-COMPETENCES ROME.xlsx".
+        file_label (str): Human-friendly file name used in error messages.
+
+    Returns:
+        Referential: The shared, read-only referential.
+    """
+    digest = referential_cache.file_digest(uploaded_file)
+    lease: Optional[ReferentialLease] = session_state.get(SESSION_KEY)
+    if lease is not None and lease.referential.digest == digest:
+        return lease.referential
+
+    def load() -> pd.DataFrame:
+        df = read_file.cached_read_excel(
+            uploaded_file,
+            sheet_name="Macro-Compétences",
+            required_cols=data_processing.SKILLS_REQUIRED_COLS,
+            file_label=file_label,
+            dtype=data_processing.SKILLS_DTYPES,
+            # The store owns the matrix: no second copy in the file cache
+            keep_in_memory=False,
+        )
+        return data_processing.validate_skills(df)
+
+    referential = _STORE.acquire(digest, load)
+    if lease is not None:
+        lease.release()
+    session_state[SESSION_KEY] = ReferentialLease(_STORE, referential)
+    return referential
@@ -0,0 +1,134 @@
+import io
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+# Row (0-based) of the column header, below the header block
+TABLE_START_ROW = 5
+
+# Rows sampled per column to estimate its width
+WIDTH_SAMPLE_ROWS = 10_000
+
+# Excel's maximum column width, in characters
+MAX_COLUMN_WIDTH = 255
+
+# Above this many cells, workbooks are written in constant-memory mode
+CONSTANT_MEMORY_CELLS = 500_000
+
+
+class ReportSheet(NamedTuple):
+    """One sheet of a report: a title line above a table."""
+
+    name: str
+    title: str
+    df: pd.DataFrame
+
+
+def report_metadata(categories_str: str, weights: Dict[str, float]) -> List[str]:
+    """Return the subtitle lines shared by every passerelle report.
+
+    Args:
+        categories_str (str): Selected dimensions.
+        weights (Dict[str, float]): Weight (in %) of each selected category.
+
+    Returns:
+        List[str]: Dimensions, weights and export date lines.
+    """
+    weights_str = " / ".join(f"{c} = {w}%" for c, w in weights.items())
+    return [
+        f"Dimensions sélectionnées : {categories_str}",
+        f"Pondérations appliquées : {weights_str}",
+        f"Date d’export : {datetime.now().strftime('%d/%m/%Y à %Hh%M')}",
+    ]
+
+
+def column_widths(df: pd.DataFrame, sample_rows: int = WIDTH_SAMPLE_ROWS) -> List[int]:
+    """Estimate the display width of every column (header included, + 2).
+
+    Categorical columns are measured on their vocabulary, other columns on
+    ``sample_rows`` evenly spaced rows at most, so the cost does not grow
+    with the frame length. Widths are capped at ``MAX_COLUMN_WIDTH``.
+    """
+    if len(df) > sample_rows:
+        sample = df.iloc[np.linspace(0, len(df) - 1, sample_rows).astype(np.int64)]
+    else:
+        sample = df
+
+    widths = []
+    for position, col in enumerate(df.columns):
+        values = df.iloc[:, position]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            lengths = values.cat.categories.astype(str).str.len()
+        else:
+            lengths = sample.iloc[:, position].astype(str).str.len()
+        longest = int(lengths.max()) if len(lengths) else 0
+        widths.append(min(max(longest, len(str(col))) + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def write_report(
+    output,
+    sheets: Iterable[ReportSheet],
+    subtitles: Sequence[str] = (),
+    constant_memory: Optional[bool] = None,
+) -> None:
+    """Write report sheets, each with a header block above its table.
+
+    Every sheet gets its title (bold) on the first row, the ``subtitles``
+    (italic) below, and its table from row ``TABLE_START_ROW``. Rows are
+    written in order with ``write_row``, so the whole workbook is produced in
+    one pass and can use xlsxwriter's constant-memory mode, where only the
+    current row is held in memory.
+
+    Args:
+        output: File path or binary file object to write to.
+        sheets (Iterable[ReportSheet]): Sheets, written in order.
+        subtitles (Sequence[str]): Lines shared by every sheet header.
+        constant_memory (bool | None): Force or disable the constant-memory
+            mode; by default it is used above ``CONSTANT_MEMORY_CELLS``
+            cells.
+    """
+    sheets = list(sheets)
+    if constant_memory is None:
+        constant_memory = sum(sheet.df.size for sheet in sheets) > CONSTANT_MEMORY_CELLS
+
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": constant_memory})
+    title_format = workbook.add_format({"bold": True, "font_size": 14})
+    subtitle_format = workbook.add_format({"italic": True})
+    header_format = workbook.add_format({"bold": True, "border": 1})
+
+    try:
+        for sheet in sheets:
+            worksheet = workbook.add_worksheet(sheet.name[:31])
+            for i, width in enumerate(column_widths(sheet.df)):
+                worksheet.set_column(i, i, width)
+
+            worksheet.write(0, 0, sheet.title, title_format)
+            for row, subtitle in enumerate(subtitles, start=1):
+                worksheet.write(row, 0, subtitle, subtitle_format)
+
+            worksheet.write_row(
+                TABLE_START_ROW, 0, [str(c) for c in sheet.df.columns], header_format
+            )
+            values = sheet.df.astype(object)
+            values = values.where(values.notna(), None)
+            for row, record in enumerate(
+                values.itertuples(index=False, name=None), start=TABLE_START_ROW + 1
+            ):
+                worksheet.write_row(row, 0, record)
+    finally:
+        workbook.close()
+
+
+def report_bytes(
+    sheets: Iterable[ReportSheet],
+    subtitles: Sequence[str] = (),
+    constant_memory: Optional[bool] = None,
+) -> bytes:
+    """Same as ``write_report``, returning the xlsx file content."""
+    buffer = io.BytesIO()
+    write_report(buffer, sheets, subtitles, constant_memory=constant_memory)
+    return buffer.getvalue()
@@ -17,3 +17,23 @@ def require_env(var_name: str) -> str:
     if not value:
         raise OSError(f"Missing required environment variable: {var_name}")
     return value
+
+
+def private_dir(path: str) -> str:
+    """Create ``path`` and its missing parents, accessible by the owner only.
+
+    Raises:
+        PermissionError: If the directory belongs to another user (e.g. was
+            created beforehand in the shared temporary directory).
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(parent):
+        private_dir(parent)
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    if hasattr(os, "getuid") and os.stat(path).st_uid != os.getuid():
+        raise PermissionError(f"{path} belongs to another user")
+    os.chmod(path, 0o700)
+    return path
@@ -1,11 +1,27 @@
+import contextlib
+import functools
 import io
+import os
+import time
 from datetime import datetime
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from core import auth_utils, read_file
+from core import (
+    auth_utils,
+    career_paths,
+    data_processing,
+    export,
+    job_runner,
+    passerelle_engine,
+    read_file,
+    referential_cache,
+    referential_store,
+    report_writer,
+)
 
 # ------------------------------
 # 🔐 Sécurité : accès par mot de passe
@@ -13,13 +29,114 @@ from core import auth_utils, read_file
 
 auth_utils.require_auth()
 
+
+def generate_raw_passerelles(path, progress, label, matrix, client_codes, workers):
+    """Tâche de fond : passerelles entrantes puis sortantes, chacune pour moitié."""
+    shares = {"Passerelles entrantes": 0.0, "Passerelles sortantes": 0.5}
+    export.write_raw_passerelles(
+        path,
+        label,
+        matrix,
+        client_codes,
+        workers=workers,
+        progress=lambda sheet, fraction: progress(shares[sheet] + fraction / 2),
+    )
+
+
+@contextlib.contextmanager
+def timed_stage(name):
+    """Mesure la durée d'une étape de la page (affichée aux administrateurs)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = st.session_state.setdefault("_stage_timings", {})
+        timings[name] = time.perf_counter() - start
+
+
+def cached_stage(name, key, compute):
+    """Résultat d'une étape de la page, recalculé seulement si ``key`` change.
+
+    Le dernier résultat est conservé dans la session avec la clé de ses
+    dépendances (référentiel, fichier client, mode, catégories, métier de
+    départ, pondérations…) : une relance provoquée par un autre widget le
+    réutilise sans rien recalculer.
+    """
+    with timed_stage(name):
+        cached = st.session_state.get(f"_stage_{name}")
+        if cached is None or cached[0] != key:
+            cached = (key, compute())
+            st.session_state[f"_stage_{name}"] = cached
+    return cached[1]
+
+
+def show_stage_timings(names):
+    """Affiche la durée de la dernière exécution des étapes ``names``."""
+    timings = st.session_state.get("_stage_timings", {})
+    measured = [
+        f"{name} {timings[name] * 1000:.0f} ms" for name in names if name in timings
+    ]
+    if measured:
+        st.caption("⏱️ " + " · ".join(measured))
+
+
+def lazy_download_button(
+    label, prepare_label, build, export_key, file_name, key, stage
+):
+    """Bouton de téléchargement dont le fichier n'est construit qu'à la demande.
+
+    Le fichier est généré au clic sur « prepare_label », puis conservé dans la
+    session pour ``export_key`` (référentiel, fichier client, métier de départ,
+    pondérations, catégories) : les relances avec les mêmes paramètres le
+    réutilisent, les autres ne sérialisent rien.
+    """
+    prepared = st.session_state.get(f"_stage_{stage}")
+    if prepared is None or prepared[0] != export_key:
+        if not st.button(prepare_label, key=f"{key}_prepare"):
+            return
+        with st.spinner("Génération du fichier Excel..."):
+            cached_stage(stage, export_key, build)
+    st.download_button(
+        label=label,
+        data=st.session_state[f"_stage_{stage}"][1],
+        file_name=file_name,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key=key,
+    )
+
+
+def ranking_chart(pivot_df, categories):
+    """Graphique empilé des scores pondérés par catégorie (image PNG)."""
+    fig, ax = plt.subplots(figsize=(8, 6))
+
+    bottom = None
+    labels = pivot_df["Intitulé"]
+
+    # Colorer chaque barre selon la catégorie
+    for cat in categories:
+        ax.barh(labels, pivot_df[cat], left=bottom, label=cat)
+        if bottom is None:
+            bottom = pivot_df[cat].copy()
+        else:
+            bottom += pivot_df[cat]
+
+    ax.invert_yaxis()
+    ax.set_xlabel("Score pondéré")
+    ax.set_title("Top 20 métiers – scores par type de compétence")
+    ax.legend(title="Catégorie")
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
 # ------------------------------
 # TITRE & UPLOAD
 # ------------------------------
 st.title("🧭 Outil de passerelles métiers")
 
-st.markdown(
-    """
+st.markdown("""
 ---
 👋 Bienvenue dans l'outil de passerelles métiers !
 
@@ -36,8 +153,7 @@ Cet outil vous permet d'identifier les **passerelles métiers possibles** entre
 6. (Facultatif) 📦 Générez **l'intégralité des passerelles** sans aucun filtre.
 
 ---
-"""
-)
+""")
 
 st.markdown(
     "###\n**📚 1. Charger le fichier des compétences ROME (MACRO-COMPETENCES ROME.xlsx)**"
@@ -57,12 +173,6 @@ client_file = st.file_uploader(
     "Fichier client", type="xlsx", key="client", label_visibility="hidden"
 )
 
-# Initialize session state for generation tracking
-if 'generation_complete' not in st.session_state:
-    st.session_state.generation_complete = False
-if 'raw_buffer' not in st.session_state:
-    st.session_state.raw_buffer = None
-
 if skills_file and client_file:
     # ------------------------------
     # CHOIX DU MODE ET DES OPTIONS
@@ -148,43 +258,82 @@ if skills_file and client_file:
         )
         st.stop()
 
-    # Chargement unique depuis l'onglet centralisé
-    raw_skills_df = read_file.safe_read_excel(
-        skills_file,
-        sheet_name="Macro-Compétences",
-        required_cols=["Code Métier", "Intitulé", "Macro Compétence", "Catégorie"],
-        file_label="compétences ROME",
-    )
-
-    skills_df = raw_skills_df[
-        raw_skills_df["Catégorie"].isin(selected_categories)
-    ].copy()
-    skills_df = skills_df.dropna(
-        subset=["Code Métier", "Intitulé", "Macro Compétence"]
-    )  # Nettoyage
+    # Référentiel partagé entre toutes les sessions (même fichier = même version)
+    with timed_stage("référentiel"):
+        referential = referential_store.session_referential(
+            st.session_state, skills_file, file_label="compétences ROME"
+        )
+    skill_matrix = referential.matrix
 
     # Chargement des métiers client
-    client_df = read_file.safe_read_excel(
-        client_file,
-        sheet_name=0,  # first sheet
-        required_cols=["Code ROME"],
-        file_label="métiers client",
+    with timed_stage("métiers client"):
+        client_df = read_file.cached_read_excel(
+            client_file,
+            sheet_name=0,  # first sheet
+            required_cols=["Code ROME"],
+            file_label="métiers client",
+            dtype=data_processing.CLIENT_DTYPES,
+        )
+        client_codes = client_df["Code ROME"].dropna().unique()
+
+    is_admin = any(
+        role in st.session_state.get("roles", []) for role in ["Admin", "Superuser"]
     )
-    client_codes = client_df["Code ROME"].dropna().unique()
-
-    # Définir métiers de départ et d'arrivée selon le mode
-    if mode == "Passerelle entrante":
-        start_df = skills_df.copy()  # Tous les métiers (ROME + client)
-        target_df = skills_df[skills_df["Code Métier"].isin(client_codes)]
-    else:
-        start_df = skills_df[skills_df["Code Métier"].isin(client_codes)]
-        target_df = skills_df[~skills_df["Code Métier"].isin(client_codes)]
-
-    # Liste des métiers de départ disponibles
-    start_jobs = (
-        start_df[["Code Métier", "Intitulé"]].drop_duplicates().sort_values("Intitulé")
+    category_weights = {
+        "Savoir-faire": know_how_weight,
+        "Savoir-être professionnels": professional_skills_weight,
+        "Savoirs": knowledge_weight,
+    }
+    selected_weights = {c: category_weights[c] for c in selected_categories}
+
+    # Paramètres dont dépendent toutes les étapes suivantes : chaque étape
+    # n'est recalculée que si sa propre clé (ces paramètres + les siens) change
+    inputs_key = (
+        referential.digest,
+        referential_cache.file_digest(client_file),
+        mode,
+        tuple(selected_categories),
     )
 
+    def list_jobs():
+        # Définir métiers de départ et d'arrivée selon le mode
+        job_codes = skill_matrix.active_jobs(selected_categories)
+        is_client = np.isin(job_codes, np.asarray(client_codes, dtype=object))
+        if mode == "Passerelle entrante":
+            start_codes = job_codes  # Tous les métiers (ROME + client)
+            target_codes = job_codes[is_client]
+        else:
+            start_codes = job_codes[is_client]
+            target_codes = job_codes[~is_client]
+
+        # Liste des métiers de départ disponibles
+        start_jobs = pd.DataFrame(
+            {
+                "Code Métier": start_codes,
+                "Intitulé": skill_matrix.job_titles[
+                    skill_matrix.job_positions(start_codes)
+                ],
+            }
+        ).sort_values("Intitulé")
+        return target_codes, start_jobs
+
+    target_codes, start_jobs = cached_stage("métiers", inputs_key, list_jobs)
+
+    # Statistiques du cache de lecture (administrateurs)
+    if is_admin:
+        cache_stats = referential_cache.get_cache().stats()
+        st.caption(
+            f"🗄️ Cache des fichiers : {cache_stats['hits']} succès mémoire, "
+            f"{cache_stats['disk_hits']} succès disque, {cache_stats['misses']} lectures, "
+            f"{cache_stats['entries']} entrée(s) en mémoire"
+        )
+        store_stats = referential_store.get_store().stats()
+        st.caption(
+            f"🧠 Référentiels partagés : {store_stats['versions']} version(s), "
+            f"{store_stats['references']} session(s), {store_stats['builds']} construction(s)"
+        )
+        show_stage_timings(["référentiel", "métiers client", "métiers"])
+
     # Dictionnaire de correspondance lettre → secteur
     sectors = {
         "A": "Agriculture et Pêche, Espaces naturels et Espaces verts, Soins aux animaux",
@@ -203,459 +352,373 @@ if skills_file and client_file:
         "N": "Transport et Logistique",
     }
 
-    # Lettres présentes dans les métiers de départ
-    available_letters = start_df["Code Métier"].str[0].unique()
-    available_sectors = {
-        letter: sectors[letter] for letter in available_letters if letter in sectors
-    }
-
-    # Construction des options de filtre secteur
-    sector_options = ["Tous les secteurs"] + [
-        f"{letter} - {sectors[letter]}" for letter in sorted(available_sectors)
-    ]
-
-    # Initialisation du filtre secteur en session_state
-    if "selected_sector" not in st.session_state:
-        st.session_state["selected_sector"] = "Tous les secteurs"
-
-    # Menu déroulant secteur
-    st.markdown("###\n**🗂️ 6. Secteur d'activité**")
-    selected_sector = st.selectbox(
-        "Secteur d'activité",
-        options=sector_options,
-        index=sector_options.index(st.session_state["selected_sector"]),
-        key="selected_sector",
-        label_visibility="hidden",
-    )
-
-    # Filtrage des métiers de départ si un secteur est sélectionné
-    if selected_sector == "Tous les secteurs":
-        filtered_jobs = start_jobs.copy()
-    else:
-        selected_letter = selected_sector.split(" - ")[0]
-        filtered_jobs = start_jobs[
-            start_jobs["Code Métier"].str.startswith(selected_letter)
+    # ------------------------------
+    # MÉTIER DE DÉPART ET RÉSULTATS
+    # ------------------------------
+    # Fragment : changer de secteur ou de métier ne relance que ce bloc
+    # (classement, graphique, exports, parcours), pas la lecture des fichiers.
+    @st.fragment
+    def start_job_panel():
+        # Lettres présentes dans les métiers de départ
+        available_letters = start_jobs["Code Métier"].str[0].unique()
+        available_sectors = {
+            letter: sectors[letter] for letter in available_letters if letter in sectors
+        }
+
+        # Construction des options de filtre secteur
+        sector_options = ["Tous les secteurs"] + [
+            f"{letter} - {sectors[letter]}" for letter in sorted(available_sectors)
         ]
 
-    # Liste des métiers de départ disponibles
-    st.markdown("###\n**👤 7. Métier de départ**")
-    filtered_jobs["Display"] = (
-        filtered_jobs["Code Métier"] + " - " + filtered_jobs["Intitulé"]
-    )
-    display_choice = st.selectbox(
-        " Métier de départ",
-        options=filtered_jobs["Display"].tolist(),
-        label_visibility="hidden",
-    )
-    selected_code = filtered_jobs[filtered_jobs["Display"] == display_choice][
-        "Code Métier"
-    ].values[0]
-    selected_job = filtered_jobs[filtered_jobs["Code Métier"] == selected_code][
-        "Intitulé"
-    ].values[0]
-
-    # Code métier sélectionné
-    selected_code = start_jobs[start_jobs["Intitulé"] == selected_job][
-        "Code Métier"
-    ].values[0]
-
-    # Macro-compétences du métier sélectionné
-    selected_skills = set(
-        start_df[start_df["Code Métier"] == selected_code]["Macro Compétence"].dropna()
-    )
+        # Initialisation du filtre secteur en session_state
+        if "selected_sector" not in st.session_state:
+            st.session_state["selected_sector"] = "Tous les secteurs"
+
+        # Menu déroulant secteur
+        st.markdown("###\n**🗂️ 6. Secteur d'activité**")
+        selected_sector = st.selectbox(
+            "Secteur d'activité",
+            options=sector_options,
+            index=sector_options.index(st.session_state["selected_sector"]),
+            key="selected_sector",
+            label_visibility="hidden",
+        )
 
-    # Calcul des similarités avec les métiers d'arrivée
-    result_rows = []
-    start_letter = selected_code[0]
-
-    for job_code, group in target_df.groupby("Code Métier"):
-        if job_code == selected_code:
-            continue  # On saute si c'est le même métier
-        title = group["Intitulé"].iloc[0]
-        job_skills = set(group["Macro Compétence"].dropna())
-        intersection = selected_skills & job_skills
-        score = len(intersection)
-        if score > 0:
-            for skill in intersection:
-                # On récupère la catégorie depuis le target_df
-                category = group[group["Macro Compétence"] == skill]["Catégorie"].iloc[
-                    0
+        # Filtrage des métiers de départ si un secteur est sélectionné
+        if selected_sector == "Tous les secteurs":
+            filtered_jobs = start_jobs.copy()
+        else:
+            selected_letter = selected_sector.split(" - ")[0]
+            filtered_jobs = start_jobs[
+                start_jobs["Code Métier"].str.startswith(selected_letter)
+            ]
+
+        # Liste des métiers de départ disponibles
+        st.markdown("###\n**👤 7. Métier de départ**")
+        filtered_jobs["Display"] = (
+            filtered_jobs["Code Métier"].astype(str)
+            + " - "
+            + filtered_jobs["Intitulé"].astype(str)
+        )
+        display_choice = st.selectbox(
+            " Métier de départ",
+            options=filtered_jobs["Display"].tolist(),
+            label_visibility="hidden",
+        )
+        selected_code = filtered_jobs[filtered_jobs["Display"] == display_choice][
+            "Code Métier"
+        ].values[0]
+        selected_job = filtered_jobs[filtered_jobs["Code Métier"] == selected_code][
+            "Intitulé"
+        ].values[0]
+
+        # Code métier sélectionné
+        selected_code = start_jobs[start_jobs["Intitulé"] == selected_job][
+            "Code Métier"
+        ].values[0]
+
+        # Calcul des similarités avec les métiers d'arrivée (moteur matriciel).
+        # Les compétences partagées sont mises en cache par métier de départ : un
+        # changement de pondération ne coûte qu'un produit scalaire et un tri.
+        scoring_args = dict(
+            start_code=selected_code,
+            start_skill_ids=skill_matrix.job_skill_ids(
+                selected_code, selected_categories
+            ),
+            target_codes=target_codes,
+            weights=category_weights,
+            categories=selected_categories,
+        )
+        ranking_key = inputs_key + (selected_code, tuple(selected_weights.items()))
+        # Sélection des 20 meilleurs métiers (sans matérialiser toutes les lignes)
+        top = cached_stage(
+            "classement",
+            ranking_key,
+            lambda: data_processing.top_k_passerelles(
+                skill_matrix, k=20, **scoring_args
+            ),
+        )
+
+        if not top.empty:
+            # Affichage top 20 pour l'écran
+            top_jobs = top.ranking[
+                [
+                    "Code Métier",
+                    "Intitulé",
+                    "Score pondéré total",
+                    "Nombre de compétences partagées",
                 ]
-                # Appliquer le poids en fonction de la catégorie
-                if category == "Savoir-faire":
-                    weight = know_how_weight
-                elif category == "Savoir-être professionnels":
-                    weight = professional_skills_weight
-                elif category == "Savoirs":
-                    weight = knowledge_weight
-                else:
-                    weight = 0  # sécurité
-
-                bonus = 1.25 if job_code.startswith(start_letter) else 1
-                weighted_score_final = (score * weight / 100) * bonus
-
-                result_rows.append(
-                    {
-                        "Code Métier": job_code,
-                        "Intitulé": title,
-                        "Nb de passerelles communes": score,
-                        "Score pondéré": score * weight / 100,
-                        "Catégorie": category,
-                        "Compétence commune": skill,
-                    }
+            ]
+            st.markdown("###\n### 🌟 Top 20 des passerelles proposées :")
+            st.dataframe(top_jobs, hide_index=True)
+
+            # Filtres et formats Excel
+            categories_str = ", ".join(selected_categories)
+
+            def report_metadata():
+                # En-tête commun : dimensions, pondérations appliquées et date
+                return report_writer.report_metadata(categories_str, selected_weights)
+
+            def export_top20_filtered_passerelles(top_df, full_df):
+                title = f"Métier de départ : {selected_job}"
+                return report_writer.report_bytes(
+                    [
+                        report_writer.ReportSheet("Top 20 métiers", title, top_df),
+                        # Lignes détaillées des seuls métiers du Top 20
+                        report_writer.ReportSheet("Passerelles Top 20", title, full_df),
+                    ],
+                    report_metadata(),
                 )
 
-    if result_rows:
-        full_results_df = pd.DataFrame(result_rows)
-
-        # Affichage top 20 pour l'écran
-        top_jobs = (
-            full_results_df.groupby(["Code Métier", "Intitulé"])
-            .agg({"Score pondéré": "sum", "Compétence commune": "count"})
-            .reset_index()
-            .rename(
-                columns={
-                    "Score pondéré": "Score pondéré total",
-                    "Compétence commune": "Nombre de compétences partagées",
-                }
+            # 📥 Bouton de téléchargement (fichier construit à la demande)
+            lazy_download_button(
+                label="📁 Télécharger Top 20 & passerelles associées",
+                prepare_label="⚙️ Préparer le fichier Top 20 & passerelles associées",
+                build=lambda: export_top20_filtered_passerelles(
+                    top_jobs, top.details()
+                ),
+                export_key=ranking_key,
+                file_name="top20_et_passerelles.xlsx",
+                key="dl_top20",
+                stage="export Top 20",
             )
-            .sort_values("Score pondéré total", ascending=False)
-            .head(20)
-        )
-        st.markdown("###\n### 🌟 Top 20 des passerelles proposées :")
-        st.dataframe(top_jobs, hide_index=True)
-
-        def export_top20_filtered_passerelles(top_df, full_df):
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                workbook = writer.book
-                title_format = workbook.add_format({"bold": True, "font_size": 14})
-                subtitle_format = workbook.add_format({"italic": True})
-
-                # Sheet 1: Top 20 métiers
-                sheet1 = "Top 20 métiers"
-                writer.sheets[sheet1] = workbook.add_worksheet(sheet1)
-                worksheet1 = writer.sheets[sheet1]
-
-                worksheet1.write(
-                    "A1", f"Métier de départ : {selected_job}", title_format
-                )
-                worksheet1.write(
-                    "A2",
-                    f"Dimensions sélectionnées : {categories_str}",
-                    subtitle_format,
-                )
 
-                weight_list = []
-                if with_know_how:
-                    weight_list.append(f"Savoir-faire = {know_how_weight}%")
-                if with_professional_skills:
-                    weight_list.append(
-                        f"Savoir-être professionnels = {professional_skills_weight}%"
-                    )
-                if with_knowledge:
-                    weight_list.append(f"Savoirs = {knowledge_weight}%")
+            # Graphique empilé des scores pondérés par catégorie
+            st.markdown("### 📊 Répartition des scores pondérés par type de compétence")
+            st.image(
+                cached_stage(
+                    "graphique",
+                    ranking_key,
+                    lambda: ranking_chart(top.ranking, selected_categories),
+                )
+            )
 
-                worksheet1.write(
-                    "A3",
-                    "Pondérations appliquées : " + " / ".join(weight_list),
-                    subtitle_format,
+            def export_filtered_passerelles():
+                # Toutes les passerelles, triées par score pondéré total décroissant
+                full_results_df = passerelle_engine.score_passerelles(
+                    skill_matrix, **scoring_args
                 )
-                worksheet1.write(
-                    "A4",
-                    "Date d'export : " + datetime.now().strftime("%d/%m/%Y à %Hh%M"),
-                    subtitle_format,
+                filtered_df = data_processing.passerelle_details(full_results_df)
+                return report_writer.report_bytes(
+                    [
+                        report_writer.ReportSheet(
+                            "Passerelles filtrées",
+                            f"Métier de départ : {selected_job}",
+                            filtered_df,
+                        )
+                    ],
+                    report_metadata(),
                 )
 
-                top_df.to_excel(writer, sheet_name=sheet1, startrow=5, index=False)
-                for i, col in enumerate(top_df.columns):
-                    max_len = max(top_df[col].astype(str).map(len).max(), len(col)) + 2
-                    worksheet1.set_column(i, i, max_len)
+            # ⬇️ Bouton 1 : Télécharger uniquement les passerelles filtrées (score > 3)
+            lazy_download_button(
+                label="📥 Télécharger les passerelles",
+                prepare_label="⚙️ Préparer le fichier des passerelles",
+                build=export_filtered_passerelles,
+                export_key=ranking_key,
+                file_name="passerelles_filtrees.xlsx",
+                key="dl_filtered",
+                stage="export passerelles",
+            )
+        else:
+            st.warning("Aucune compétence partagée trouvée avec les métiers cibles.")
 
-                # Sheet 2: Passerelles pour Top 20
-                sheet2 = "Passerelles Top 20"
-                writer.sheets[sheet2] = workbook.add_worksheet(sheet2)
-                worksheet2 = writer.sheets[sheet2]
+        career_paths_panel(selected_code, selected_job)
 
-                worksheet2.write(
-                    "A1", f"Métier de départ : {selected_job}", title_format
-                )
-                worksheet2.write(
-                    "A2",
-                    f"Dimensions sélectionnées : {categories_str}",
-                    subtitle_format,
+        if is_admin:
+            show_stage_timings(
+                ["classement", "graphique", "export Top 20", "export passerelles"]
+            )
+
+    # ------------------------------
+    # PARCOURS EN PLUSIEURS ÉTAPES
+    # ------------------------------
+    # Fragment imbriqué : ses réglages ne relancent que la recherche de parcours
+    @st.fragment
+    def career_paths_panel(selected_code, selected_job):
+        with st.expander("🧭 Parcours de reconversion en plusieurs étapes"):
+            st.caption(
+                f"Parcours depuis {selected_code} - {selected_job} vers les métiers "
+                "d'arrivée, via des métiers intermédiaires du référentiel. Un "
+                "parcours est classé selon son étape la plus faible."
+            )
+            col_p1, col_p2, col_p3 = st.columns(3)
+            with col_p1:
+                path_depth = st.number_input(
+                    "🪜 Nombre maximal d'étapes", min_value=1, max_value=4, value=3
                 )
-                worksheet2.write(
-                    "A3",
-                    "Pondérations appliquées : " + " / ".join(weight_list),
-                    subtitle_format,
+            with col_p2:
+                path_min_score = st.number_input(
+                    "📉 Score minimal par étape", min_value=0.0, value=0.0, step=5.0
                 )
-                worksheet2.write(
-                    "A4",
-                    "Date d'export : " + datetime.now().strftime("%d/%m/%Y à %Hh%M"),
-                    subtitle_format,
+            with col_p3:
+                path_k = st.number_input(
+                    "🔢 Nombre de parcours", min_value=1, max_value=50, value=10
                 )
 
-                top_codes = top_df["Code Métier"].unique()
-                top_filtered_df = filtered_df[
-                    filtered_df["Code Métier"].isin(top_codes)
-                ]
-
-                top_filtered_df.to_excel(
-                    writer, sheet_name=sheet2, startrow=5, index=False
+            # Résultats mémoïsés sur la matrice (graphe et requêtes)
+            with timed_stage("parcours"):
+                paths_df = career_paths.find_career_paths(
+                    skill_matrix,
+                    selected_code,
+                    target_codes,
+                    weights=selected_weights,
+                    categories=selected_categories,
+                    max_depth=int(path_depth),
+                    min_edge_score=float(path_min_score),
+                    k=int(path_k),
                 )
-                for i, col in enumerate(top_filtered_df.columns):
-                    max_len = (
-                        max(top_filtered_df[col].astype(str).map(len).max(), len(col))
-                        + 2
-                    )
-                    worksheet2.set_column(i, i, max_len)
-
-            return buffer.getvalue()
-
-        # Filtres et formats Excel
-        filtered_df = full_results_df.copy()
-        categories_str = ", ".join(selected_categories)
-
-        # Ajouter le score pondéré total dans filtered_df
-        scores_df = (
-            filtered_df.groupby(["Code Métier", "Intitulé"])["Score pondéré"]
-            .sum()
-            .reset_index()
-            .rename(columns={"Score pondéré": "Score pondéré total"})
-        )
-
-        # Merge avec le fichier filtré ligne par ligne
-        filtered_df = filtered_df.merge(
-            scores_df, on=["Code Métier", "Intitulé"], how="left"
-        )
-
-        # Réorganiser les colonnes et supprimer "Score pondéré"
-        column_order = [
-            "Code Métier",
-            "Intitulé",
-            "Score pondéré total",
-            "Nb de passerelles communes",
-            "Catégorie",
-            "Compétence commune",
-        ]
-        filtered_df = filtered_df[column_order]
-
-        # Trier par Score pondéré total décroissant
-        filtered_df = filtered_df.sort_values(
-            by=["Score pondéré total", "Code Métier", "Intitulé"],
-            ascending=[False, True, True],
-        )
-
-        # 📥 Bouton de téléchargement
-        st.download_button(
-            label="📁 Télécharger Top 20 & passerelles associées",
-            data=export_top20_filtered_passerelles(top_jobs, filtered_df),
-            file_name="top20_et_passerelles.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            key="dl_top20",
-        )
-        # Créer un tableau croisé avec Score pondéré par catégorie
-        pivot_df = full_results_df.pivot_table(
-            index=["Code Métier", "Intitulé"],
-            columns="Catégorie",
-            values="Score pondéré",
-            aggfunc="sum",
-            fill_value=0,
-        ).reset_index()
-
-        # Recalcul du score total pour tri
-        pivot_df["Score total"] = pivot_df[selected_categories].sum(axis=1)
-        pivot_df = pivot_df.sort_values("Score total", ascending=False).head(20)
-
-        # Graphique empilé
-        st.markdown("### 📊 Répartition des scores pondérés par type de compétence")
-        fig, ax = plt.subplots(figsize=(8, 6))
-
-        bottom = None
-        labels = pivot_df["Intitulé"]
-
-        # Colorer chaque barre selon la catégorie
-        for cat in selected_categories:
-            ax.barh(labels, pivot_df[cat], left=bottom, label=cat)
-            if bottom is None:
-                bottom = pivot_df[cat].copy()
+            if paths_df.empty:
+                st.warning("Aucun parcours trouvé avec ces paramètres.")
             else:
-                bottom += pivot_df[cat]
-
-        ax.invert_yaxis()
-        ax.set_xlabel("Score pondéré")
-        ax.set_title("Top 20 métiers – scores par type de compétence")
-        ax.legend(title="Catégorie")
+                st.dataframe(paths_df, hide_index=True)
+            if is_admin:
+                show_stage_timings(["parcours"])
 
-        st.pyplot(fig)
+    start_job_panel()
 
-        def export_excel(df, sheet_title, filename):
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                workbook = writer.book
-                worksheet = workbook.add_worksheet(sheet_title)
-                writer.sheets[sheet_title] = worksheet
-
-                title_format = workbook.add_format({"bold": True, "font_size": 14})
-                subtitle_format = workbook.add_format({"italic": True})
-
-                # Écriture du titre et des dimensions choisies
-                worksheet.write(
-                    "A1", f"Métier de départ : {selected_job}", title_format
-                )
-                worksheet.write(
-                    "A2",
-                    f"Dimensions sélectionnées : {categories_str}",
-                    subtitle_format,
-                )
-                # Définir les pondérations appliquées (selon sélection)
-                weight_list = []
-                if with_know_how:
-                    weight_list.append(f"Savoir-faire = {know_how_weight}%")
-                if with_professional_skills:
-                    weight_list.append(
-                        f"Savoir-être professionnels = {professional_skills_weight}%"
-                    )
-                if with_knowledge:
-                    weight_list.append(f"Savoirs = {knowledge_weight}%")
+    # ------------------------------
+    # PASSERELLES BRUTES (TÂCHES DE FOND)
+    # ------------------------------
+    @st.fragment
+    def raw_generation_panel():
+        with st.expander("📦 Télécharger toutes les passerelles (brutes)"):
+            raw_workers = st.number_input(
+                "⚙️ Nombre de processus de calcul",
+                min_value=1,
+                max_value=os.cpu_count() or 1,
+                value=min(passerelle_engine.default_workers(), os.cpu_count() or 1),
+                step=1,
+            )
+            raw_format = st.selectbox(
+                "📄 Format du fichier",
+                options=list(export.STREAM_FORMATS),
+            )
+            generate_button = st.button(
+                "➡️ Générer toutes les passerelles sans aucun filtre"
+            )
 
-                weight_str = " / ".join(weight_list)
-                worksheet.write(
-                    "A3", f"Pondérations appliquées : {weight_str}", subtitle_format
+            # La génération tourne en tâche de fond : on peut quitter la page
+            # et revenir télécharger le fichier plus tard.
+            runner = job_runner.get_runner()
+            owner = st.session_state.get("username") or "anonyme"
+
+            if generate_button:
+                _, extension, _ = export.STREAM_FORMATS[raw_format]
+                runner.submit(
+                    owner,
+                    f"Passerelles brutes ({raw_format}) – "
+                    f"{datetime.now().strftime('%d/%m/%Y %Hh%M')}",
+                    extension,
+                    functools.partial(
+                        generate_raw_passerelles,
+                        label=raw_format,
+                        matrix=skill_matrix,
+                        client_codes=list(client_codes),
+                        workers=raw_workers,
+                    ),
                 )
 
-                export_date = datetime.now().strftime("%d/%m/%Y à %Hh%M")
-                worksheet.write("A4", f"Date d'export : {export_date}", subtitle_format)
-
-                # Export des données à partir de la ligne 6 (index 5)
-                df.to_excel(writer, index=False, startrow=5, sheet_name=sheet_title)
-
-                # Ajustement automatique de la largeur des colonnes
-                for i, col in enumerate(df.columns):
-                    column_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                    worksheet.set_column(i, i, column_len)
-
-            return buffer.getvalue()
-
-        # ⬇️ Bouton 1 : Télécharger uniquement les passerelles filtrées (score > 3)
-        st.download_button(
-            label="📥 Télécharger les passerelles",
-            data=export_excel(
-                filtered_df, "Passerelles filtrées", "passerelles_filtrees.xlsx"
-            ),
-            file_name="passerelles_filtrees.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            key="dl_filtered",
-        )
+            has_active_jobs = any(job.active for job in runner.jobs(owner))
+
+            @st.fragment(run_every=2 if has_active_jobs else None)
+            def raw_jobs_panel():
+                jobs = runner.jobs(owner)
+                if not jobs:
+                    return
+                st.markdown("###\n**🗂️ Mes générations**")
+                for job in jobs:
+                    col_label, col_action = st.columns([3, 1])
+                    with col_label:
+                        st.markdown(f"**{job.label}** — {job.status}")
+                        if job.active:
+                            st.progress(job.progress)
+                        elif job.error:
+                            st.error(f"Erreur lors de la génération: {job.error}")
+                    with col_action:
+                        if job.active:
+                            if st.button("⛔ Annuler", key=f"cancel_{job.id}"):
+                                runner.cancel(job.id)
+                                st.rerun(scope="fragment")
+                        elif job.status == job_runner.DONE:
+                            extension, mime = next(
+                                (ext, m)
+                                for _, ext, m in export.STREAM_FORMATS.values()
+                                if job.path.endswith(f".{ext}")
+                            )
+                            with open(job.path, "rb") as raw_file:
+                                st.download_button(
+                                    label="📥 Télécharger",
+                                    data=raw_file,
+                                    file_name=f"passerelles_brutes.{extension}",
+                                    mime=mime,
+                                    key=f"dl_{job.id}",
+                                )
+                        else:
+                            if st.button("🗑️ Retirer", key=f"remove_{job.id}"):
+                                runner.remove(job.id)
+                                st.rerun(scope="fragment")
+                # Fin des tâches : relance complète pour arrêter le rafraîchissement
+                if has_active_jobs and not any(job.active for job in jobs):
+                    st.rerun()
 
-        with st.expander("📦 Télécharger toutes les passerelles (brutes)"):
-            generate_button = st.button("➡️ Générer toutes les passerelles sans aucun filtre")
+            raw_jobs_panel()
 
-            if generate_button or st.session_state.get('generation_complete', False):
-                st.markdown("###\n### ⏳ Génération des passerelles brutes...")
+    raw_generation_panel()
 
-                try:
-                    # Rechargement brut
-                    raw_df = pd.read_excel(skills_file, sheet_name="Macro-Compétences")
-                    raw_df = raw_df.dropna(
-                        subset=["Code Métier", "Intitulé", "Macro Compétence"]
+    # ------------------------------
+    # RAPPORT POUR TOUS LES MÉTIERS CLIENT
+    # ------------------------------
+    @st.fragment
+    def batch_report_panel():
+        with st.expander("📑 Rapport de passerelles pour tous les métiers client"):
+            st.caption(
+                "Top des passerelles de chaque métier client, selon le mode, les "
+                "catégories et les pondérations choisis (bonus de 25% pour les "
+                "métiers du même secteur)."
+            )
+            batch_k = st.number_input(
+                "🔢 Nombre de passerelles par métier client",
+                min_value=1,
+                max_value=200,
+                value=20,
+                step=5,
+            )
+            batch_format = st.selectbox(
+                "📄 Format du rapport",
+                options=list(export.BATCH_FORMATS),
+            )
+            if st.button("➡️ Générer le rapport"):
+                with timed_stage("rapport"):
+                    report_df = passerelle_engine.batch_rank_passerelles(
+                        skill_matrix,
+                        client_codes,
+                        weights=selected_weights,
+                        incoming=mode == "Passerelle entrante",
+                        k=batch_k,
+                        categories=selected_categories,
                     )
-
-                    client_jobs_df = pd.read_excel(client_file)
-                    raw_client_codes = client_jobs_df["Code ROME"].dropna().unique()
-
-                    client_jobs_df = raw_df[raw_df["Code Métier"].isin(raw_client_codes)]
-                    non_client_jobs_df = raw_df[
-                        ~raw_df["Code Métier"].isin(raw_client_codes)
-                    ]
-
-                    # Fonction de calcul avec barre de progression
-                    def calculate_transitions(start_jobs, target_jobs, progress_bar=None):
-                        rows = []
-                        total = len(start_jobs["Code Métier"].unique())
-                        for i, (start_code, start_group) in enumerate(
-                            start_jobs.groupby("Code Métier")
-                        ):
-                            start_title = start_group["Intitulé"].iloc[0]
-                            start_skills = set(start_group["Macro Compétence"].dropna())
-                            for target_code, target_group in target_jobs.groupby(
-                                "Code Métier"
-                            ):
-                                target_title = target_group["Intitulé"].iloc[0]
-                                target_skills = set(
-                                    target_group["Macro Compétence"].dropna()
-                                )
-                                intersection = start_skills & target_skills
-                                if intersection:
-                                    for skill in intersection:
-                                        if skill in target_group["Macro Compétence"].values:
-                                            cat = target_group[
-                                                target_group["Macro Compétence"] == skill
-                                            ]["Catégorie"].iloc[0]
-                                        else:
-                                            cat = start_group[
-                                                start_group["Macro Compétence"] == skill
-                                            ]["Catégorie"].iloc[0]
-
-                                        rows.append(
-                                            {
-                                                "Code Métier Départ": start_code,
-                                                "Intitulé Départ": start_title,
-                                                "Code Métier Arrivée": target_code,
-                                                "Intitulé Arrivée": target_title,
-                                                "Nombre de compétences partagées": len(
-                                                    intersection
-                                                ),
-                                                "Catégorie": cat,
-                                                "Compétence commune": skill,
-                                            }
-                                        )
-
-                            if progress_bar:
-                                progress_bar.progress((i + 1) / total)
-                        return pd.DataFrame(rows)
-
-                    # Calcul des passerelles avec barres de progression
-                    st.markdown("🔄 Calcul des passerelles entrantes...")
-                    bar1 = st.progress(0)
-                    incoming_df = calculate_transitions(
-                        non_client_jobs_df, client_jobs_df, progress_bar=bar1
+                if report_df.empty:
+                    st.warning("Aucune passerelle trouvée pour les métiers client.")
+                else:
+                    builder, extension, mime = export.BATCH_FORMATS[batch_format]
+                    st.success(
+                        f"✅ {report_df['Code Métier client'].nunique()} métier(s) client, "
+                        f"{len(report_df)} passerelle(s)"
                     )
-
-                    st.markdown("🔄 Calcul des passerelles sortantes...")
-                    bar2 = st.progress(0)
-                    outgoing_df = calculate_transitions(
-                        client_jobs_df, non_client_jobs_df, progress_bar=bar2
+                    st.download_button(
+                        label="📥 Télécharger le rapport",
+                        data=builder(
+                            report_df,
+                            mode,
+                            ", ".join(selected_categories),
+                            selected_weights,
+                        ),
+                        file_name=f"rapport_passerelles.{extension}",
+                        mime=mime,
+                        key="dl_batch",
                     )
+                if is_admin:
+                    show_stage_timings(["rapport"])
 
-                    # Export Excel
-                    raw_buffer = io.BytesIO()
-                    with pd.ExcelWriter(raw_buffer, engine="xlsxwriter") as writer:
-                        incoming_df.to_excel(
-                            writer, index=False, sheet_name="Passerelles entrantes"
-                        )
-                        outgoing_df.to_excel(
-                            writer, index=False, sheet_name="Passerelles sortantes"
-                        )
-
-                    st.session_state.raw_buffer = raw_buffer.getvalue()
-                    st.session_state.generation_complete = True
-                    st.success("✅ Calcul terminé ! Prêt à télécharger")
-
-                except Exception as e:
-                    st.error(f"Erreur lors de la génération: {str(e)}")
-                    st.session_state.generation_complete = False
-
-            # Download button - at same level as generate button
-            if st.session_state.get('generation_complete', False) and st.session_state.get('raw_buffer'):
-                st.download_button(
-                    label="📥 Télécharger le fichier complet des passerelles",
-                    data=st.session_state.raw_buffer,
-                    file_name="passerelles_brutes.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="dl_raw",
-                )
-
-    else:
-        st.warning("Aucune compétence partagée trouvée avec les métiers cibles.")
\ No newline at end of file
+    batch_report_panel()
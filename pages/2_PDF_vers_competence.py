@@ -3,7 +3,13 @@ import io
 import pandas as pd
 import streamlit as st
 
-from core import auth_utils, data_processing, job_pdf_to_excel, read_file
+from core import (
+    auth_utils,
+    data_processing,
+    fuzzy_matcher,
+    job_pdf_to_excel,
+    read_file,
+)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 🔐 Sécurité
@@ -23,12 +29,27 @@ uploaded_file = st.file_uploader(
 )
 
 macro_file = None
+fuzzy_threshold = None
 if use_macro:
     macro_file = st.file_uploader(
         "📊 Charger l’Excel de correspondance macro-compétences",
         type=["xlsx", "xls"],
     )
 
+    if st.checkbox("🔎 Rapprocher les compétences sans correspondance exacte"):
+        st.caption(
+            "Les compétences absentes du fichier de macro-compétences reçoivent la "
+            "macro-compétence du libellé le plus proche, avec le score de similarité "
+            "et le libellé retenu en colonnes supplémentaires."
+        )
+        fuzzy_threshold = st.slider(
+            "Similarité minimale",
+            min_value=0.1,
+            max_value=1.0,
+            value=fuzzy_matcher.DEFAULT_THRESHOLD,
+            step=0.05,
+        )
+
 # ──────────────────────────────────────────────────────────────────────────────
 # ▶️ Action
 # ──────────────────────────────────────────────────────────────────────────────
@@ -45,20 +66,19 @@ if st.button("🚀 Lancer l'extraction"):
             # 1) PDF ➜ DataFrame
             df_job = job_pdf_to_excel.job_pdf_to_excel(uploaded_file)
 
-            df_job = df_job[df_job["Enjeu compétences"] != "Certifications et habilitations"]
+            df_job = df_job[
+                df_job["Enjeu compétences"] != "Certifications et habilitations"
+            ]
 
             # 2) Option macro ➜ même algo que l’exemple fourni
             if use_macro:
-                df_macro = read_file.safe_read_excel(
-                    uploaded_file=macro_file,
-                    sheet_name="Macro-Compétences",
-                    required_cols=["4 - Macro-compétence", "5 - Compétence"],
-                    file_label="Excel macro-compétences",
+                # Correspondance compilée une fois par contenu de fichier
+                mapping = read_file.load_macro_mapping(
+                    macro_file, file_label="Excel macro-compétences"
                 )
 
                 df_joined = data_processing.add_macro_competence(
-                    df_job,
-                    df_macro
+                    df_job, mapping=mapping, fuzzy_threshold=fuzzy_threshold
                 )
                 df_output = df_joined
                 sheet_name = "Résultat"
@@ -3,7 +3,7 @@ import io
 import pandas as pd
 import streamlit as st
 
-from core import auth_utils, data_processing, read_file
+from core import auth_utils, data_processing, fuzzy_matcher, read_file
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 🔐 Sécurité
@@ -15,8 +15,7 @@ auth_utils.require_roles(["Utilisateur", "Admin", "Superuser"])
 # ──────────────────────────────────────────────────────────────────────────────
 st.title("🔗 Fusion compétences ↔ macro-compétences")
 
-st.markdown(
-    """
+st.markdown("""
 ---
 Cette page vous permet de **joindre** un fichier Excel de compétences et un
 fichier Excel de macro-compétences pour obtenir, en sortie, le fichier
@@ -27,14 +26,30 @@ fichier Excel de macro-compétences pour obtenir, en sortie, le fichier
 2. Charger le fichier **Macro-compétences** (Avec un colonne `5 - Compétence` et `4 - Macro-compétence`)
 3. Cliquer sur **🚀 Lancer la fusion**
 ---
-"""
-)
+""")
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 📥 Uploads
 # ──────────────────────────────────────────────────────────────────────────────
 skills_file = st.file_uploader("📄 Fichier Excel compétences", type=["xlsx", "xls"])
-macro_file = st.file_uploader("📊 Fichier Excel macro-compétences", type=["xlsx", "xls"])
+macro_file = st.file_uploader(
+    "📊 Fichier Excel macro-compétences", type=["xlsx", "xls"]
+)
+
+fuzzy_threshold = None
+if st.checkbox("🔎 Rapprocher les compétences sans correspondance exacte"):
+    st.caption(
+        "Les compétences absentes du fichier de macro-compétences reçoivent la "
+        "macro-compétence du libellé le plus proche, avec le score de similarité "
+        "et le libellé retenu en colonnes supplémentaires."
+    )
+    fuzzy_threshold = st.slider(
+        "Similarité minimale",
+        min_value=0.1,
+        max_value=1.0,
+        value=fuzzy_matcher.DEFAULT_THRESHOLD,
+        step=0.05,
+    )
 
 
 if st.button("🚀 Lancer la fusion"):
@@ -50,16 +65,15 @@ if st.button("🚀 Lancer la fusion"):
                 sheet_name=0,
                 required_cols=["Compétences"],
                 file_label="Excel compétences",
+                # Le fichier fusionné reprend toutes les colonnes d'origine
+                all_columns=True,
             )
-            df_macro = read_file.safe_read_excel(
-                uploaded_file=macro_file,
-                sheet_name="Macro-Compétences",
-                required_cols=["4 - Macro-compétence", "5 - Compétence"],
-                file_label="Excel macro-compétences",
+            # Correspondance compilée une fois par contenu de fichier
+            mapping = read_file.load_macro_mapping(
+                macro_file, file_label="Excel macro-compétences"
             )
             df_skill_macro = data_processing.add_macro_competence(
-                df_skills,
-                df_macro
+                df_skills, mapping=mapping, fuzzy_threshold=fuzzy_threshold
             )
 
             buffer = io.BytesIO()
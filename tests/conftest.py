@@ -0,0 +1,11 @@
+import pytest
+
+from benchmarks import synthetic
+
+
+@pytest.fixture
+def skills_df():
+    """Small synthetic "Macro-Compétences" sheet."""
+    return synthetic.make_skills_frame(
+        n_jobs=60, n_skills=200, skills_per_job=12, seed=1
+    )
@@ -0,0 +1,31 @@
+from core import career_paths, passerelle_engine
+
+
+def test_get_graph_keeps_one_graph_per_matrix(skills_df):
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    graph = career_paths.get_graph(matrix)
+    assert career_paths.get_graph(matrix) is graph
+
+    other = career_paths.get_graph(matrix, ["Savoirs"])
+
+    graphs = [
+        value
+        for value in matrix._memo.values()
+        if isinstance(value, tuple)
+        and any(isinstance(item, career_paths.CareerGraph) for item in value)
+    ]
+    assert len(graphs) == 1
+    assert career_paths.get_graph(matrix, ["Savoirs"]) is other
+    assert other is not graph
+
+
+def test_career_paths_are_memoized(skills_df):
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    weights = {"Savoir-faire": 20, "Savoir-être professionnels": 20, "Savoirs": 60}
+    start = matrix.job_codes[0]
+
+    first = career_paths.find_career_paths(matrix, start, matrix.job_codes[1:], weights)
+    again = career_paths.find_career_paths(matrix, start, matrix.job_codes[1:], weights)
+
+    assert again is first
+    assert not first.empty
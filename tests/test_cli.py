@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from benchmarks import synthetic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs ``python -m core.cli`` with the UI stack made unimportable
+HEADLESS = """
+import runpy
+import sys
+
+UI_MODULES = {"matplotlib", "streamlit", "streamlit_authenticator", "yaml"}
+
+
+class BlockUI:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in UI_MODULES:
+            raise ModuleNotFoundError(f"No module named {name!r}")
+
+
+sys.meta_path.insert(0, BlockUI())
+sys.argv = ["core.cli", *sys.argv[1:]]
+runpy.run_module("core.cli", run_name="__main__")
+"""
+
+
+def run_headless(*args):
+    return subprocess.run(
+        [sys.executable, "-c", HEADLESS, *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+def test_cli_runs_without_streamlit(tmp_path, skills_df):
+    skills_path = tmp_path / "skills.xlsx"
+    clients_path = tmp_path / "clients.xlsx"
+    synthetic.write_skills_file(skills_path, skills_df)
+    synthetic.write_client_file(
+        clients_path,
+        pd.DataFrame({"Code ROME": skills_df["Code Métier"].unique()[:5]}),
+    )
+
+    for command, output in [
+        ("raw", tmp_path / "raw.parquet"),
+        ("report", tmp_path / "report.xlsx"),
+    ]:
+        result = run_headless(
+            command,
+            "--skills",
+            str(skills_path),
+            "--clients",
+            str(clients_path),
+            "--output",
+            str(output),
+            "--workers" if command == "raw" else "--k",
+            "1" if command == "raw" else "5",
+        )
+        assert result.returncode == 0, result.stderr
+        assert output.stat().st_size > 0
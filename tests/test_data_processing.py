@@ -0,0 +1,102 @@
+import gc
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_clean import legacy_clean_text, make_labels
+from core import data_processing, fuzzy_matcher, macro_mapping
+
+
+def test_clean_text_matches_the_regex_chain():
+    s = pd.Series(
+        list(make_labels(300))
+        + ["  Élaboration / «contrôle»\t(qualité) ", "", "n°12 ; a–b—c"]
+    )
+    pd.testing.assert_series_equal(data_processing.clean_text(s), legacy_clean_text(s))
+
+
+def test_clean_text_keeps_hash_equal_values_apart():
+    # 1, 1.0 and True are equal (same hash) but have different texts
+    s = pd.Series(
+        [1, 1.0, True, "1", np.nan, None, 2.5, False, 0, "Été"],
+        dtype=object,
+        index=list(range(20, 10, -1)),
+    )
+    cleaned = data_processing.clean_text(s)
+    pd.testing.assert_series_equal(cleaned, legacy_clean_text(s))
+    assert cleaned.tolist()[:3] == ["1", "1 0", "true"]
+
+
+def test_encode_text_keeps_hash_equal_values_apart():
+    s = pd.Series([1, 1.0, True, np.nan], dtype=object)
+    encoded = data_processing.encode_text(s, clean=True, upper=True)
+    assert encoded.astype(object).tolist() == ["1", "1 0", "TRUE", "NAN"]
+
+
+@pytest.fixture
+def index_builds(monkeypatch):
+    """Mappings the fuzzy matcher builds a trigram index for."""
+    builds = []
+    from_mapping = fuzzy_matcher.TrigramIndex.from_mapping.__func__
+
+    def spy(cls, mapping):
+        builds.append(mapping)
+        return from_mapping(cls, mapping)
+
+    monkeypatch.setattr(fuzzy_matcher.TrigramIndex, "from_mapping", classmethod(spy))
+    return builds
+
+
+def make_mapping():
+    return macro_mapping.MacroMapping.compile(
+        {
+            "gestion du budget": "Piloter les finances",
+            "accueil de la clientele": "Relation client",
+        }
+    )
+
+
+def test_add_macro_competence_skips_the_index_when_all_labels_match(index_builds):
+    df = pd.DataFrame({"Compétences": ["Gestion du budget", "Accueil de la clientèle"]})
+    result = data_processing.add_macro_competence(
+        df, mapping=make_mapping(), fuzzy_threshold=0.35
+    )
+
+    assert index_builds == []
+    assert result["Macro-Compétence"].tolist() == [
+        "Piloter les finances",
+        "Relation client",
+    ]
+    assert result[data_processing.FUZZY_SCORE_COL].tolist() == [1.0, 1.0]
+    assert result[data_processing.FUZZY_KEY_COL].tolist() == [
+        "gestion du budget",
+        "accueil de la clientele",
+    ]
+
+
+def test_add_macro_competence_builds_the_index_once_per_mapping(index_builds):
+    mapping = make_mapping()
+    df = pd.DataFrame({"Compétences": ["Gérer un budget", "Accueil de la clientèle"]})
+    for _ in range(3):
+        result = data_processing.add_macro_competence(
+            df, mapping=mapping, fuzzy_threshold=0.35
+        )
+
+    assert len(index_builds) == 1
+    assert result["Macro-Compétence"].tolist() == [
+        "Piloter les finances",
+        "Relation client",
+    ]
+    assert result[data_processing.FUZZY_KEY_COL].tolist() == [
+        "gestion du budget",
+        "accueil de la clientele",
+    ]
+
+    # The index goes with its mapping
+    index = weakref.ref(fuzzy_matcher.get_index(mapping))
+    index_builds.clear()
+    del mapping
+    gc.collect()
+    assert index() is None
@@ -0,0 +1,48 @@
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from core import excel_reader
+
+
+@pytest.fixture
+def workbook_file():
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Macro-Compétences"
+    worksheet.append(["Code", "Libellé", "Valeur", "Ignorée"])
+    worksheet.append(["A1", "#DIV/0!", 1.0, "x"])
+    worksheet.append(["A2", "0012", 2.5, "y"])
+    worksheet["B2"].data_type = "s"  # error-like text, not an error cell
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_read_excel_projects_columns_like_pandas(workbook_file):
+    df = excel_reader.read_excel(
+        workbook_file,
+        "Macro-Compétences",
+        columns=["Libellé", "Code", "Absente"],
+        # Hints of columns that are not read are dropped
+        dtype={"Libellé": str, "Ignorée": int},
+        engine="openpyxl",
+    )
+
+    assert df.columns.tolist() == ["Code", "Libellé"]
+    assert df["Libellé"].tolist() == ["#DIV/0!", "0012"]
+    workbook_file.seek(0)
+    pd.testing.assert_frame_equal(
+        df,
+        pd.read_excel(
+            workbook_file, usecols=["Code", "Libellé"], dtype={"Libellé": str}
+        ),
+    )
+
+
+def test_read_excel_rejects_unknown_sheets(workbook_file):
+    with pytest.raises(ValueError):
+        excel_reader.read_excel(workbook_file, "Inconnue", engine="openpyxl")
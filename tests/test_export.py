@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core import export, passerelle_engine
+
+
+def write_parquet(sheets):
+    buffer = io.BytesIO()
+    written = export.stream_parquet(
+        buffer, sheets, columns=passerelle_engine.TRANSITION_COLUMNS
+    )
+    buffer.seek(0)
+    return written, buffer
+
+
+def test_stream_parquet_dictionary_encodes_the_labels(skills_df):
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    batches = list(
+        passerelle_engine.iter_transitions(
+            matrix, matrix.job_codes[:5], matrix.job_codes[5:]
+        )
+    )
+    written, buffer = write_parquet([("Passerelle sortante", iter(batches))])
+    table = pq.read_table(buffer)
+
+    assert written == {"Passerelle sortante": table.num_rows}
+    for field in table.schema:
+        if field.name == "Nombre de compétences partagées":
+            assert field.type == pa.int64()
+        else:
+            assert field.type == pa.dictionary(pa.int32(), pa.string())
+    expected = pd.concat(batches, ignore_index=True)
+    result = table.to_pandas()
+    assert (result[export.SHEET_COLUMN] == "Passerelle sortante").all()
+    for column in passerelle_engine.TRANSITION_COLUMNS:
+        np.testing.assert_array_equal(
+            result[column].to_numpy(dtype=object),
+            expected[column].to_numpy(dtype=object),
+        )
+
+
+def test_stream_parquet_empty_file_has_the_same_schema(skills_df):
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    batches = passerelle_engine.iter_transitions(
+        matrix, matrix.job_codes[:2], matrix.job_codes[2:]
+    )
+    _, full = write_parquet([("Passerelle entrante", batches)])
+    written, empty = write_parquet([("Passerelle entrante", iter([]))])
+
+    assert written == {"Passerelle entrante": 0}
+    assert pq.read_table(empty).num_rows == 0
+    assert pq.read_schema(empty).equals(pq.read_schema(full), check_metadata=True)
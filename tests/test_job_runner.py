@@ -0,0 +1,58 @@
+import json
+import os
+import stat
+import time
+
+from core import job_runner
+
+
+def write_record(jobs_dir, name, **fields):
+    record = {
+        "id": name,
+        "owner": "alice",
+        "label": "Passerelles",
+        "path": os.path.join(jobs_dir, f"{name}.parquet"),
+        "status": job_runner.DONE,
+        "created": time.time() - 7200,
+        "finished": time.time() - 7200,
+    }
+    record.update(fields)
+    with open(os.path.join(jobs_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(record, f)
+
+
+def test_jobs_dir_is_private(tmp_path):
+    runner = job_runner.JobRunner(jobs_dir=str(tmp_path / "jobs"))
+
+    def task(path, progress):
+        with open(path, "w") as f:
+            f.write("ok")
+
+    job_id = runner.submit("alice", "Passerelles", "csv", task)
+    runner.get(job_id)._future.result()
+
+    assert stat.S_IMODE(os.stat(runner.jobs_dir).st_mode) == 0o700
+    assert runner.get(job_id).status == job_runner.DONE
+
+
+def test_records_pointing_outside_the_jobs_dir_are_ignored(tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    jobs_dir.mkdir(mode=0o700)
+    outside = tmp_path / "confidential.xlsx"
+    outside.write_text("secret")
+    (jobs_dir / f"{'a' * 32}.parquet").write_text("artifact")
+    write_record(str(jobs_dir), "a" * 32)
+    write_record(str(jobs_dir), "b" * 32, path=str(outside))
+    write_record(str(jobs_dir), "c" * 32, id="../c")
+    link = jobs_dir / f"{'d' * 32}.parquet"
+    link.symlink_to(outside)
+    write_record(str(jobs_dir), "d" * 32)
+
+    runner = job_runner.JobRunner(jobs_dir=str(jobs_dir), ttl=24 * 3600)
+
+    assert [job.id for job in runner.jobs()] == ["a" * 32]
+    # Expiring every job only deletes files of the jobs directory
+    runner.ttl = 1
+    runner.purge_expired()
+    assert runner.jobs() == []
+    assert outside.read_text() == "secret"
@@ -0,0 +1,60 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from core import minhash_lsh
+
+
+def reference_signatures(indptr, indices, hash_a, hash_b):
+    """One row at a time, every permutation at once."""
+    signatures = np.full(
+        (len(indptr) - 1, len(hash_a)), minhash_lsh._EMPTY, dtype=np.uint32
+    )
+    for row in range(len(indptr) - 1):
+        values = indices[indptr[row] : indptr[row + 1]].astype(np.int64)
+        if len(values):
+            hashed = (hash_a[:, None] * values + hash_b[:, None]) % minhash_lsh._PRIME
+            signatures[row] = hashed.min(axis=1)
+    return signatures
+
+
+@pytest.mark.parametrize(
+    "max_elements, perm_chunk", [(1 << 21, 64), (256, 16), (40, 7), (1, 1)]
+)
+def test_signatures_do_not_depend_on_the_budget(max_elements, perm_chunk):
+    rng = np.random.default_rng(0)
+    matrix = sparse.random(300, 200, density=0.05, format="lil", random_state=1)
+    matrix[[0, 7, 150, 151, 299]] = 0  # rows without any skill
+    matrix = matrix.tocsr()
+    matrix.eliminate_zeros()
+    hash_a = rng.integers(1, minhash_lsh._PRIME, size=96, dtype=np.int64)
+    hash_b = rng.integers(0, minhash_lsh._PRIME, size=96, dtype=np.int64)
+
+    signatures = minhash_lsh._signatures(
+        matrix.indptr, matrix.indices, hash_a, hash_b, max_elements, perm_chunk
+    )
+
+    np.testing.assert_array_equal(
+        signatures,
+        reference_signatures(matrix.indptr, matrix.indices, hash_a, hash_b),
+    )
+
+
+def test_signatures_bound_the_hashed_temporaries():
+    matrix = sparse.random(500, 300, density=0.1, format="csr", random_state=2)
+    hash_a = np.arange(1, 129, dtype=np.int64)
+    output_bytes = 500 * 128 * 4
+
+    tracemalloc.start()
+    try:
+        minhash_lsh._signatures(
+            matrix.indptr, matrix.indices, hash_a, hash_a, max_elements=4096
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # All at once, the hashes alone would weigh 128 × 15 000 × 8 bytes (15 MB)
+    assert peak - output_bytes < 1 << 20
@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from core import passerelle_engine
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool recording how many tasks were submitted."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = 0
+        self._count_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        with self._count_lock:
+            self.submitted += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_bounded_map_limits_outstanding_shards():
+    window = 4
+    with CountingExecutor(max_workers=2) as executor:
+        results = []
+        max_outstanding = 0
+        for result in passerelle_engine._bounded_map(
+            executor, lambda i: i * i, ((i,) for i in range(50)), window=window
+        ):
+            # Submitted but not yet consumed (the current one included)
+            max_outstanding = max(max_outstanding, executor.submitted - len(results))
+            time.sleep(0.001)  # slow consumer
+            results.append(result)
+
+    assert results == [i * i for i in range(50)]
+    assert max_outstanding <= window
+
+
+def test_bounded_map_cancels_pending_tasks_when_abandoned():
+    with CountingExecutor(max_workers=1) as executor:
+        results = passerelle_engine._bounded_map(
+            executor, lambda i: i, ((i,) for i in range(100)), window=3
+        )
+        assert next(results) == 0
+        results.close()
+    assert executor.submitted == 3
+
+
+def test_parallel_transitions_match_serial(skills_df):
+    matrix = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    codes = matrix.job_codes
+    serial = pd.concat(
+        passerelle_engine.iter_transitions(matrix, codes[:20], codes[20:])
+    )
+    parallel = pd.concat(
+        passerelle_engine.iter_transitions_parallel(
+            matrix, codes[:20], codes[20:], workers=2, shards_per_worker=3
+        )
+    )
+    pd.testing.assert_frame_equal(
+        serial.reset_index(drop=True), parallel.reset_index(drop=True)
+    )
@@ -0,0 +1,115 @@
+import os
+import stat
+import time
+
+import pandas as pd
+import pytest
+
+from core import macro_mapping, referential_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return referential_cache.ReferentialCache(
+        max_entries=2, cache_dir=str(tmp_path / "cache")
+    )
+
+
+def make_loader(calls):
+    def load():
+        calls.append(1)
+        return pd.DataFrame({"Code ROME": ["A1001", "B1002", "A1001"], "x": 1})
+
+    return load
+
+
+def test_reruns_are_served_from_memory(cache):
+    calls = []
+    first = cache.get("digest", 0, ["Code ROME"], make_loader(calls))
+    again = cache.get("digest", 0, ["Code ROME"], make_loader(calls))
+
+    assert again is first
+    assert len(calls) == 1
+    assert isinstance(first["Code ROME"].dtype, pd.CategoricalDtype)
+    assert cache.stats() == {"hits": 1, "disk_hits": 0, "misses": 1, "entries": 1}
+
+
+def test_frames_owned_elsewhere_are_only_spilled(cache):
+    calls = []
+    first = cache.get(
+        "digest", 0, ["Code ROME"], make_loader(calls), keep_in_memory=False
+    )
+    again = cache.get(
+        "digest", 0, ["Code ROME"], make_loader(calls), keep_in_memory=False
+    )
+
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(again, first)
+    assert cache.stats() == {"hits": 0, "disk_hits": 1, "misses": 1, "entries": 0}
+
+
+def spilled(directory):
+    return sorted(name for name in os.listdir(directory) if ".parquet" in name)
+
+
+def test_memory_entries_are_bounded_and_dropped_from_disk(cache):
+    for digest in ("a", "b", "c"):
+        cache.get(digest, 0, ["Code ROME"], make_loader([]))
+
+    assert cache.stats()["entries"] == 2
+    # The first entry left the LRU: its file is gone too
+    assert len(spilled(cache.cache_dir)) == 2
+    assert not os.path.exists(cache._disk_path(cache.make_key("a", 0, ["Code ROME"])))
+
+    cache.clear()
+    assert spilled(cache.cache_dir) == []
+
+
+def test_disk_store_is_private(cache):
+    cache.get("digest", 0, ["Code ROME"], make_loader([]), keep_in_memory=False)
+
+    assert stat.S_IMODE(os.stat(cache.cache_dir).st_mode) == 0o700
+    (name,) = spilled(cache.cache_dir)
+    path = os.path.join(cache.cache_dir, name)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_disk_store_expires_old_entries(cache):
+    calls = []
+    cache.get("digest", 0, ["Code ROME"], make_loader(calls), keep_in_memory=False)
+    (name,) = spilled(cache.cache_dir)
+    old = time.time() - cache.ttl - 60
+    os.utime(os.path.join(cache.cache_dir, name), (old, old))
+
+    cache.get("digest", 0, ["Code ROME"], make_loader(calls), keep_in_memory=False)
+
+    assert len(calls) == 2  # the expired spill was not used
+    assert cache.stats()["disk_hits"] == 0
+
+
+def test_disk_store_is_bounded_by_size(cache):
+    for i, digest in enumerate(("a", "b", "c")):
+        cache.get(digest, 0, ["Code ROME"], make_loader([]), keep_in_memory=False)
+        # Distinct write times, oldest first
+        path = cache._disk_path(cache.make_key(digest, 0, ["Code ROME"]))
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+        size = os.path.getsize(path)
+    cache.max_bytes = 2 * size
+
+    cache.get("d", 0, ["Code ROME"], make_loader([]), keep_in_memory=False)
+
+    kept = spilled(cache.cache_dir)
+    assert len(kept) == 2
+    assert f"{cache.make_key('d', 0, ['Code ROME'])}.parquet" in kept
+    assert f"{cache.make_key('c', 0, ['Code ROME'])}.parquet" in kept
+
+
+def test_macro_mapping_store_drops_evicted_mappings(tmp_path):
+    cache = macro_mapping.MacroMappingCache(max_entries=1, cache_dir=str(tmp_path))
+    first = cache.get("a", lambda: {"gestion du budget": "Finances"})
+    cache.get("b", lambda: {"accueil": "Relation client"})
+
+    assert stat.S_IMODE(os.stat(cache.cache_dir).st_mode) == 0o700
+    assert os.listdir(cache.cache_dir) == [f"b.v{macro_mapping.MAPPING_VERSION}"]
+    # The mapping still in use stays readable
+    assert first.keys.tolist() == [b"gestion du budget"]
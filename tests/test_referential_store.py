@@ -0,0 +1,118 @@
+import gc
+import io
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from core import (
+    data_processing,
+    passerelle_engine,
+    referential_cache,
+    referential_store,
+)
+
+
+@pytest.fixture
+def skills_file(skills_df):
+    buffer = io.BytesIO()
+    synthetic.write_skills_file(buffer, skills_df)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def isolated_caches(monkeypatch, tmp_path):
+    """Fresh process-wide cache (spilled under ``tmp_path``) and store."""
+    cache = referential_cache.ReferentialCache(cache_dir=str(tmp_path))
+    store = referential_store.ReferentialStore()
+    monkeypatch.setattr(referential_cache, "_CACHE", cache)
+    monkeypatch.setattr(referential_store, "_STORE", store)
+    return cache, store
+
+
+@pytest.fixture
+def built_frames(monkeypatch):
+    """Frames the store builds its matrices from."""
+    frames = []
+    from_frame = passerelle_engine.SkillMatrix.from_frame.__func__
+
+    def spy(cls, df):
+        frames.append(df)
+        return from_frame(cls, df)
+
+    monkeypatch.setattr(passerelle_engine.SkillMatrix, "from_frame", classmethod(spy))
+    return frames
+
+
+def test_session_referential_loads_an_encoded_frame(
+    isolated_caches, skills_df, skills_file, built_frames
+):
+    session_state = {}
+    referential = referential_store.session_referential(
+        session_state, skills_file, file_label="compétences ROME"
+    )
+
+    (frame,) = built_frames
+    for column in data_processing.SKILLS_REQUIRED_COLS:
+        assert isinstance(frame[column].dtype, pd.CategoricalDtype)
+        # Same values as the plain text read, one string per distinct value
+        np.testing.assert_array_equal(
+            frame[column].to_numpy(dtype=object),
+            skills_df[column].to_numpy(dtype=object),
+        )
+    assert frame.memory_usage(deep=True).sum() < (
+        skills_df.memory_usage(deep=True).sum() / 4
+    )
+
+    expected = passerelle_engine.SkillMatrix.from_frame(skills_df)
+    np.testing.assert_array_equal(referential.matrix.job_codes, expected.job_codes)
+    np.testing.assert_array_equal(referential.matrix.skills, expected.skills)
+    session_state[referential_store.SESSION_KEY].release()
+
+
+def test_released_referential_frees_its_frames(
+    isolated_caches, skills_file, built_frames
+):
+    cache, store = isolated_caches
+    session_state = {}
+    referential = referential_store.session_referential(
+        session_state, skills_file, file_label="compétences ROME"
+    )
+    matrix = weakref.ref(referential.matrix)
+    frame = weakref.ref(built_frames.pop())
+    del referential
+    gc.collect()
+
+    # Only the store's matrix outlives the build: the parsed frames are freed
+    assert frame() is None
+    assert cache.stats()["entries"] == 0
+    assert matrix() is not None
+
+    session_state.pop(referential_store.SESSION_KEY).release()
+    gc.collect()
+    assert store.stats()["versions"] == 0
+    assert matrix() is None
+
+    # The next session reads the Parquet spill instead of the Excel file
+    referential_store.session_referential(
+        {}, skills_file, file_label="compétences ROME"
+    )
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["disk_hits"] == 1
+    assert store.stats()["builds"] == 2
+
+
+def test_validate_skills_encodes_columns(skills_df):
+    raw = skills_df.astype(object)
+    raw.loc[0, "Intitulé"] = np.nan
+    validated = data_processing.validate_skills(raw)
+
+    assert len(validated) == len(raw) - 1
+    for column in data_processing.SKILLS_REQUIRED_COLS:
+        assert isinstance(validated[column].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(
+        validated.astype(object), raw.dropna(subset=["Intitulé"]).astype(object)
+    )